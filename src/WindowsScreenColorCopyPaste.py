@@ -4,6 +4,8 @@ import os
 import time
 import traceback
 import threading
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
 # Global exception hook for better debugging in .exe
 def global_exception_hook(exctype, value, tb_obj):
@@ -23,10 +25,8 @@ def global_exception_hook(exctype, value, tb_obj):
 
 sys.excepthook = global_exception_hook
 
-# Definition of log_message at the very beginning
-def log_message(message: str):
-    """Logs a message to standard output with the [LOG] prefix."""
-    print(f"[LOG] {message}", flush=True)
+# log_message is imported at the very beginning (shared with the helper modules)
+from app_logging import log_message
 
 def get_script_or_exe_path():
     """Determines the actual path of the script or frozen executable."""
@@ -61,19 +61,13 @@ except ImportError:
     _PSUTIL_AVAILABLE = False
     log_message("psutil module is not available. Process killing functionality may not work as expected.")
 
-_PYWIN32_AVAILABLE = True
-win32gui = None 
-win32con = None
-win32api = None
-pywintypes = None 
+_NUMPY_AVAILABLE = True
+np = None
 try:
-    import pywintypes 
-    import win32gui
-    import win32con
-    import win32api
+    import numpy as np
 except ImportError:
-    _PYWIN32_AVAILABLE = False
-    log_message("pywin32 module (win32gui, win32con, win32api, pywintypes) is not available. External dialog interaction (sending RGB values) will be disabled.")
+    _NUMPY_AVAILABLE = False
+    log_message("numpy module is not available. The magnifier will use the slower PIL renderer.")
 
 
 from PySide6.QtWidgets import (
@@ -95,7 +89,16 @@ from PySide6.QtWidgets import (
     QSpacerItem,
     QSizePolicy,
     QSystemTrayIcon,
-    QStyle
+    QStyle,
+    QCheckBox,
+    QToolTip,
+    QAbstractScrollArea,
+    QComboBox,
+    QInputDialog,
+    QFileDialog,
+    QListWidget,
+    QListWidgetItem,
+    QMessageBox
 )
 from PySide6.QtGui import (
     QColor,
@@ -111,6 +114,7 @@ from PySide6.QtGui import (
     QImage,
     QIcon,
     QAction,
+    QPainter,
 )
 from PySide6.QtCore import (
     Qt,
@@ -124,23 +128,48 @@ from PySide6.QtCore import (
     QPoint
 )
 
-from PIL import Image, ImageGrab, ImageDraw
+from PIL import Image, ImageDraw
 from PIL.ImageQt import ImageQt
 
+from color_conversion import FORMAT_CACHE
+from palette_model import PaletteModel, parse_color_string
+from color_index import ColorIndex
+from color_history import NO_POSITION, SOURCE_FROZEN_SCREEN, SOURCE_SCREEN, ColorHistory, color_history_path
+from color_spaces import delta_e76, delta_e2000
+from settings_writer import SettingsWriter
+from palette_store import KIND_CUSTOM, KIND_SHADES, KIND_USER, PaletteStore, model_snapshot, palette_store_path, read_gpl
+from format_templates import FORMAT_BUTTONS_GROUP, load_button_bindings, load_format_templates
+from dialog_profiles import BUILTIN_PROFILES, SET_TEXT_REPLACE_SEL, DialogProfile, load_dialog_profiles
+from window_backend import (EM_REPLACESEL, EM_SETSEL, EN_CHANGE, WINDOW_ERRORS, WM_COMMAND, WM_SETFOCUS, WM_SETTEXT,
+                            default_window_backend, make_long)
+from screen_capture import CapturedRegion, PilCaptureBackend, QtCaptureBackend, SnapshotCaptureBackend, select_capture_backend
+
 # --- Constants ---
 # CONFIG_FILE_NAME = "Windows_Screen_Color_Copy_Paste.ini" # No longer used directly for path construction
+# INI palette keys of earlier versions; migrated into the palette library (palette_store.py) on first run.
 STANDARD_CUSTOM_COLORS_KEY = "standardCustomColors16"
 DEFAULT_SHADES_PALETTE_KEY = "defaultShadesPalette64"
 USER_CUSTOM_PALETTE_KEY = "userCustomPalette64"
-
-WIN_HUE_MAX = 239.0
-WIN_SAT_LUM_MAX = 240.0
-QCOLOR_HUE_MAX = 359.0
-QCOLOR_SAT_LUM_VAL_MAX = 255.0
-
-DLG_COLOR_RED_EDIT_ID = 706
-DLG_COLOR_GREEN_EDIT_ID = 707
-DLG_COLOR_BLUE_EDIT_ID = 708
+CUSTOM_COLORS_PALETTE = "Custom Colors"
+DEFAULT_SHADES_PALETTE = "Default Shades"
+USER_PALETTE = "User Palette"
+CURRENT_USER_PALETTE_KEY = "palettes/current"
+
+MAGNIFIER_MAX_FPS_KEY = "magnifier/maxFps" # 0 or missing = follow QScreen.refreshRate()
+FREEZE_FRAME_KEY = "picker/freezeFrame"
+BROADCAST_KEY = "dialogs/broadcast"
+NEAREST_MAX_DELTA_E_KEY = "nearestColor/maxDeltaE" # matches farther than this (OKLab delta E x100) are not reported
+DEFAULT_NEAREST_MAX_DELTA_E = 10.0
+NEAREST_ALL_PALETTES_KEY = "nearestColor/allPalettes" # true: also search library palettes never shown (their colors are read once, after startup)
+REFERENCE_COLOR_KEY = "values/referenceColor" # color the values panel reports delta E76/E2000 against
+CURRENT_FORMAT_TEMPLATE_KEY = "values/formatTemplate" # template shown in the Format Templates box
+EXTERNAL_SEND_INTERVAL_MS = 50 # minimum gap between colors pushed to an external dialog while dragging or hovering
+HISTORY_CAPACITY_KEY = "history/capacity" # picks kept in the pick history (newest first)
+HISTORY_RANGE_KEY = "history/range" # time range shown in the Pick History panel
+HISTORY_PANEL_ROWS = 200 # picks listed in the panel; queries still cover the whole history
+HISTORY_REFRESH_MS = 150 # "similar to current" re-queries the history at most this often while the color changes
+# Pick History time ranges: label -> seconds back from now (None: all picks, 0: since local midnight).
+HISTORY_RANGES = {"All picks": None, "Last hour": 3600, "Today": 0, "Last 7 days": 7 * 86400}
 
 ICON_FILE_NAME = "icon.ico" # Still used for loading the icon file
 
@@ -303,19 +332,448 @@ def kill_lingering_processes_by_name(process_name="WindowsScreenColorCopyPaste.e
 
 
 class UpdateSignalEmitter(QObject):
-    update_ready = Signal(QImage, int, int)
+    frame_available = Signal()
+
+class LatestValueMailbox:
+    """
+    Single-slot, latest-value-wins handoff from a worker thread to the GUI
+    thread. post() overwrites an unconsumed value (counted as dropped and
+    passed to on_drop) and returns True only when the consumer has to be
+    notified, i.e. at most once until take() empties the slot.
+    """
+    def __init__(self, on_drop=None):
+        self._lock = threading.Lock()
+        self._slot = None
+        self._notify_pending = False
+        self._on_drop = on_drop
+        self.posted = 0
+        self.taken = 0
+        self.dropped = 0
+
+    def post(self, value) -> bool:
+        with self._lock:
+            stale = self._slot
+            self._slot = value
+            self.posted += 1
+            if stale is not None: self.dropped += 1
+            notify = not self._notify_pending
+            self._notify_pending = True
+        if stale is not None and self._on_drop: self._on_drop(stale)
+        return notify
+
+    def take(self):
+        with self._lock:
+            value = self._slot
+            self._slot = None
+            self._notify_pending = False
+            if value is not None: self.taken += 1
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'posted': self.posted, 'taken': self.taken, 'dropped': self.dropped}
+
+class FrameScheduler:
+    """
+    Paces the magnifier worker. Frames are only rendered when the cursor moved
+    or the captured pixels changed; the loop runs at max_fps while the cursor
+    moves and backs off towards IDLE_FPS once it has been stationary.
+    """
+    DEFAULT_MAX_FPS = 60.0
+    IDLE_FPS = 4.0
+    STATIONARY_TICKS_BEFORE_BACKOFF = 10
+    BACKOFF_FACTOR = 1.5
+
+    def __init__(self, max_fps: float = DEFAULT_MAX_FPS):
+        if not max_fps or max_fps <= 0: max_fps = self.DEFAULT_MAX_FPS
+        self.max_fps = max(float(max_fps), self.IDLE_FPS)
+        self.min_interval = 1.0 / self.max_fps
+        self.idle_interval = 1.0 / self.IDLE_FPS
+        self.interval = self.min_interval
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+        self._stationary_ticks = 0
+        self._last_pos = None
+        self._last_pixels = None
+
+    def should_render(self, pos, pixels) -> bool:
+        """Registers one tick and returns True if a new frame has to be produced."""
+        moved = pos != self._last_pos
+        changed = moved or pixels != self._last_pixels
+        self._last_pos = pos; self._last_pixels = pixels
+        if moved:
+            self._stationary_ticks = 0
+            self.interval = self.min_interval
+        else:
+            self._stationary_ticks += 1
+            if self._stationary_ticks > self.STATIONARY_TICKS_BEFORE_BACKOFF:
+                self.interval = min(self.interval * self.BACKOFF_FACTOR, self.idle_interval)
+        if changed: self.frames_rendered += 1
+        else: self.frames_skipped += 1
+        return changed
+
+    def reset(self):
+        """Forgets the last frame so the next tick always renders."""
+        self._last_pos = None; self._last_pixels = None
+        self._stationary_ticks = 0; self.interval = self.min_interval
+
+    def stats(self) -> dict:
+        total = self.frames_rendered + self.frames_skipped
+        return {
+            'frames_rendered': self.frames_rendered,
+            'frames_skipped': self.frames_skipped,
+            'skip_ratio': (self.frames_skipped / total) if total else 0.0,
+            'max_fps': self.max_fps,
+            'current_fps': 1.0 / self.interval,
+        }
+
+def screen_refresh_rate(default: float = FrameScheduler.DEFAULT_MAX_FPS) -> float:
+    """Refresh rate of the primary screen, or default if Qt cannot report one."""
+    screen = QApplication.primaryScreen()
+    try:
+        rate = screen.refreshRate() if screen else 0.0
+    except Exception:
+        rate = 0.0
+    return rate if rate and rate > 1.0 else default
+
+class CoalescingTimer(QObject):
+    """
+    Runs callback at most once per interval however often request() is
+    called, always for the latest state: a request after a quiet period runs
+    at once, further requests within the interval fold into one run when it
+    is over. Counts requests and runs so the incoming event rate can be
+    compared with the rate the work is actually done at.
+    """
+    def __init__(self, callback, interval_ms: float, parent=None):
+        super().__init__(parent)
+        self._callback = callback
+        self.interval = interval_ms / 1e3
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._run)
+        self._last_run = float("-inf")
+        self._first_request = None
+        self._last_request = None
+        self.requests = 0
+        self.runs = 0
+
+    def request(self):
+        now = time.perf_counter()
+        self.requests += 1
+        if self._first_request is None: self._first_request = now
+        self._last_request = now
+        if self._timer.isActive(): return
+        wait = self._last_run + self.interval - now
+        if wait <= 0: self._run()
+        else: self._timer.start(max(1, int(wait * 1e3 + 0.999)))
+
+    def flush(self):
+        """Runs a pending callback now instead of at the end of the interval."""
+        if self._timer.isActive(): self._run()
+
+    def cancel(self):
+        self._timer.stop()
+
+    def _run(self):
+        self._timer.stop()
+        self._last_run = time.perf_counter()
+        self.runs += 1
+        self._callback()
+
+    def stats(self) -> dict:
+        span = (self._last_request - self._first_request) if self.requests > 1 else 0.0
+        return {'requests': self.requests, 'runs': self.runs, 'coalesced': self.requests - self.runs,
+                'request_rate': round(self.requests / span, 1) if span > 0 else 0.0,
+                'run_rate': round(self.runs / span, 1) if span > 0 else 0.0}
+
+def draw_magnifier_marks(draw, capture_size: int, magnifier_size: int):
+    """Draws the red cell outline and the two-layer crosshair of the magnifier."""
+    scale = magnifier_size / capture_size
+    half_capture_dim = capture_size // 2
+    block_x0 = half_capture_dim * scale; block_y0 = half_capture_dim * scale
+    draw.rectangle([block_x0, block_y0, block_x0 + scale - 1, block_y0 + scale - 1], outline='red', width=1)
+    center_x = block_x0 + scale / 2; center_y = block_y0 + scale / 2
+    cross_arm_len = max(1, int(scale / 6))
+    draw.line([center_x - cross_arm_len, center_y, center_x + cross_arm_len, center_y], fill='black', width=3)
+    draw.line([center_x, center_y - cross_arm_len, center_x, center_y + cross_arm_len], fill='black', width=3)
+    draw.line([center_x - cross_arm_len, center_y, center_x + cross_arm_len, center_y], fill='white', width=1)
+    draw.line([center_x, center_y - cross_arm_len, center_x, center_y + cross_arm_len], fill='white', width=1)
+
+class MagnifierRenderer:
+    """
+    NumPy replacement for the PIL resize + ImageDraw path of the magnifier.
+    The captured block (uint32 pixels laid out as QImage.Format_RGB32) is
+    upscaled by integer repetition into a preallocated frame (columns first
+    into one band of rows, then the band is repeated down), and the
+    crosshair/outline overlay, precomputed once per size pair as a mask, is
+    scattered on top. render() does not allocate.
+    """
+    _overlay_cache = {}
+
+    def __init__(self, capture_size: int, magnifier_size: int):
+        if not self.supports(capture_size, magnifier_size):
+            raise ValueError(f"MagnifierRenderer needs numpy and an integer scale factor ({capture_size} -> {magnifier_size}).")
+        self.capture_size = capture_size
+        self.magnifier_size = magnifier_size
+        self.factor = magnifier_size // capture_size
+        self.frame = np.zeros((magnifier_size, magnifier_size), dtype=np.uint32)
+        self._block = np.zeros((capture_size, capture_size), dtype=np.uint32)
+        self._band = np.zeros((capture_size, magnifier_size), dtype=np.uint32)
+        self._band_cells = self._band.reshape(capture_size, capture_size, self.factor)
+        overlay_mask, overlay_pixels = self.overlay_for(capture_size, magnifier_size)
+        self._overlay_index = np.flatnonzero(overlay_mask)
+        self._overlay_values = overlay_pixels.reshape(-1)[self._overlay_index]
+
+    @staticmethod
+    def supports(capture_size: int, magnifier_size: int) -> bool:
+        return _NUMPY_AVAILABLE and capture_size > 0 and magnifier_size >= capture_size and magnifier_size % capture_size == 0
+
+    @classmethod
+    def overlay_for(cls, capture_size: int, magnifier_size: int):
+        """Returns the (mask, pixels) overlay for a size pair, drawing it on first use."""
+        key = (capture_size, magnifier_size)
+        cached = cls._overlay_cache.get(key)
+        if cached is None:
+            overlay_img = Image.new('RGBA', (magnifier_size, magnifier_size), (0, 0, 0, 0))
+            draw_magnifier_marks(ImageDraw.Draw(overlay_img), capture_size, magnifier_size)
+            rgba = np.asarray(overlay_img)
+            mask = rgba[..., 3] > 0
+            pixels = (np.uint32(0xFF000000) | (rgba[..., 0].astype(np.uint32) << 16)
+                      | (rgba[..., 1].astype(np.uint32) << 8) | rgba[..., 2].astype(np.uint32))
+            cached = (mask, pixels)
+            cls._overlay_cache[key] = cached
+        return cached
+
+    @staticmethod
+    def block_from_bgrx(data: bytes, capture_size: int):
+        """Views raw BGRX bytes (PIL 'raw','BGRX' or a native screen grab) as RGB32 pixels."""
+        return np.frombuffer(data, dtype=np.uint32).reshape(capture_size, capture_size)
+
+    def render(self, block, out=None):
+        """
+        Renders a (capture_size, capture_size) RGB32 block into out (a
+        (magnifier_size, magnifier_size) uint32 array, default self.frame) and returns it.
+        """
+        if out is None: out = self.frame
+        np.bitwise_or(block, np.uint32(0xFF000000), out=self._block)
+        self._band_cells[...] = self._block[:, :, None]
+        out.reshape(self.capture_size, self.factor, self.magnifier_size)[...] = self._band[:, None, :]
+        out.reshape(-1)[self._overlay_index] = self._overlay_values
+        return out
+
+    def to_qimage(self) -> QImage:
+        """Wraps the current frame in a QImage that owns a copy of the pixels."""
+        return QImage(self.frame.data, self.magnifier_size, self.magnifier_size,
+                      self.magnifier_size * 4, QImage.Format.Format_RGB32).copy()
+
+class MagnifierFrame:
+    """
+    One frame handed from the magnifier worker to the GUI thread. Pooled frames
+    own a uint32 pixel buffer that the QImage wraps without copying; frames from
+    the PIL fallback carry a standalone QImage and pool_slot None.
+    """
+    __slots__ = ('qimage', 'pixels', 'pool_slot')
+
+    def __init__(self, qimage: QImage, pixels=None, pool_slot=None):
+        self.qimage = qimage
+        self.pixels = pixels
+        self.pool_slot = pool_slot
+
+class FrameBufferPool:
+    """
+    A fixed set of preallocated RGB32 frames shared by the magnifier worker
+    (acquire, render into pixels) and the GUI thread (paint, release).
+    Buffers are only ever allocated in the constructor.
+    """
+    def __init__(self, width: int, height: int, size: int = 3):
+        self.width = width
+        self.height = height
+        self._lock = threading.Lock()
+        self._frames = []
+        for slot in range(size):
+            pixels = np.zeros((height, width), dtype=np.uint32)
+            qimage = QImage(pixels.data, width, height, width * 4, QImage.Format.Format_RGB32)
+            self._frames.append(MagnifierFrame(qimage, pixels, slot))
+        self._free = list(range(size))
+        self.buffers_allocated = size
+        self.acquired = 0
+        self.released = 0
+        self.exhausted = 0
+
+    def acquire(self):
+        """Returns a free frame, or None if all of them are still owned by the GUI thread."""
+        with self._lock:
+            if not self._free:
+                self.exhausted += 1
+                return None
+            self.acquired += 1
+            return self._frames[self._free.pop()]
+
+    def release(self, frame: MagnifierFrame):
+        if frame is None or frame.pool_slot is None: return
+        with self._lock:
+            if frame.pool_slot not in self._free:
+                self._free.append(frame.pool_slot)
+                self.released += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'buffers_allocated': self.buffers_allocated,
+                'frames_acquired': self.acquired,
+                'frames_released': self.released,
+                'buffer_reuses': max(0, self.acquired - self.buffers_allocated),
+                'pool_exhausted': self.exhausted,
+                'in_use': self.buffers_allocated - len(self._free),
+            }
+
+class ScreenSample:
+    """One sampler tick: the cursor position and its captured neighbourhood (None if the grab failed)."""
+    __slots__ = ('cursor_x', 'cursor_y', 'region')
+
+    def __init__(self, cursor_x: int, cursor_y: int, region):
+        self.cursor_x = cursor_x
+        self.cursor_y = cursor_y
+        self.region = region
+
+class ScreenSampler:
+    """
+    Grabs the capture_size x capture_size neighbourhood of the cursor once per
+    tick on a worker thread and publishes it to every subscriber, so the
+    magnifier image and the hover color always come from the same grab.
+    Ticks are paced by a FrameScheduler and unchanged ticks are not published.
+    Mouse-move handlers only call set_target(); however many raw events
+    arrive, the next tick samples the latest position once. Subscribers run
+    on the worker thread and hand their results to the GUI thread themselves.
+    """
+    def __init__(self, capture_backend, capture_size: int = 10, max_fps: float = 0):
+        self.capture_backend = capture_backend
+        self.capture_size = capture_size
+        refresh_rate = screen_refresh_rate()
+        self.scheduler = FrameScheduler(min(max_fps, refresh_rate) if max_fps and max_fps > 0 else refresh_rate)
+        log_message(f"ScreenSampler: Max rate {self.scheduler.max_fps:.1f} fps (screen refresh {refresh_rate:.1f} Hz), backend '{capture_backend.name}'.")
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._refresh_requested = False
+        self._target = None
+        self._wake = threading.Event()
+        self.move_events = 0
+        self._started_at = None
+        self.running = False
+        self._thread = None
+
+    def subscribe(self, callback):
+        with self._lock:
+            if callback not in self._subscribers: self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers: self._subscribers.remove(callback)
+
+    def request_refresh(self):
+        """Makes the next tick publish even if nothing changed (e.g. a consumer had to drop a sample)."""
+        self._refresh_requested = True
+
+    def set_target(self, x: int, y: int):
+        """Records the latest cursor position from a mouse event; cheap enough to call per raw event."""
+        self._target = (x, y)
+        self.move_events += 1
+        self._wake.set()
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self.running = True
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 0.5):
+        self.running = False
+        self._wake.set()
+        # A Qt grab waits for the GUI thread; joining from there would stall until the grab timed out.
+        self.capture_backend.interrupt()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            log_message("ScreenSampler: Waiting for sampling thread to finish...")
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                log_message("ScreenSampler: Sampling thread did not finish within timeout.")
+        self._thread = None
+
+    def stats(self) -> dict:
+        stats = self.scheduler.stats()
+        elapsed = (time.perf_counter() - self._started_at) if self._started_at else 0.0
+        stats['move_events'] = self.move_events
+        stats['move_event_rate'] = (self.move_events / elapsed) if elapsed > 0 else 0.0
+        stats['sample_rate'] = (stats['frames_rendered'] / elapsed) if elapsed > 0 else 0.0
+        return stats
+
+    def get_mouse_pos(self):
+        target = self._target
+        if target is not None: return target
+        pos = QCursor.pos()
+        return pos.x(), pos.y()
+
+    def _run(self):
+        log_message("ScreenSampler: Sampling thread started.")
+        half_capture_dim = self.capture_size // 2
+        while self.running:
+            try:
+                tick_start = time.perf_counter()
+                self._wake.clear()
+                if self._refresh_requested:
+                    self._refresh_requested = False
+                    self.scheduler.reset()
+                mx, my = self.get_mouse_pos()
+                try:
+                    region = self.capture_backend.grab(mx - half_capture_dim, my - half_capture_dim, self.capture_size, self.capture_size)
+                except Exception:
+                    region = None
+                if self.scheduler.should_render((mx, my), region.data if region is not None else None) and self.running:
+                    self._publish(ScreenSample(mx, my, region))
+                # A new target cuts an idle (backed-off) wait short, but ticks never exceed max_fps.
+                self._wake.wait(self.scheduler.interval)
+                remaining = self.scheduler.min_interval - (time.perf_counter() - tick_start)
+                if remaining > 0 and self.running: time.sleep(remaining)
+            except Exception:
+                if not self.running:
+                    log_message("ScreenSampler: Sampling thread interrupted (running=False in exception).")
+                    break
+                time.sleep(0.1)
+        stats = self.stats()
+        log_message(f"ScreenSampler: Sampling thread finished. Samples published={stats['frames_rendered']}, skipped={stats['frames_skipped']} ({stats['skip_ratio']:.0%} skipped).")
+        log_message(f"ScreenSampler: Mouse move events={stats['move_events']} ({stats['move_event_rate']:.0f}/s) coalesced into {stats['sample_rate']:.0f} samples/s.")
+
+    def _publish(self, sample: ScreenSample):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(sample)
+            except Exception as e:
+                log_message(f"ScreenSampler: Subscriber {getattr(callback, '__qualname__', callback)} failed: {e}")
 
 class MouseMagnifier(QWidget):
-    def __init__(self):
+    def __init__(self, max_fps: float = 0, capture_backend=None, sampler: ScreenSampler = None):
         super().__init__()
-        self.capture_size = 10
+        self._owns_sampler = sampler is None
+        self.sampler = sampler or ScreenSampler(capture_backend or PilCaptureBackend(), 10, max_fps)
+        self.capture_size = self.sampler.capture_size
         self.magnifier_size = 200
+        self.renderer = None
+        self.frame_pool = None
+        if MagnifierRenderer.supports(self.capture_size, self.magnifier_size):
+            self.renderer = MagnifierRenderer(self.capture_size, self.magnifier_size)
+            self.frame_pool = FrameBufferPool(self.magnifier_size, self.magnifier_size)
+        else:
+            log_message("MouseMagnifier: Using PIL renderer (numpy missing or non-integer scale).")
         self.init_ui()
         self.running = True
+        self.frame_mailbox = LatestValueMailbox(on_drop=self._release_dropped_frame)
         self.signal_emitter = UpdateSignalEmitter()
-        self.signal_emitter.update_ready.connect(self.handle_gui_update)
-        self.update_thread = threading.Thread(target=self.update_loop, daemon=True)
-        self.update_thread.start()
+        self.signal_emitter.frame_available.connect(self.handle_gui_update)
+        self.sampler.subscribe(self._on_sample)
+        if self._owns_sampler: self.sampler.start()
 
     def init_ui(self):
         self.setWindowTitle("Magnifier (colorPASTE)")
@@ -332,203 +790,512 @@ class MouseMagnifier(QWidget):
 
     def closeEvent(self, event: QCloseEvent):
         log_message("MouseMagnifier: closeEvent called.")
-        self.running = False
-        if self.update_thread and self.update_thread.is_alive():
-            log_message("MouseMagnifier: Waiting for update thread to finish...")
-            self.update_thread.join(timeout=0.5)
-            if self.update_thread.is_alive():
-                log_message("MouseMagnifier: Update thread did not finish within timeout.")
-            else:
-                log_message("MouseMagnifier: Update thread finished.")
+        if self.running:
+            self.running = False
+            self.sampler.unsubscribe(self._on_sample)
+            if self._owns_sampler: self.sampler.stop()
+            stats = self.frame_stats()
+            log_message(f"MouseMagnifier: Frames rendered={stats['frames_rendered']}, skipped={stats['frames_skipped']} ({stats['skip_ratio']:.0%} skipped), dropped before painting={stats['frames_dropped']}.")
+            if self.frame_pool is not None:
+                log_message(f"MouseMagnifier: Frame pool buffers={stats['buffers_allocated']}, reuses={stats['buffer_reuses']}, exhausted={stats['pool_exhausted']}.")
         event.accept()
 
     def close_app(self):
         log_message("MouseMagnifier: close_app called.")
-        self.running = False
         self.close()
 
-    def get_mouse_pos(self):
-        pos = QCursor.pos()
-        return pos.x(), pos.y()
-
-    def capture_and_mark(self, x: int, y: int):
+    def mark_block(self, screenshot):
         try:
-            scale = self.magnifier_size / self.capture_size
-            half_capture_dim = self.capture_size // 2
-            cap_left = x - half_capture_dim; cap_top = y - half_capture_dim
-            cap_right = cap_left + self.capture_size; cap_bottom = cap_top + self.capture_size
-            screenshot = ImageGrab.grab(bbox=(cap_left, cap_top, cap_right, cap_bottom), all_screens=True)
             big_image = screenshot.resize((self.magnifier_size, self.magnifier_size), Image.Resampling.NEAREST)
-            draw = ImageDraw.Draw(big_image)
-            block_x0 = half_capture_dim * scale; block_y0 = half_capture_dim * scale
-            draw.rectangle([block_x0, block_y0, block_x0 + scale - 1, block_y0 + scale - 1], outline='red', width=1)
-            center_x = block_x0 + scale / 2; center_y = block_y0 + scale / 2
-            cross_arm_len = max(1, int(scale / 6))
-            draw.line([center_x - cross_arm_len, center_y, center_x + cross_arm_len, center_y], fill='black', width=3)
-            draw.line([center_x, center_y - cross_arm_len, center_x, center_y + cross_arm_len], fill='black', width=3)
-            draw.line([center_x - cross_arm_len, center_y, center_x + cross_arm_len, center_y], fill='white', width=1)
-            draw.line([center_x, center_y - cross_arm_len, center_x, center_y + cross_arm_len], fill='white', width=1)
+            draw_magnifier_marks(ImageDraw.Draw(big_image), self.capture_size, self.magnifier_size)
             return big_image
         except Exception:
             return Image.new('RGB', (int(self.magnifier_size), int(self.magnifier_size)), 'black')
 
-    def update_loop(self):
-        log_message("MouseMagnifier: Update_loop thread started.")
-        while self.running:
-            try:
-                mx, my = self.get_mouse_pos()
-                pil_img = self.capture_and_mark(mx, my)
-                if pil_img and self.running:
-                    qimage_for_signal = ImageQt(pil_img)
-                    primary_screen = QApplication.primaryScreen()
-                    if not primary_screen:
-                        time.sleep(0.03)
-                        continue
-                    sg = primary_screen.geometry()
-                    sw, sh = sg.width(), sg.height()
-                    offset = 20
-                    wx, wy = mx + offset, my + offset
-                    if wx + self.magnifier_size > sw: wx = mx - self.magnifier_size - offset
-                    if wy + self.magnifier_size > sh: wy = my - self.magnifier_size - offset
-                    if wx < 0: wx = 0
-                    if wy < 0: wy = 0
-                    self.signal_emitter.update_ready.emit(qimage_for_signal, wx, wy)
-                time.sleep(0.03)
-            except Exception:
-                if not self.running:
-                    log_message("MouseMagnifier: Update_loop thread interrupted (running=False in exception).")
-                    break
-                time.sleep(0.1)
-        log_message("MouseMagnifier: Update_loop thread finished.")
+    def frame_stats(self) -> dict:
+        stats = self.sampler.stats()
+        if self.frame_pool is not None: stats.update(self.frame_pool.stats())
+        mailbox_stats = self.frame_mailbox.stats()
+        stats['frames_delivered'] = mailbox_stats['taken']
+        stats['frames_dropped'] = mailbox_stats['dropped']
+        return stats
+
+    def _on_sample(self, sample: ScreenSample):
+        """Sampler subscriber (worker thread): renders the sample and posts it for painting."""
+        if not self.running: return
+        if sample.region is None:
+            # Capture failed (e.g. secure desktop); show a black frame.
+            pil_img = Image.new('RGB', (int(self.magnifier_size), int(self.magnifier_size)), 'black')
+            self._emit_frame(MagnifierFrame(ImageQt(pil_img)), sample.cursor_x, sample.cursor_y)
+            return
+        frame = self.render_block(sample.region)
+        if frame is None:
+            # Every pooled buffer is still queued for painting; retry on the next tick.
+            self.sampler.request_refresh()
+        else:
+            self._emit_frame(frame, sample.cursor_x, sample.cursor_y)
+
+    def render_block(self, region: CapturedRegion):
+        """Renders into a pooled buffer (None if the pool is exhausted), or via PIL without numpy."""
+        if self.renderer is not None:
+            frame = self.frame_pool.acquire()
+            if frame is not None:
+                self.renderer.render(MagnifierRenderer.block_from_bgrx(region.data, self.capture_size), frame.pixels)
+            return frame
+        return MagnifierFrame(ImageQt(self.mark_block(region.to_pil())))
+
+    def _emit_frame(self, frame: MagnifierFrame, mx: int, my: int):
+        primary_screen = QApplication.primaryScreen()
+        if not primary_screen:
+            # Nothing was shown, so make sure the next tick tries again.
+            if self.frame_pool is not None: self.frame_pool.release(frame)
+            self.sampler.request_refresh()
+            return
+        sg = primary_screen.geometry()
+        sw, sh = sg.width(), sg.height()
+        offset = 20
+        wx, wy = mx + offset, my + offset
+        if wx + self.magnifier_size > sw: wx = mx - self.magnifier_size - offset
+        if wy + self.magnifier_size > sh: wy = my - self.magnifier_size - offset
+        if wx < 0: wx = 0
+        if wy < 0: wy = 0
+        if self.frame_mailbox.post((frame, wx, wy)):
+            self.signal_emitter.frame_available.emit()
+
+    def _release_dropped_frame(self, item):
+        if self.frame_pool is not None: self.frame_pool.release(item[0])
 
 
-    @Slot(QImage, int, int)
-    def handle_gui_update(self, qimage: QImage, new_x: int, new_y: int):
-        if not self.running or not self.isVisible():
+    @Slot()
+    def handle_gui_update(self):
+        item = self.frame_mailbox.take()
+        if item is None:
             return
+        frame, new_x, new_y = item
         try:
-            self.image_label.setPixmap(QPixmap.fromImage(qimage))
+            if not self.running or not self.isVisible():
+                return
+            self.image_label.setPixmap(QPixmap.fromImage(frame.qimage))
             self.move(new_x, new_y)
         except Exception:
             pass
+        finally:
+            if self.frame_pool is not None: self.frame_pool.release(frame)
+
+class DialogMatch:
+    """An open external color dialog matched to its DialogProfile, with its R, G, B edit-control handles."""
+    __slots__ = ('hwnd', 'profile', 'edit_handles')
+
+    def __init__(self, hwnd, profile: DialogProfile, edit_handles: tuple):
+        self.hwnd = hwnd
+        self.profile = profile
+        self.edit_handles = edit_handles
+
+def _match_dialog_controls(backend, hwnd, profile: DialogProfile):
+    """Returns the (R, G, B) edit handles if hwnd has the profile's controls, otherwise None."""
+    handles = []
+    for cid in profile.control_ids:
+        h_edit = backend.get_dlg_item(hwnd, cid)
+        if not h_edit or backend.get_class_name(h_edit).lower() != profile.edit_class.lower():
+            return None
+        handles.append(h_edit)
+    return tuple(handles)
 
-def _find_windows_color_dialog_hwnd():
+def _find_color_dialogs(backend, profiles, first_only: bool = True) -> list:
     """
-    Finds the standard Windows Color Picker dialog HWND.
-    Iterates through top-level windows, checks class and child controls.
-    Returns HWND or None.
+    Finds open color dialogs for all profiles in a single EnumWindows pass.
+    Top-level windows are matched by class first, so each window costs one
+    GetClassName call unless a profile claims its class.
+    Returns DialogMatch objects in Z-order (only the first one if first_only).
     """
-    if not _PYWIN32_AVAILABLE:
-        log_message("Color Picker Verif: pywin32 not available.")
-        return None
-
-    dialog_class_name = "#32770"
-    found_hwnd_holder = {'hwnd': None} 
-
-    def enum_windows_proc(hwnd, lParam_holder):
-        if win32gui.GetClassName(hwnd) == dialog_class_name:
-            h_edit_r = win32gui.GetDlgItem(hwnd, DLG_COLOR_RED_EDIT_ID)
-            h_edit_g = win32gui.GetDlgItem(hwnd, DLG_COLOR_GREEN_EDIT_ID)
-            h_edit_b = win32gui.GetDlgItem(hwnd, DLG_COLOR_BLUE_EDIT_ID)
-            
-            if h_edit_r and h_edit_g and h_edit_b:
-                log_message(f"Color Picker Verif: Found potential HWND {hwnd} (class '{dialog_class_name}') with RGB edit controls.")
-                lParam_holder['hwnd'] = hwnd
-                return False 
+    if backend is None:
+        log_message("Color Picker Verif: No window backend (pywin32 not available).")
+        return []
+
+    profiles_by_class = {}
+    for profile in profiles: profiles_by_class.setdefault(profile.dialog_class, []).append(profile)
+    found = []
+
+    def enum_windows_proc(hwnd):
+        candidates = profiles_by_class.get(backend.get_class_name(hwnd))
+        if candidates:
+            for profile in candidates:
+                edit_handles = _match_dialog_controls(backend, hwnd, profile)
+                if edit_handles:
+                    log_message(f"Color Picker Verif: Found HWND {hwnd} (class '{profile.dialog_class}') matching profile '{profile.name}'.")
+                    found.append(DialogMatch(hwnd, profile, edit_handles))
+                    return not first_only
         return True 
 
     try:
-        win32gui.EnumWindows(enum_windows_proc, found_hwnd_holder)
-    except pywintypes.error as e:
-        log_message(f"Color Picker Verif: pywintypes.error during/after EnumWindows: code={e.winerror}, func='{e.funcname}', msg='{e.strerror}'")
-        if e.winerror == 0 and e.funcname == 'EnumWindows' and not found_hwnd_holder['hwnd']:
-             log_message("Color Picker Verif: EnumWindows failed critically before finding a candidate.")
-             return None
-        elif not found_hwnd_holder['hwnd']: 
-            log_message("Color Picker Verif: EnumWindows failed with an error before finding a candidate.")
-            return None
+        backend.enum_windows(enum_windows_proc)
+    except WINDOW_ERRORS as e:
+        if not found:
+            log_message(f"Color Picker Verif: Window error during EnumWindows before finding a candidate: code={e.winerror}, func='{e.funcname}', msg='{e.strerror}'")
+            return []
     except Exception as e:
         log_message(f"Color Picker Verif: Unexpected error during EnumWindows: {e}")
-        return None 
+        return [] 
 
-    if found_hwnd_holder['hwnd']:
-        log_message(f"Color Picker Verif: Successfully confirmed HWND: {found_hwnd_holder['hwnd']}")
-        return found_hwnd_holder['hwnd']
-    else:
-        log_message(f"Color Picker Verif: Standard Windows Color Dialog not found after enumeration.")
-        return None
+    if not found:
+        log_message(f"Color Picker Verif: No color dialog ({', '.join(p.name for p in profiles) or 'no profiles'}) found after enumeration.")
+    return found
 
-def send_rgb_values_to_external_dialog(r_val: int, g_val: int, b_val: int, parent_dialog_instance=None, is_hover_event: bool = False):
+class ColorDialogLocator:
     """
-    Sends RGB values to the standard Windows Color Picker dialog.
+    Finds open external color dialogs for the given profiles and remembers
+    them. Cached matches are revalidated cheaply (window still exists, same
+    class, same handles behind the control IDs); the full EnumWindows pass
+    only runs on a miss. Hover lookups also honour a negative cache, so a
+    closed dialog is not searched for on every hover tick.
+    locate() returns the topmost dialog; locate_all() every open one (for
+    broadcast mode), rescanning at most every BROADCAST_RESCAN_INTERVAL
+    seconds for hovers so newly opened dialogs are picked up.
+    last_written maps each dialog HWND to the text last written to its
+    channels (R, G, B) and is forgotten whenever that dialog's handles change.
+    Broadcast sends write dialogs from a thread pool, so every method holds
+    the locator's lock, and a write started before the write memory was
+    dropped (forget, invalidate) is not recorded afterwards.
     """
-    if not _PYWIN32_AVAILABLE:
-        log_message("send_rgb_values: pywin32 module not available. Action skipped.")
-        return False
+    NEGATIVE_CACHE_TTL = 1.0
+    BROADCAST_RESCAN_INTERVAL = 1.0
+
+    def __init__(self, profiles=BUILTIN_PROFILES, backend=None):
+        self.profiles = list(profiles)
+        self.backend = backend if backend is not None else default_window_backend()
+        self._match = None
+        self._all_matches = None
+        self._all_matches_at = 0.0
+        self.last_written = {}
+        self._epoch = 0          # bumped whenever entries of last_written are dropped
+        self._lock = threading.RLock()
+        self._miss_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.invalidations = 0
+        self.enumerations = 0
+        self.enumeration_time_total = 0.0
+        self.last_enumeration_time = 0.0
+
+    def locate(self, use_negative_cache: bool = False):
+        """Returns the DialogMatch of the topmost open dialog or None."""
+        with self._lock:
+            if self.backend is None: return None
+            if self._match is not None:
+                if self._is_match_valid(self._match):
+                    self.hits += 1
+                    return self._match
+                log_message(f"ColorDialogLocator: Cached HWND {self._match.hwnd} ({self._match.profile.name}) is no longer valid.")
+                self.invalidate()
+            if use_negative_cache and time.monotonic() < self._miss_until:
+                self.negative_hits += 1
+                return None
+            self.misses += 1
+            matches = self._enumerate(first_only=True)
+            if not matches:
+                self._miss_until = time.monotonic() + self.NEGATIVE_CACHE_TTL
+                return None
+            self._match, self._miss_until = matches[0], 0.0
+            return self._match
+
+    def locate_all(self, use_negative_cache: bool = False) -> list:
+        """Returns a DialogMatch for every open dialog, topmost first."""
+        with self._lock:
+            if self.backend is None: return []
+            cached = self._all_matches
+            if use_negative_cache and cached is not None and time.monotonic() - self._all_matches_at < self.BROADCAST_RESCAN_INTERVAL:
+                if all(self._is_match_valid(match) for match in cached):
+                    if cached: self.hits += 1
+                    else: self.negative_hits += 1
+                    return list(cached)
+            self.misses += 1
+            self._all_matches = self._enumerate(first_only=False)
+            self._all_matches_at = time.monotonic()
+            return list(self._all_matches)
+
+    def unwritten_channels(self, hwnd, targets: dict) -> tuple:
+        """(epoch for record_written(), the {channel: text} entries of targets not already written to the dialog hwnd)."""
+        with self._lock:
+            written = self.last_written.get(hwnd, {})
+            return self._epoch, {channel: text for channel, text in targets.items() if written.get(channel) != text}
+
+    def record_written(self, hwnd, epoch: int, channel: int, text: str):
+        """Remembers text as written to a channel of hwnd, unless write memory was dropped since epoch."""
+        with self._lock:
+            if epoch == self._epoch: self.last_written.setdefault(hwnd, {})[channel] = text
+
+    def forget(self, hwnd):
+        """Drops one dialog after a failed send; the next lookup finds it again if it still exists."""
+        with self._lock:
+            self.invalidations += 1
+            self.last_written.pop(hwnd, None); self._epoch += 1
+            if self._match is not None and self._match.hwnd == hwnd: self._match = None
+            self._all_matches_at = 0.0
+
+    def invalidate(self):
+        """Forgets all cached dialogs (and any remembered miss)."""
+        with self._lock:
+            if self._match is not None or self._all_matches: self.invalidations += 1
+            self._match = None; self._all_matches = None; self._miss_until = 0.0
+            self.last_written.clear(); self._epoch += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'negative_hits': self.negative_hits,
+                'invalidations': self.invalidations,
+                'enumerations': self.enumerations,
+                'enumeration_ms_avg': (self.enumeration_time_total / self.enumerations * 1000) if self.enumerations else 0.0,
+                'enumeration_ms_last': self.last_enumeration_time * 1000,
+            }
+
+    def _enumerate(self, first_only: bool) -> list:
+        known = {m.hwnd: m.edit_handles for m in ([self._match] if self._match else []) + (self._all_matches or [])}
+        t0 = time.perf_counter()
+        matches = _find_color_dialogs(self.backend, self.profiles, first_only)
+        self.last_enumeration_time = time.perf_counter() - t0
+        self.enumeration_time_total += self.last_enumeration_time
+        self.enumerations += 1
+        # Keep the write memory only for dialogs that are still the very same windows.
+        for match in matches:
+            if known.get(match.hwnd) != match.edit_handles and self.last_written.pop(match.hwnd, None) is not None: self._epoch += 1
+        return matches
+
+    def _is_match_valid(self, match) -> bool:
+        backend = self.backend
+        try:
+            if not backend.is_window(match.hwnd) or backend.get_class_name(match.hwnd) != match.profile.dialog_class:
+                return False
+            return all(backend.get_dlg_item(match.hwnd, cid) == h_edit for cid, h_edit in zip(match.profile.control_ids, match.edit_handles))
+        except Exception:
+            return False
 
-    actual_window_title = "System Color Dialog" 
-    hwnd = None 
-    try:
-        hwnd = _find_windows_color_dialog_hwnd()
+def _set_edit_text(backend, profile: DialogProfile, h_edit, val_str: str):
+    if profile.set_text == SET_TEXT_REPLACE_SEL:
+        # RichEdit controls (Word) are set more reliably by selecting all text and replacing it.
+        backend.send_message(h_edit, EM_SETSEL, 0, -1); time.sleep(0.01)
+        backend.send_message(h_edit, EM_REPLACESEL, 0, val_str); time.sleep(0.01)
+    else:
+        backend.send_message(h_edit, WM_SETTEXT, 0, val_str); time.sleep(0.01)
 
-        if not hwnd:
-            log_message("send_rgb_values: Target dialog HWND not found by _find_windows_color_dialog_hwnd.")
-            if not is_hover_event and parent_dialog_instance and parent_dialog_instance.isVisible():
-                InfoPopupWindow("Standard Windows Color Dialog not found.", parent_dialog_instance, 3500).show()
-            return False
+class ExternalSendResult:
+    """
+    Outcome of one write to the external color dialog(s); carries the popup
+    text the GUI should show. A broadcast keeps one result per dialog in targets.
+    """
+    __slots__ = ('rgb', 'is_hover', 'context', 'found', 'success', 'window_title', 'message', 'popup_ms', 'channels_written', 'targets')
+
+    def __init__(self, rgb, is_hover: bool, context=None):
+        self.rgb = rgb
+        self.is_hover = is_hover
+        self.context = context
+        self.found = False
+        self.success = False
+        self.window_title = "Color Dialog"
+        self.message = None
+        self.popup_ms = 0
+        self.channels_written = 0
+        self.targets = []
+
+def _write_rgb_to_dialog(locator: ColorDialogLocator, match: DialogMatch, result: ExternalSendResult) -> ExternalSendResult:
+    """Writes result.rgb into one matched dialog and fills in result."""
+    backend = locator.backend
+    hwnd, profile = match.hwnd, match.profile
+    is_hover_event = result.is_hover
+    r_val, g_val, b_val = result.rgb
+    result.found = True
+    result.window_title = profile.title
+    try:
+        targets = {channel: str(val) for channel, val in enumerate(result.rgb)}
+        epoch, unwritten = locator.unwritten_channels(hwnd, targets)
+        if is_hover_event:
+            targets = unwritten
+            if not targets:
+                result.success = True
+                return result
         
         try:
-            title_from_hwnd = win32gui.GetWindowText(hwnd)
-            if title_from_hwnd: actual_window_title = title_from_hwnd
+            title_from_hwnd = backend.get_window_text(hwnd)
+            if title_from_hwnd: result.window_title = title_from_hwnd
         except Exception as e_title:
             log_message(f"send_rgb_values: Warning - could not get window title for HWND {hwnd}: {e_title}.")
+        actual_window_title = result.window_title
 
-        log_message(f"send_rgb_values: Interacting with '{actual_window_title}' (HWND: {hwnd}). RGB=({r_val},{g_val},{b_val})")
+        log_message(f"send_rgb_values: Interacting with '{actual_window_title}' (HWND: {hwnd}, profile '{profile.name}'). RGB=({r_val},{g_val},{b_val}), channels to write={len(targets)}")
 
         try:
-            if win32gui.IsIconic(hwnd):
-                win32gui.ShowWindow(hwnd, win32con.SW_RESTORE); time.sleep(0.03)
-            if not is_hover_event and win32gui.GetForegroundWindow() != hwnd:
-                win32gui.SetWindowPos(hwnd, win32con.HWND_TOP, 0,0,0,0, win32con.SWP_NOMOVE|win32con.SWP_NOSIZE|win32con.SWP_SHOWWINDOW)
+            if backend.is_iconic(hwnd):
+                backend.restore_window(hwnd); time.sleep(0.03)
+            if profile.bring_to_front and not is_hover_event and backend.get_foreground_window() != hwnd:
+                backend.bring_to_top(hwnd)
                 time.sleep(0.05)
         except Exception as e_fg:
             if not is_hover_event: log_message(f"send_rgb_values: Warning - error bringing '{actual_window_title}' to front: {e_fg}")
 
-        targets = { DLG_COLOR_RED_EDIT_ID: str(r_val), DLG_COLOR_GREEN_EDIT_ID: str(g_val), DLG_COLOR_BLUE_EDIT_ID: str(b_val) }
-        all_set_successfully = True
-        for cid, val_str in targets.items():
-            h_edit = win32gui.GetDlgItem(hwnd, cid)
-            if h_edit and win32gui.GetClassName(h_edit).lower() == "edit":
-                if not is_hover_event:
-                    win32api.PostMessage(h_edit, win32con.WM_SETFOCUS, 0, 0); time.sleep(0.01)
-                win32gui.SendMessage(h_edit, win32con.WM_SETTEXT, 0, val_str); time.sleep(0.01)
-                wp_en_change = win32api.MAKELONG(cid, 0x0300)
-                win32api.PostMessage(hwnd, win32con.WM_COMMAND, wp_en_change, h_edit); time.sleep(0.01)
-            else:
-                log_message(f"send_rgb_values: Error - Control ID {cid} not an Edit control in '{actual_window_title}'.")
-                all_set_successfully = False
+        for channel, val_str in targets.items():
+            cid, h_edit = profile.control_ids[channel], match.edit_handles[channel]
+            if not is_hover_event:
+                backend.post_message(h_edit, WM_SETFOCUS, 0, 0); time.sleep(0.01)
+            _set_edit_text(backend, profile, h_edit, val_str)
+            wp_en_change = make_long(cid, EN_CHANGE)
+            backend.post_message(hwnd, WM_COMMAND, wp_en_change, h_edit); time.sleep(0.01)
+            locator.record_written(hwnd, epoch, channel, val_str)
+            result.channels_written += 1
         
-        if not is_hover_event and parent_dialog_instance and parent_dialog_instance.isVisible():
-            msg = f"RGB values sent to '{actual_window_title}'." if all_set_successfully else f"Failed to set some RGB values in '{actual_window_title}'."
-            InfoPopupWindow(msg, parent_dialog_instance, 2500 if all_set_successfully else 4500).show()
-        
-        return all_set_successfully
+        result.success = True
+        result.message, result.popup_ms = f"RGB values sent to '{actual_window_title}'.", 2500
+        return result
+
+    except WINDOW_ERRORS as e_pywin:
+        locator.forget(hwnd)
+        log_message(f"send_rgb_values: Window error for '{result.window_title}' (HWND: {hwnd}): {e_pywin.winerror}, '{e_pywin.funcname}', '{e_pywin.strerror}'")
+        result.message, result.popup_ms = "Error communicating with Color Dialog (pywin32 error).", 4000
+        return result
+    except Exception as e_general:
+        log_message(f"send_rgb_values: CRITICAL UNEXPECTED ERROR for '{result.window_title}' (HWND: {hwnd}): {e_general}\n{traceback.format_exc()}")
+        result.message, result.popup_ms = "Unexpected error with Color Dialog.", 4000
+        return result
 
-    except pywintypes.error as e_pywin:
-        log_message(f"send_rgb_values: pywintypes.error for '{actual_window_title}' (HWND: {hwnd if hwnd else 'N/A'}): {e_pywin.winerror}, '{e_pywin.funcname}', '{e_pywin.strerror}'")
-        if not is_hover_event and parent_dialog_instance and parent_dialog_instance.isVisible():
-             InfoPopupWindow("Error communicating with Color Dialog (pywin32 error).", parent_dialog_instance, 4000).show()
-        return False
+def write_rgb_to_external_dialog(locator: ColorDialogLocator, r_val: int, g_val: int, b_val: int, is_hover_event: bool = False, context=None,
+                                 broadcast: bool = False, executor=None) -> ExternalSendResult:
+    """
+    Writes RGB values into the topmost external color dialog found by
+    locator, or with broadcast into every open one (concurrently when an
+    executor is given), using the set-text strategy of each dialog's profile.
+    Touches no Qt widgets, so it can run on the sender worker thread.
+    Hover writes only touch the edit controls whose value changed since the
+    last write and send no window messages at all if none did; explicit
+    sends always rewrite all three channels.
+    """
+    result = ExternalSendResult((r_val, g_val, b_val), is_hover_event, context)
+    if locator.backend is None:
+        log_message("send_rgb_values: No window backend (pywin32 not available). Action skipped.")
+        return result
+    try:
+        if broadcast:
+            matches = locator.locate_all(use_negative_cache=is_hover_event)
+        else:
+            match = locator.locate(use_negative_cache=is_hover_event)
+            matches = [match] if match else []
     except Exception as e_general:
-        log_message(f"send_rgb_values: CRITICAL UNEXPECTED ERROR for '{actual_window_title}' (HWND: {hwnd if hwnd else 'N/A'}): {e_general}\n{traceback.format_exc()}")
-        if not is_hover_event and parent_dialog_instance and parent_dialog_instance.isVisible():
-             InfoPopupWindow("Unexpected error with Color Dialog.", parent_dialog_instance, 4000).show()
-        return False
+        log_message(f"send_rgb_values: CRITICAL UNEXPECTED ERROR while looking for dialogs: {e_general}\n{traceback.format_exc()}")
+        result.message, result.popup_ms = "Unexpected error with Color Dialog.", 4000
+        return result
+
+    if not matches:
+        if not is_hover_event: log_message("send_rgb_values: Target dialog HWND not found by ColorDialogLocator.")
+        result.message, result.popup_ms = f"{' / '.join(p.title for p in locator.profiles) or 'Color dialog'} not found.", 3500
+        return result
+    if not broadcast:
+        return _write_rgb_to_dialog(locator, matches[0], result)
+
+    jobs = [(match, ExternalSendResult(result.rgb, is_hover_event, context)) for match in matches]
+    if executor is not None and len(jobs) > 1:
+        list(executor.map(lambda job: _write_rgb_to_dialog(locator, *job), jobs))
+    else:
+        for match, target in jobs: _write_rgb_to_dialog(locator, match, target)
+    result.targets = [target for _, target in jobs]
+    succeeded = sum(1 for t in result.targets if t.success)
+    result.found = True
+    result.success = succeeded == len(result.targets)
+    result.channels_written = sum(t.channels_written for t in result.targets)
+    result.window_title = ", ".join(f"'{t.window_title}'" for t in result.targets)
+    lines = [f"RGB values sent to {succeeded} of {len(result.targets)} color dialogs:"]
+    lines += [f"{t.window_title} ({match.profile.name}): {'OK' if t.success else 'failed'}" for (match, _), t in zip(jobs, result.targets)]
+    result.message, result.popup_ms = "\n".join(lines), 3000 if result.success else 4500
+    return result
+
+class ExternalDialogSender(QObject):
+    """
+    Delivers RGB values to the external color dialog on a worker thread, so
+    the PostMessage/SendMessage sequence and its sleeps never block the GUI.
+    Hover sends are latest-value-wins: only the newest pending hover color is
+    delivered, and a hover never replaces a pending click/palette send.
+    Every delivery is reported back through sendFinished on the GUI thread.
+    With broadcast set, every open dialog is written, in parallel on a small
+    thread pool.
+    """
+    sendFinished = Signal(object)
+    BROADCAST_WORKERS = 4
+
+    def __init__(self, locator: ColorDialogLocator, parent=None, broadcast: bool = False):
+        super().__init__(parent)
+        self.locator = locator
+        self.broadcast = broadcast
+        self._executor = None
+        self._cond = threading.Condition()
+        self._pending_sends = []
+        self._pending_hover = None
+        self.running = True
+        self.submitted = 0
+        self.hovers_coalesced = 0
+        self.delivered = 0
+        self.unchanged_skipped = 0
+        self.channels_written = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, r_val: int, g_val: int, b_val: int, is_hover_event: bool = False, context=None):
+        """Queues a send and returns immediately."""
+        with self._cond:
+            self.submitted += 1
+            if is_hover_event:
+                if self._pending_hover is not None: self.hovers_coalesced += 1
+                self._pending_hover = (r_val, g_val, b_val, True, context)
+            else:
+                # An explicit send supersedes any hover color still waiting.
+                if self._pending_hover is not None: self.hovers_coalesced += 1
+                self._pending_hover = None
+                self._pending_sends.append((r_val, g_val, b_val, False, context))
+            self._cond.notify()
+
+    def stop(self, timeout: float = 1.0):
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self._thread.is_alive(): self._thread.join(timeout=timeout)
+        if self._executor is not None: self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {'submitted': self.submitted, 'hovers_coalesced': self.hovers_coalesced, 'delivered': self.delivered,
+                'unchanged_skipped': self.unchanged_skipped, 'channels_written': self.channels_written}
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.running and not self._pending_sends and self._pending_hover is None:
+                    self._cond.wait()
+                if not self.running: break
+                if self._pending_sends:
+                    job = self._pending_sends.pop(0)
+                else:
+                    job, self._pending_hover = self._pending_hover, None
+            try:
+                if self.broadcast and self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.BROADCAST_WORKERS, thread_name_prefix="dialog-send")
+                result = write_rgb_to_external_dialog(self.locator, *job, broadcast=self.broadcast, executor=self._executor)
+            except Exception as e:
+                log_message(f"ExternalDialogSender: Send failed: {e}")
+                continue
+            self.delivered += 1
+            self.channels_written += result.channels_written
+            if result.found and result.success and not result.channels_written: self.unchanged_skipped += 1
+            if self.running: self.sendFinished.emit(result)
 
 class ScreenColorPicker(QWidget):
     colorSelected=Signal(QColor); colorHovered=Signal(QColor); pickerClosed=Signal()
-    def __init__(self,p=None):
+    def __init__(self,p=None,magnifier_max_fps:float=0,capture_backend=None,freeze_frame:bool=False):
         super().__init__(p)
+        self.magnifier_max_fps=magnifier_max_fps
+        self.live_capture_backend=capture_backend or QtCaptureBackend()
+        self.capture_backend=self.live_capture_backend
+        self.freeze_frame=freeze_frame;self._snapshot_image=None
+        self.last_pick=None # (x, y, from frozen snapshot) of the last colorSelected
+        self.sampler=None;self._hover_mailbox=LatestValueMailbox()
+        self._hover_emitter=UpdateSignalEmitter();self._hover_emitter.frame_available.connect(self._deliver_hover_sample)
         self.setWindowFlags(Qt.FramelessWindowHint|Qt.WindowStaysOnTopHint|Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground);self.setAttribute(Qt.WA_NoSystemBackground)
         self.setCursor(Qt.CrossCursor);self._active=False;self.setMouseTracking(True)
@@ -543,17 +1310,44 @@ class ScreenColorPicker(QWidget):
     def _activate_picker_and_magnifier(self):
         if not self._active:return
         log_message("ScreenColorPicker: Activating picker and magnifier.")
+        if self.freeze_frame:self._freeze_desktop()
         self.showFullScreen();self.raise_();self.activateWindow()
         if not self.hasFocus():self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
         QTimer.singleShot(10,self._check_focus_and_grab)
+        if self.sampler is None:
+            self.sampler=ScreenSampler(self.capture_backend,10,self.magnifier_max_fps)
+            self.sampler.subscribe(self._on_screen_sample)
         if self.magnifier_window is None:
             log_message("ScreenColorPicker: Creating new MouseMagnifier window.")
-            self.magnifier_window=MouseMagnifier()
+            self.magnifier_window=MouseMagnifier(sampler=self.sampler)
         else:
             if not self.magnifier_window.isVisible():
                 log_message("ScreenColorPicker: Showing existing MouseMagnifier window.")
                 self.magnifier_window.show()
             self.magnifier_window.raise_()
+        self.sampler.start()
+    def _on_screen_sample(self,sample:ScreenSample):
+        """Sampler subscriber (worker thread): the hover color is the center pixel of the magnified block."""
+        if sample.region is not None and self._hover_mailbox.post(sample.region.center_pixel()):
+            self._hover_emitter.frame_available.emit()
+    @Slot()
+    def _deliver_hover_sample(self):
+        rgb=self._hover_mailbox.take()
+        if rgb is not None and self._active:self.colorHovered.emit(QColor(*rgb))
+    def _freeze_desktop(self):
+        """Captures the whole desktop once; hover, click and magnifier then read from that snapshot."""
+        try:
+            t0=time.perf_counter();snap_backend=SnapshotCaptureBackend.from_desktop(self.live_capture_backend);snap=snap_backend.snapshot
+            self._snapshot_image=QImage(snap.data,snap.width,snap.height,snap.width*4,QImage.Format.Format_RGB32)
+            self.capture_backend=snap_backend
+            log_message(f"ScreenColorPicker: Froze desktop {snap.width}x{snap.height} at ({snap.x},{snap.y}) in {(time.perf_counter()-t0)*1000:.1f} ms.")
+        except Exception as e_snap:
+            log_message(f"ScreenColorPicker: Desktop snapshot failed ({e_snap}), picking from the live screen.")
+            self.capture_backend=self.live_capture_backend;self._snapshot_image=None
+    def paintEvent(self,e):
+        if self._snapshot_image is None:super().paintEvent(e);return
+        snap=self.capture_backend.snapshot;g=self.geometry()
+        p=QPainter(self);p.drawImage(self.rect(),self._snapshot_image,QRect(g.x()-snap.x,g.y()-snap.y,g.width(),g.height()));p.end()
     def _check_focus_and_grab(self):
         if not self._active or not self.isVisible():
             if self.isVisible():self.close()
@@ -567,28 +1361,22 @@ class ScreenColorPicker(QWidget):
         if not(self.mouseGrabber()==self and self.keyboardGrabber()==self):
             log_message("ScreenColorPicker: Failed to grab mouse/keyboard, closing.")
             self.close()
+    def _sample_color(self,gp:QPoint)->QColor:
+        try:
+            r,g,b=self.capture_backend.grab(gp.x(),gp.y(),1,1).pixel(0,0)
+            return QColor(r,g,b)
+        except Exception:return QColor()
     def mouseMoveEvent(self,e:QMouseEvent):
-        if not self._active or not self.isVisible():super().mouseMoveEvent(e);return
-        gp=e.globalPosition().toPoint();s=QApplication.screenAt(gp) or QApplication.primaryScreen()
-        if s:
-            pxm=s.grabWindow(0,gp.x(),gp.y(),1,1)
-            if not pxm.isNull():
-                img=pxm.toImage()
-                if not img.isNull() and img.valid(0,0):
-                    c=img.pixelColor(0,0)
-                    if c.isValid():self.colorHovered.emit(c)
+        # Only record the target; the ScreenSampler samples the latest position once per tick.
+        if self._active and self.sampler:
+            gp=e.globalPosition().toPoint();self.sampler.set_target(gp.x(),gp.y())
         super().mouseMoveEvent(e)
     def mousePressEvent(self,e:QMouseEvent):
         if not self._active or self.mouseGrabber()!=self:super().mousePressEvent(e);return
         if e.button()==Qt.MouseButton.LeftButton:
-            gp=e.globalPosition().toPoint();s=QApplication.screenAt(gp) or QApplication.primaryScreen()
-            if s:
-                pxm=s.grabWindow(0,gp.x(),gp.y(),1,1)
-                if not pxm.isNull():
-                    img=pxm.toImage()
-                    if not img.isNull() and img.valid(0,0):
-                        c=img.pixelColor(0,0)
-                        if c.isValid():self.colorSelected.emit(c)
+            gp=e.globalPosition().toPoint();c=self._sample_color(gp)
+            if c.isValid():self.last_pick=(gp.x(),gp.y(),self._snapshot_image is not None);self.colorSelected.emit(c)
+            else:log_message(f"ScreenColorPicker: Could not read the pixel at ({gp.x()},{gp.y()}) with backend '{self.capture_backend.name}'.")
     def keyPressEvent(self,e:QKeyEvent):
         if not self._active or self.keyboardGrabber()!=self:super().keyPressEvent(e);return
         if e.key()==Qt.Key.Key_Escape:
@@ -600,10 +1388,13 @@ class ScreenColorPicker(QWidget):
         log_message("ScreenColorPicker: closeEvent.")
         if self.show_magnifier_timer.isActive():self.show_magnifier_timer.stop()
         if self.magnifier_window:
-            log_message("ScreenColorPicker: Closing magnifier window.")
+            log_message(f"ScreenColorPicker: Closing magnifier window. Frame stats: {self.magnifier_window.frame_stats()}")
             self.magnifier_window.close_app();self.magnifier_window=None
+        if self.sampler:
+            self.sampler.stop();self.sampler=None
         if self.mouseGrabber()==self:self.releaseMouse()
         if self.keyboardGrabber()==self:self.releaseKeyboard()
+        self.capture_backend=self.live_capture_backend;self._snapshot_image=None
         self._active=False;self.pickerClosed.emit();super().closeEvent(e)
         log_message("ScreenColorPicker: Finished closeEvent.")
 
@@ -627,21 +1418,35 @@ class InfoPopupWindow(QWidget):
             self.move(scr_g.center()-self.rect().center())
         QTimer.singleShot(d,self.close)
 
-class CustomColorPaletteWidget(QWidget):
+class CustomColorPaletteWidget(QAbstractScrollArea):
+    """
+    Palette grid over a PaletteModel of any size, NUM_COLS cells wide. Only the
+    rows inside the viewport are painted (at most NUM_ROWS tall, then it
+    scrolls), clicks are hit-tested arithmetically and tooltips are built on
+    demand, so no per-cell widgets or objects exist.
+    """
     paletteColorClicked = Signal(QColor)
     requestSaveColorToCell = Signal(int)
     cellSelectedSignal = Signal(int, QWidget)
+    cellColorChanged = Signal(int)   # one slot was set
+    paletteReset = Signal()          # the whole model was replaced or refilled
 
     NUM_ROWS = 8
     NUM_COLS = 8
     TOTAL_CELLS = NUM_ROWS * NUM_COLS
-
-    def __init__(self, populate_defaults=True, parent=None):
+    CELL_SIZE = 22
+    CELL_SPACING = 1
+    MARGIN = 1
+    BORDER_COLOR = QColor("#555555")
+    SELECTION_COLOR = QColor("#0078D7")
+    HIGHLIGHT_COLOR = QColor("#FF8C00")
+
+    def __init__(self, populate_defaults=True, parent=None, size: int = TOTAL_CELLS):
         super().__init__(parent)
         self.empty_color = QColor("#F0F0F0")
-        self.palette_colors = [QColor(self.empty_color) for _ in range(self.TOTAL_CELLS)]
-        self.color_cells_labels = []
+        self.model = PaletteModel(size)
         self.selected_cell_index = -1
+        self.highlighted_cell_index = -1
         self._populate_defaults = populate_defaults
         self._init_ui()
         if self._populate_defaults:
@@ -650,99 +1455,180 @@ class CustomColorPaletteWidget(QWidget):
             self.update_cells_appearance()
 
     def _init_ui(self):
-        main_layout = QGridLayout(self)
-        main_layout.setSpacing(1); main_layout.setContentsMargins(1,1,1,1)
-        for i in range(self.TOTAL_CELLS):
-            r, c = i // self.NUM_COLS, i % self.NUM_COLS
-            lbl = QLabel()
-            lbl.setFixedSize(22,22)
-            lbl.setFrameShape(QFrame.Shape.Box)
-            lbl.setLineWidth(1)
-            lbl.setProperty("cell_index", i); lbl.installEventFilter(self)
-            main_layout.addWidget(lbl,r,c); self.color_cells_labels.append(lbl)
-        self.update_cells_appearance()
-
-    def eventFilter(self, obj, event):
-        if obj in self.color_cells_labels:
-            idx = obj.property("cell_index")
-            if event.type() == QEvent.Type.MouseButtonPress:
-                if event.button() == Qt.MouseButton.LeftButton:
-                    self._on_cell_clicked(idx)
-                    if not self._populate_defaults: self.set_selected_cell(idx)
-                    return True
-                elif event.button() == Qt.MouseButton.RightButton:
-                    self._show_cell_context_menu(obj, event.globalPosition().toPoint())
-                    return True
-        return super().eventFilter(obj, event)
+        self.setFrameShape(QFrame.Shape.NoFrame)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.viewport().setMouseTracking(False)
+        self._update_geometry()
+
+    def _row_count(self) -> int:
+        return (len(self.model) + self.NUM_COLS - 1) // self.NUM_COLS
+
+    def _update_geometry(self):
+        pitch = self.CELL_SIZE + self.CELL_SPACING
+        content_h = 2*self.MARGIN + self._row_count()*pitch - self.CELL_SPACING
+        view_h = 2*self.MARGIN + min(self._row_count(), self.NUM_ROWS)*pitch - self.CELL_SPACING
+        scroll = content_h > view_h
+        scrollbar_w = self.verticalScrollBar().sizeHint().width() if scroll else 0
+        self.setFixedSize(2*self.MARGIN + self.NUM_COLS*pitch - self.CELL_SPACING + scrollbar_w, max(view_h, 0))
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(content_h - view_h, 0)); bar.setPageStep(view_h); bar.setSingleStep(pitch)
+        self.viewport().update()
+
+    def _cell_rect(self, idx: int) -> QRect:
+        """Rectangle of cell idx in viewport coordinates (may be outside the visible area)."""
+        pitch = self.CELL_SIZE + self.CELL_SPACING
+        r, c = idx // self.NUM_COLS, idx % self.NUM_COLS
+        return QRect(self.MARGIN + c*pitch, self.MARGIN + r*pitch - self.verticalScrollBar().value(), self.CELL_SIZE, self.CELL_SIZE)
+
+    def cell_at(self, pos: QPoint) -> int:
+        """Index of the cell under pos (viewport coordinates), or -1 for the gaps and margins."""
+        pitch = self.CELL_SIZE + self.CELL_SPACING
+        x, y = pos.x() - self.MARGIN, pos.y() - self.MARGIN + self.verticalScrollBar().value()
+        if x < 0 or y < 0: return -1
+        c, r = x // pitch, y // pitch
+        if c >= self.NUM_COLS or x % pitch >= self.CELL_SIZE or y % pitch >= self.CELL_SIZE: return -1
+        idx = r*self.NUM_COLS + c
+        return idx if idx < len(self.model) else -1
+
+    def paintEvent(self, event):
+        dirty = event.rect()
+        pitch = self.CELL_SIZE + self.CELL_SPACING
+        offset = self.verticalScrollBar().value()
+        first_row = max((dirty.top() + offset - self.MARGIN) // pitch, 0)
+        last_row = min((dirty.bottom() + offset - self.MARGIN) // pitch, self._row_count() - 1)
+        model, cols, empty_color = self.model, self.NUM_COLS, self.empty_color
+        colors, filled = model.colors, model.filled
+        painter = QPainter(self.viewport())
+        painter.setPen(self.BORDER_COLOR)
+        for row in range(first_row, last_row + 1):
+            for idx in range(row*cols, min(row*cols + cols, len(filled))):
+                rect = self._cell_rect(idx)
+                if not rect.intersects(dirty): continue
+                painter.fillRect(rect, QColor.fromRgba(colors[idx]) if filled[idx] else empty_color)
+                if not self._populate_defaults and idx == self.selected_cell_index:
+                    self._paint_frame(painter, rect, self.SELECTION_COLOR)
+                else:
+                    painter.drawRect(rect.adjusted(0, 0, -1, -1))
+                if idx == self.highlighted_cell_index:
+                    self._paint_frame(painter, rect.adjusted(2, 2, -2, -2), self.HIGHLIGHT_COLOR)
+        painter.end()
+
+    @staticmethod
+    def _paint_frame(painter: QPainter, rect: QRect, color: QColor):
+        painter.fillRect(rect.x(), rect.y(), rect.width(), 2, color)
+        painter.fillRect(rect.x(), rect.bottom()-1, rect.width(), 2, color)
+        painter.fillRect(rect.x(), rect.y(), 2, rect.height(), color)
+        painter.fillRect(rect.right()-1, rect.y(), 2, rect.height(), color)
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.Type.ToolTip:
+            idx = self.cell_at(event.pos())
+            if idx < 0:
+                QToolTip.hideText(); event.ignore(); return True
+            if self.model.is_filled(idx):
+                formats = FORMAT_CACHE.get(self.model.argb(idx))
+                text = f"{formats['hex_argb']}\nRGB: {formats['rgb']}"
+            else:
+                text = f"Empty slot {idx + 1}"
+            QToolTip.showText(event.globalPos(), text, self.viewport(), self._cell_rect(idx))
+            return True
+        return super().viewportEvent(event)
+
+    def mousePressEvent(self, event: QMouseEvent):
+        idx = self.cell_at(event.position().toPoint())
+        if idx < 0: super().mousePressEvent(event); return
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._on_cell_clicked(idx)
+            if not self._populate_defaults: self.set_selected_cell(idx)
+        elif event.button() == Qt.MouseButton.RightButton:
+            self._show_cell_context_menu(idx, event.globalPosition().toPoint())
 
     def set_selected_cell(self, index: int):
         if self.selected_cell_index != index:
             old_idx = self.selected_cell_index
             self.selected_cell_index = index
-            if 0 <= old_idx < self.TOTAL_CELLS: self.update_cell_appearance(old_idx)
-            if 0 <= self.selected_cell_index < self.TOTAL_CELLS: self.update_cell_appearance(self.selected_cell_index)
+            if 0 <= old_idx < len(self.model): self.update_cell_appearance(old_idx)
+            if 0 <= self.selected_cell_index < len(self.model):
+                self.update_cell_appearance(self.selected_cell_index); self.ensure_cell_visible(self.selected_cell_index)
             self.cellSelectedSignal.emit(self.selected_cell_index, self)
 
-    def _show_cell_context_menu(self, lbl_widget: QLabel, g_pos: QPoint):
-        idx = lbl_widget.property("cell_index"); menu = QMenu(self)
+    def set_highlighted_cell(self, index: int):
+        """Marks the cell matching the color under the cursor (-1 for none); scrolls it into view."""
+        if self.highlighted_cell_index == index: return
+        old_idx, self.highlighted_cell_index = self.highlighted_cell_index, index
+        if 0 <= old_idx < len(self.model): self.update_cell_appearance(old_idx)
+        if 0 <= index < len(self.model): self.ensure_cell_visible(index); self.update_cell_appearance(index)
+
+    def ensure_cell_visible(self, idx: int):
+        rect = self._cell_rect(idx); bar = self.verticalScrollBar()
+        if rect.top() < 0: bar.setValue(bar.value() + rect.top() - self.MARGIN)
+        elif rect.bottom() >= self.viewport().height(): bar.setValue(bar.value() + rect.bottom() - self.viewport().height() + 1 + self.MARGIN)
+
+    def _show_cell_context_menu(self, idx: int, g_pos: QPoint):
+        menu = QMenu(self)
         act = menu.addAction("Save current color here")
         act.triggered.connect(lambda chk=False, i=idx: self.requestSaveColorToCell.emit(i))
         menu.exec(g_pos)
 
+    def set_model(self, model: PaletteModel):
+        """Shows another palette; selection is reset."""
+        self.model = model
+        self.selected_cell_index = -1
+        self.highlighted_cell_index = -1
+        self.verticalScrollBar().setValue(0)
+        self._update_geometry()
+        self.paletteReset.emit()
+
+    def color_at(self, idx: int) -> QColor:
+        """Color of cell idx; empty slots read as empty_color."""
+        return QColor(self.model.color(idx, self.empty_color))
+
     def populate_default_colors(self):
         if not self._populate_defaults: return
         hues = [0,30,60,120,180,240,300,-1]; sats = [255]*7+[0]; vals = [255,225,200,175,150,125,100,70]
+        if len(self.model) < self.TOTAL_CELLS: self.model.resize(self.TOTAL_CELLS); self._update_geometry()
         for c_idx in range(self.NUM_COLS):
             h,s = hues[c_idx], sats[c_idx]
             for r_idx in range(self.NUM_ROWS):
                 v = vals[r_idx]; cell_idx = r_idx*self.NUM_COLS+c_idx
-                if 0<=cell_idx<self.TOTAL_CELLS: self.palette_colors[cell_idx]=QColor.fromHsv(h,s,v)
+                self.model.set_color(cell_idx, QColor.fromHsv(h,s,v))
         self.update_cells_appearance()
+        self.paletteReset.emit()
 
     def update_cells_appearance(self):
-        for i in range(self.TOTAL_CELLS): self.update_cell_appearance(i)
+        self.viewport().update()
 
     def _on_cell_clicked(self, cell_idx: int):
-        if 0<=cell_idx<len(self.palette_colors): self.paletteColorClicked.emit(self.palette_colors[cell_idx])
+        if 0<=cell_idx<len(self.model) and self.model.is_filled(cell_idx): self.paletteColorClicked.emit(self.model.color(cell_idx))
 
     def set_color_at_index(self, idx: int, color: QColor):
-        if 0<=idx<self.TOTAL_CELLS and color.isValid():
-            self.palette_colors[idx]=QColor(color); self.update_cell_appearance(idx); return True
+        if 0<=idx<len(self.model) and color.isValid():
+            self.model.set_color(idx, color); self.update_cell_appearance(idx); self.cellColorChanged.emit(idx); return True
         return False
 
     def update_cell_appearance(self, idx: int):
-        if not (0<=idx<len(self.color_cells_labels) and idx<len(self.palette_colors)): return
-        color_obj = self.palette_colors[idx]
-        label_widget = self.color_cells_labels[idx]
-        base_style = f"background-color: {color_obj.name()}; border: 1px solid #555555;"
-        if not self._populate_defaults and idx == self.selected_cell_index:
-            base_style = f"background-color: {color_obj.name()}; border: 2px solid #0078D7;"
-        label_widget.setStyleSheet(base_style)
-        label_widget.setToolTip(f"{color_obj.name(QColor.NameFormat.HexArgb)}\nRGB: {color_obj.red()},{color_obj.green()},{color_obj.blue()}")
+        """Schedules a repaint of just this cell (nothing happens if it is scrolled out of view)."""
+        if 0<=idx<len(self.model):
+            rect = self._cell_rect(idx)
+            if rect.intersects(self.viewport().rect()): self.viewport().update(rect)
 
     def load_colors_from_settings(self, settings: QSettings, key: str):
         saved_list = settings.value(key, [])
         if isinstance(saved_list, str): saved_list = [saved_list]
-        loaded_any_valid_color = False
-        self.palette_colors = [QColor(self.empty_color) for _ in range(self.TOTAL_CELLS)]
-        for i in range(min(len(saved_list), self.TOTAL_CELLS)):
-            color_str = saved_list[i]
-            if isinstance(color_str, str):
-                color = QColor(color_str)
-                if color.isValid():
-                    self.palette_colors[i] = color
-                    loaded_any_valid_color = True
+        model = PaletteModel()
+        loaded_any_valid_color = model.load_strings(saved_list if isinstance(saved_list, list) else [], self.TOTAL_CELLS) > 0
+        self.set_model(model)
         if not loaded_any_valid_color and self._populate_defaults:
             self.populate_default_colors()
             return
         self.update_cells_appearance()
 
     def save_colors_to_settings(self, settings: QSettings, key: str):
-        to_save = [c.name(QColor.NameFormat.HexArgb) for c in self.palette_colors]
-        settings.setValue(key, to_save); settings.sync()
+        settings.setValue(key, self.model.to_strings())
 
 class CustomColorPickerDialog(QDialog):
-    def __init__(self, initial_color=QColor(0,120,215,255), parent=None, app_icon: QIcon = None): # Added app_icon parameter
+    def __init__(self, initial_color=QColor(0,120,215,255), parent=None, app_icon: QIcon = None, enabled_profiles=None): # Added app_icon parameter
         super().__init__(parent)
         self.setWindowTitle("Windows Screen Color Copy Paste")
 
@@ -766,10 +1652,12 @@ class CustomColorPickerDialog(QDialog):
         self.sel_color=QColor(initial_color)
         self.clip=QApplication.clipboard()
         self._picker_inst=None
-        self._send_tmr=QTimer(self)
-        self._send_tmr.setSingleShot(True)
-        self._send_tmr.timeout.connect(self._perform_send_to_external_dialog)
+        # Color dialog drags fire currentColorChanged per intermediate color: the values panel is refreshed
+        # at most once per screen frame and the external dialog gets the latest color on its own throttle.
+        self._display_refresh=CoalescingTimer(self.update_all_displays,1000.0/screen_refresh_rate(),self)
+        self._send_throttle=CoalescingTimer(self._perform_send_to_external_dialog,EXTERNAL_SEND_INTERVAL_MS,self)
         self._color_to_send_tmr=None
+        self._picked_nearest_text=""
         self.close_picker_tmr=QTimer(self)
         self.close_picker_tmr.setSingleShot(True)
         self.close_picker_tmr.timeout.connect(self._delayed_close_picker_operations)
@@ -787,6 +1675,28 @@ class CustomColorPickerDialog(QDialog):
                                   self)
         
         log_message(f"Configuration file path being used by QSettings: {self.settings.fileName()}")
+        self.settings_writer = SettingsWriter(self.settings, parent=self)
+        try: self.palette_store = PaletteStore(palette_store_path(self.settings))
+        except sqlite3.Error as e:
+            log_message(f"Palette store: Cannot open '{palette_store_path(self.settings)}' ({e}). Palettes will not be saved this session.")
+            self.palette_store = PaletteStore(":memory:")
+        self.palette_store.migrate_from_settings(self.settings, [
+            (STANDARD_CUSTOM_COLORS_KEY, CUSTOM_COLORS_PALETTE, KIND_CUSTOM, 16),
+            (DEFAULT_SHADES_PALETTE_KEY, DEFAULT_SHADES_PALETTE, KIND_SHADES, CustomColorPaletteWidget.TOTAL_CELLS),
+            (USER_CUSTOM_PALETTE_KEY, USER_PALETTE, KIND_USER, CustomColorPaletteWidget.TOTAL_CELLS)])
+        self.capture_backend = select_capture_backend(self.settings)
+        self.dialog_locator = ColorDialogLocator(load_dialog_profiles(self.settings, enabled_profiles))
+        self.external_sender=ExternalDialogSender(self.dialog_locator,self,self.settings.value(BROADCAST_KEY,False,type=bool))
+        self.external_sender.sendFinished.connect(self._on_external_send_finished)
+        self.color_index=ColorIndex() if _NUMPY_AVAILABLE else None
+        if self.color_index is None: log_message("Nearest palette color lookups are disabled (numpy missing).")
+        self._nearest_max_delta_e=self._read_nearest_max_delta_e()
+        self._nearest_shown_rgb=None;self._nearest_match=None
+        self._reference_argb=self._read_reference_color()
+        self.format_templates=load_format_templates(self.settings)
+        self.format_buttons=load_button_bindings(self.settings,self.format_templates)
+        self.color_history=self._open_color_history()
+        self._history_refresh=CoalescingTimer(self._refresh_history_panel,HISTORY_REFRESH_MS,self)
 
 
         overall_layout = QVBoxLayout(self)
@@ -803,29 +1713,68 @@ class CustomColorPickerDialog(QDialog):
         vals_grp = QGroupBox("Color Values"); vals_form_lyt = QFormLayout(vals_grp)
         vals_form_lyt.setLabelAlignment(Qt.AlignmentFlag.AlignRight)
         self.lbl_rgb=QLabel();self.lbl_rgba=QLabel();self.lbl_hex_rgb=QLabel();self.lbl_hex_argb=QLabel()
-        self.lbl_hsv=QLabel();self.lbl_dec=QLabel();self.lbl_hsl_win=QLabel();self.lbl_cmyk=QLabel()
+        self.lbl_hsv=QLabel();self.lbl_dec=QLabel();self.lbl_hsl_win=QLabel();self.lbl_cmyk=QLabel();self.lbl_nearest=QLabel()
         vals_form_lyt.addRow("RGB:",self.lbl_rgb);vals_form_lyt.addRow("RGBA:",self.lbl_rgba)
         vals_form_lyt.addRow("HTML:",self.lbl_hex_rgb);vals_form_lyt.addRow("HEX ARGB:",self.lbl_hex_argb)
         vals_form_lyt.addRow("HSL(Win):",self.lbl_hsl_win);vals_form_lyt.addRow("HSV:",self.lbl_hsv)
         vals_form_lyt.addRow("CMYK:",self.lbl_cmyk);vals_form_lyt.addRow("Decimal:",self.lbl_dec)
+        self.lbl_lab=QLabel();self.lbl_lch=QLabel();self.lbl_oklab=QLabel();self.lbl_oklch=QLabel();self.lbl_delta_e=QLabel()
+        vals_form_lyt.addRow("CIELAB:",self.lbl_lab);vals_form_lyt.addRow("LCh:",self.lbl_lch)
+        vals_form_lyt.addRow("OKLab:",self.lbl_oklab);vals_form_lyt.addRow("OKLCh:",self.lbl_oklch)
+        ref_w=QWidget();ref_lyt=QHBoxLayout(ref_w);ref_lyt.setContentsMargins(0,0,0,0)
+        self.set_ref_btn=QPushButton("Set");self.set_ref_btn.setToolTip("Use the current color as the reference for \u0394E")
+        self.set_ref_btn.clicked.connect(self.handle_set_reference_color)
+        ref_lyt.addWidget(self.lbl_delta_e,1);ref_lyt.addWidget(self.set_ref_btn)
+        vals_form_lyt.addRow("\u0394E to reference:",ref_w)
+        vals_form_lyt.addRow("Nearest saved:",self.lbl_nearest)
         right_lyt.addWidget(vals_grp)
 
         cpy_grp=QGroupBox("COPY TO CLIPBOARD");cpy_lyt=QGridLayout(cpy_grp)
         self.cp_rgb=QPushButton("RGB");self.cp_rgba=QPushButton("RGBA");self.cp_html=QPushButton("HTML")
         self.cp_hsv=QPushButton("HSV");self.cp_hsl=QPushButton("HSL");self.cp_cmyk=QPushButton("CMYK")
         self.cp_hex_argb=QPushButton("#ARGB");self.cp_dec=QPushButton("Dec");self.cp_all=QPushButton("ALL")
+        self.cp_lab=QPushButton("Lab");self.cp_lch=QPushButton("LCh");self.cp_oklab=QPushButton("OKLab");self.cp_oklch=QPushButton("OKLCh")
+        self.cp_delta_e=QPushButton("\u0394E76, \u0394E2000")
         cpy_lyt.addWidget(self.cp_rgb,0,0);cpy_lyt.addWidget(self.cp_rgba,0,1);cpy_lyt.addWidget(self.cp_html,1,0)
         cpy_lyt.addWidget(self.cp_hsv,1,1);cpy_lyt.addWidget(self.cp_hsl,2,0);cpy_lyt.addWidget(self.cp_cmyk,2,1)
-        cpy_lyt.addWidget(self.cp_hex_argb,3,0);cpy_lyt.addWidget(self.cp_dec,3,1);cpy_lyt.addWidget(self.cp_all,4,0,1,2)
-        self.cp_rgb.clicked.connect(lambda:self.copy_to_clipboard(self._format_rgb(),"RGB")); self.cp_rgba.clicked.connect(lambda:self.copy_to_clipboard(self._format_rgba(),"RGBA"))
-        self.cp_html.clicked.connect(lambda:self.copy_to_clipboard(self._format_html(),"HTML"));self.cp_hsv.clicked.connect(lambda:self.copy_to_clipboard(self._format_hsv_for_copy(),"HSV"))
-        self.cp_hsl.clicked.connect(lambda:self.copy_to_clipboard(self._format_hsl_for_copy(),"HSL"));self.cp_cmyk.clicked.connect(lambda:self.copy_to_clipboard(self._format_cmyk_for_copy(),"CMYK"))
-        self.cp_hex_argb.clicked.connect(lambda:self.copy_to_clipboard(self._format_hex_argb(),"#ARGB"));self.cp_dec.clicked.connect(lambda:self.copy_to_clipboard(self._format_decimal_qrgb(),"Dec"))
+        cpy_lyt.addWidget(self.cp_hex_argb,3,0);cpy_lyt.addWidget(self.cp_dec,3,1)
+        cpy_lyt.addWidget(self.cp_lab,4,0);cpy_lyt.addWidget(self.cp_lch,4,1);cpy_lyt.addWidget(self.cp_oklab,5,0);cpy_lyt.addWidget(self.cp_oklch,5,1)
+        cpy_lyt.addWidget(self.cp_delta_e,6,0,1,2);cpy_lyt.addWidget(self.cp_all,7,0,1,2)
+        # Button id (format_templates.COPY_BUTTONS) -> (button, format record key, description); right-click binds a template.
+        self._copy_buttons={'rgb':(self.cp_rgb,'rgb',"RGB"),'rgba':(self.cp_rgba,'rgba',"RGBA"),'html':(self.cp_html,'html',"HTML"),
+                            'hsv':(self.cp_hsv,'hsv_copy',"HSV"),'hsl':(self.cp_hsl,'hsl_copy',"HSL"),'cmyk':(self.cp_cmyk,'cmyk_copy',"CMYK"),
+                            'argb':(self.cp_hex_argb,'hex_argb',"#ARGB"),'dec':(self.cp_dec,'decimal',"Dec"),'lab':(self.cp_lab,'lab_copy',"CIELAB"),
+                            'lch':(self.cp_lch,'lch_copy',"LCh"),'oklab':(self.cp_oklab,'oklab_copy',"OKLab"),'oklch':(self.cp_oklch,'oklch_copy',"OKLCh"),
+                            'all':(self.cp_all,None,"all values")}
+        for button_id,(btn,key,desc) in self._copy_buttons.items():
+            if key: btn.clicked.connect(lambda _=False,button_id=button_id:self.copy_value_to_clipboard(button_id))
+            btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+            btn.customContextMenuRequested.connect(lambda pos,button_id=button_id:self._show_copy_button_menu(button_id,pos))
+        self.cp_delta_e.clicked.connect(self.copy_delta_e_to_clipboard)
         self.cp_all.clicked.connect(self.copy_all_values_to_clipboard);right_lyt.addWidget(cpy_grp)
+        self._update_copy_button_tooltips()
+
+        tpl_grp=QGroupBox("Format Templates");tpl_lyt=QGridLayout(tpl_grp)
+        self.template_combo=QComboBox();self.template_combo.addItems(list(self.format_templates))
+        self.template_combo.setToolTip("Templates come from the [formatTemplates] section of the INI file; right-click a copy button to bind one to it")
+        current_template=str(self.settings.value(CURRENT_FORMAT_TEMPLATE_KEY,"") or "")
+        if current_template in self.format_templates: self.template_combo.setCurrentText(current_template)
+        self.cp_template=QPushButton("Copy");self.cp_template.clicked.connect(self.copy_template_to_clipboard)
+        self.lbl_template_preview=QLabel();self.lbl_template_preview.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        tpl_lyt.addWidget(self.template_combo,0,0);tpl_lyt.addWidget(self.cp_template,0,1);tpl_lyt.addWidget(self.lbl_template_preview,1,0,1,2)
+        tpl_lyt.setColumnStretch(0,1)
+        self.template_combo.currentTextChanged.connect(self._on_template_selected);right_lyt.addWidget(tpl_grp)
 
         act_grp=QGroupBox("Actions");act_lyt=QVBoxLayout(act_grp)
         self.pick_btn=QPushButton("Pick Color from Screen"); self.pick_btn.setToolTip("Pick a color from anywhere on the screen")
-        self.pick_btn.clicked.connect(self.start_screen_color_pick);act_lyt.addWidget(self.pick_btn);right_lyt.addWidget(act_grp)
+        self.pick_btn.clicked.connect(self.start_screen_color_pick);act_lyt.addWidget(self.pick_btn)
+        self.freeze_chk=QCheckBox("Freeze screen while picking");self.freeze_chk.setToolTip("Pick from a still snapshot of the whole desktop taken when picking starts")
+        self.freeze_chk.setChecked(self.settings.value(FREEZE_FRAME_KEY,False,type=bool))
+        self.freeze_chk.toggled.connect(lambda on:self.settings_writer.set_value(FREEZE_FRAME_KEY,on))
+        self.broadcast_chk=QCheckBox("Send to all open color dialogs");self.broadcast_chk.setToolTip("Push each color to every open color dialog (system, Word, ...) instead of only the topmost one")
+        self.broadcast_chk.setChecked(self.external_sender.broadcast)
+        self.broadcast_chk.toggled.connect(self._set_broadcast)
+        act_lyt.addWidget(self.freeze_chk);act_lyt.addWidget(self.broadcast_chk);right_lyt.addWidget(act_grp)
         right_lyt.addStretch();top_panel_h_lyt.addWidget(right_panel_w,1);overall_layout.addWidget(top_panel_w)
 
         palettes_cont_w = QWidget(); palettes_h_lyt = QHBoxLayout(palettes_cont_w)
@@ -833,20 +1782,51 @@ class CustomColorPickerDialog(QDialog):
         def_pal_grp = QGroupBox("Default Shades"); def_pal_lyt = QVBoxLayout(def_pal_grp)
         self.def_shades_pal_w = CustomColorPaletteWidget(True,self)
         self.def_shades_pal_w.paletteColorClicked.connect(self.handle_palette_color_cell_clicked)
-        self.def_shades_pal_w.requestSaveColorToCell.connect(lambda idx, pal=self.def_shades_pal_w, key=DEFAULT_SHADES_PALETTE_KEY: self.handle_request_save_to_specific_palette(idx,pal,key))
+        self.def_shades_pal_w.requestSaveColorToCell.connect(lambda idx, pal=self.def_shades_pal_w: self.handle_request_save_to_specific_palette(idx,pal))
         def_pal_lyt.addWidget(self.def_shades_pal_w); palettes_h_lyt.addWidget(def_pal_grp)
         palettes_h_lyt.addSpacerItem(QSpacerItem(20,10,QSizePolicy.Policy.Fixed,QSizePolicy.Policy.Minimum))
 
         usr_pal_outer_grp = QGroupBox("User Palette"); usr_pal_outer_lyt = QVBoxLayout(usr_pal_outer_grp)
+        pal_sel_lyt = QHBoxLayout()
+        self.palette_combo = QComboBox(); self.palette_combo.setToolTip("Palette shown below; every palette is kept in the palette library")
+        self.new_palette_btn = QPushButton("New"); self.new_palette_btn.setToolTip("Create an empty palette")
+        self.import_palette_btn = QPushButton("Import..."); self.import_palette_btn.setToolTip("Import a GIMP palette (.gpl) as a new palette")
+        self.new_palette_btn.clicked.connect(self.handle_new_palette); self.import_palette_btn.clicked.connect(self.handle_import_palette)
+        pal_sel_lyt.addWidget(self.palette_combo,1); pal_sel_lyt.addWidget(self.new_palette_btn); pal_sel_lyt.addWidget(self.import_palette_btn)
+        usr_pal_outer_lyt.addLayout(pal_sel_lyt)
         self.add_to_usr_pal_btn = QPushButton("Add color to selected spot")
         self.add_to_usr_pal_btn.clicked.connect(self.handle_add_color_to_user_palette)
         usr_pal_outer_lyt.addWidget(self.add_to_usr_pal_btn)
         self.usr_cust_pal_w = CustomColorPaletteWidget(False,self)
         self.usr_cust_pal_w.paletteColorClicked.connect(self.handle_palette_color_cell_clicked)
         self.usr_cust_pal_w.cellSelectedSignal.connect(self.handle_user_palette_cell_selection)
-        self.usr_cust_pal_w.requestSaveColorToCell.connect(lambda idx, pal=self.usr_cust_pal_w, key=USER_CUSTOM_PALETTE_KEY: self.handle_request_save_to_specific_palette(idx,pal,key))
+        self.usr_cust_pal_w.requestSaveColorToCell.connect(lambda idx, pal=self.usr_cust_pal_w: self.handle_request_save_to_specific_palette(idx,pal))
         usr_pal_outer_lyt.addWidget(self.usr_cust_pal_w); palettes_h_lyt.addWidget(usr_pal_outer_grp)
+
+        hist_grp = QGroupBox("Pick History"); hist_lyt = QVBoxLayout(hist_grp)
+        hist_sel_lyt = QHBoxLayout()
+        self.history_range_combo = QComboBox(); self.history_range_combo.addItems(list(HISTORY_RANGES))
+        history_range = str(self.settings.value(HISTORY_RANGE_KEY, "") or "")
+        if history_range in HISTORY_RANGES: self.history_range_combo.setCurrentText(history_range)
+        self.history_similar_chk = QCheckBox("Similar to current"); self.history_similar_chk.setToolTip("List the picks closest to the current color instead of the newest ones")
+        self.clear_history_btn = QPushButton("Clear"); self.clear_history_btn.setToolTip("Forget every picked color")
+        hist_sel_lyt.addWidget(self.history_range_combo,1); hist_sel_lyt.addWidget(self.history_similar_chk); hist_sel_lyt.addWidget(self.clear_history_btn)
+        hist_lyt.addLayout(hist_sel_lyt)
+        self.history_list = QListWidget(); self.history_list.setToolTip("Click a pick to make it the current color")
+        self.lbl_history_count = QLabel()
+        hist_lyt.addWidget(self.history_list); hist_lyt.addWidget(self.lbl_history_count)
+        self.history_range_combo.currentTextChanged.connect(self._on_history_range_selected)
+        self.history_similar_chk.toggled.connect(lambda _:self._history_refresh.request())
+        self.clear_history_btn.clicked.connect(self.handle_clear_history)
+        self.history_list.itemClicked.connect(self._on_history_item_clicked)
+        hist_grp.setEnabled(self.color_history is not None); palettes_h_lyt.addWidget(hist_grp)
         overall_layout.addWidget(palettes_cont_w)
+        # Palette widget -> name of the library palette it shows; palette names are also the color index sources.
+        self._shown_palettes={}
+        self._indexed_palettes=set()
+        for pal in (self.def_shades_pal_w,self.usr_cust_pal_w):
+            pal.cellColorChanged.connect(lambda idx,pal=pal:self._on_palette_cell_changed(pal,idx))
+            pal.paletteReset.connect(lambda pal=pal:self._index_palette(pal))
 
         self.btn_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok|QDialogButtonBox.StandardButton.Cancel)
         self.btn_box.button(QDialogButtonBox.StandardButton.Ok).setText("OK")
@@ -854,11 +1834,17 @@ class CustomColorPickerDialog(QDialog):
         self.btn_box.accepted.connect(self.handle_accepted_signal); self.btn_box.rejected.connect(self.handle_rejected_signal)
         overall_layout.addWidget(self.btn_box); self.setLayout(overall_layout)
 
-        self._load_custom_colors()
-        self.def_shades_pal_w.load_colors_from_settings(self.settings,DEFAULT_SHADES_PALETTE_KEY)
-        self.usr_cust_pal_w.load_colors_from_settings(self.settings,USER_CUSTOM_PALETTE_KEY)
+        self._load_custom_colors(); self._index_standard_custom_colors()
+        self._show_palette(self.def_shades_pal_w,DEFAULT_SHADES_PALETTE,KIND_SHADES)
+        current_palette=str(self.settings.value(CURRENT_USER_PALETTE_KEY,USER_PALETTE) or USER_PALETTE)
+        self.settings_writer.remember(CURRENT_USER_PALETTE_KEY,current_palette); self._reload_palette_combo(current_palette)
+        self.palette_combo.currentTextChanged.connect(self._select_user_palette)
         self.update_all_displays(); self._hide_standard_eyedropper_button()
         self._setup_tray_icon()
+        # Only shown palettes are indexed; reading every palette's colors for the index is an opt-in, done after the window is up.
+        if self.color_index is not None and self.settings.value(NEAREST_ALL_PALETTES_KEY,False,type=bool):
+            QTimer.singleShot(0,self._index_palette_library)
+        self._refresh_history_panel()
 
     def _setup_tray_icon(self):
         if not QSystemTrayIcon.isSystemTrayAvailable():
@@ -912,10 +1898,9 @@ class CustomColorPickerDialog(QDialog):
     def _save_all_settings(self):
         log_message("Saving all settings (QColorDialog custom colors, default palette, user palette).")
         self._save_custom_colors()
-        self.def_shades_pal_w.save_colors_to_settings(self.settings, DEFAULT_SHADES_PALETTE_KEY)
-        self.usr_cust_pal_w.save_colors_to_settings(self.settings, USER_CUSTOM_PALETTE_KEY)
-        self.settings.sync() # Ensure data is written to disk
-        log_message(f"Settings saving finished. Synced to: {self.settings.fileName()}")
+        # Palette edits were queued as they happened; this only waits for whatever is still pending.
+        if not self.settings_writer.flush(): log_message("Settings writer did not finish writing in time.")
+        log_message(f"Settings saving finished. Written to: {self.settings.fileName()} {self.settings_writer.stats()}")
 
     @Slot()
     def handle_user_palette_cell_selection(self,cell_idx:int,pal_w_inst:QWidget):
@@ -935,12 +1920,12 @@ class CustomColorPickerDialog(QDialog):
             else: InfoPopupWindow("No valid color selected.", self, 2500).show()
         else: InfoPopupWindow("No spot selected in user palette.", self, 3000).show()
 
-    @Slot(int, QWidget, str)
-    def handle_request_save_to_specific_palette(self,cell_idx:int,pal_w:CustomColorPaletteWidget,s_key:str):
+    @Slot(int, QWidget)
+    def handle_request_save_to_specific_palette(self,cell_idx:int,pal_w:CustomColorPaletteWidget):
         if self.sel_color and self.sel_color.isValid():
             if pal_w.set_color_at_index(cell_idx, self.sel_color):
-                palette_name = "default" if pal_w == self.def_shades_pal_w else "user"
-                InfoPopupWindow(f"Color saved in {palette_name} palette.", self, 2000).show()
+                palette_name = self._shown_palettes.get(pal_w, "user")
+                InfoPopupWindow(f"Color saved in '{palette_name}' palette.", self, 2000).show()
         else: InfoPopupWindow("No valid color selected to save.", self, 2500).show()
 
     @Slot()
@@ -963,33 +1948,27 @@ class CustomColorPickerDialog(QDialog):
         super().reject() 
 
     def _load_custom_colors(self):
-        # No need to check for file existence here, QSettings handles it.
-        # If the file doesn't exist, settings.value() will return the default.
-        s_colors = self.settings.value(STANDARD_CUSTOM_COLORS_KEY,[])
-        if isinstance(s_colors,str): s_colors=[s_colors]
+        # The custom colors are the "Custom Colors" palette of the library (migrated from the INI on first run).
+        key=self._palette_key(CUSTOM_COLORS_PALETTE)
+        self.settings_writer.register(key,lambda:self.palette_store.snapshot(CUSTOM_COLORS_PALETTE),
+                                      lambda snap:self.palette_store.save_snapshot(CUSTOM_COLORS_PALETTE,snap,KIND_CUSTOM))
+        model = self.palette_store.load(CUSTOM_COLORS_PALETTE)
         default_color = QColor(Qt.GlobalColor.white)
-        log_message(f"Loading QColorDialog custom colors from '{self.settings.fileName()}' ({len(s_colors)} items found).")
-        
-        loaded_count = 0
+        if model is None:
+            log_message(f"No QColorDialog custom colors in the palette library. Using defaults.")
+            model = PaletteModel(16)
+        else:
+            log_message(f"Loading QColorDialog custom colors from the palette library ({model.filled_count()} colors).")
+            self.settings_writer.remember(key, model_snapshot(model))
         for i in range(16):
-            c_set = default_color
-            if i<len(s_colors) and isinstance(s_colors[i],str):
-                try:
-                    temp_color=QColor(s_colors[i])
-                    if temp_color.isValid(): 
-                        c_set=temp_color
-                        loaded_count +=1
-                except Exception as e:
-                    log_message(f"Error parsing QColorDialog custom color '{s_colors[i]}': {e}. Used default.")
+            c_set = model.color(i, default_color) if i < len(model) else default_color
             self.c_dialog_w.setCustomColor(i,c_set.rgb())
-        if not s_colors or loaded_count == 0:
-             log_message(f"No QColorDialog custom colors found or loaded from settings file. Using defaults.")
 
 
     def _save_custom_colors(self):
         try:
-            log_message(f"Saving QColorDialog custom colors to '{self.settings.fileName()}'.")
-            custom_colors = []
+            log_message(f"Saving QColorDialog custom colors to '{self.palette_store.path}'.")
+            custom_colors = PaletteModel(16)
             for i in range(16): 
                 color_instance = self.c_dialog_w.customColor(i)
                 # QColorDialog.customColor(idx) returns an int (QRgb). We need to convert it back to QColor.
@@ -1003,9 +1982,9 @@ class CustomColorPickerDialog(QDialog):
                     log_message(f"Invalid custom color retrieved/converted from QColorDialog at position {i}, using white as fallback for saving.")
                     color_instance = QColor(Qt.GlobalColor.white) 
                 
-                custom_colors.append(color_instance.name(QColor.NameFormat.HexArgb))
+                custom_colors.set_color(i, color_instance)
             
-            self.settings.setValue(STANDARD_CUSTOM_COLORS_KEY, custom_colors)
+            self.settings_writer.set_value(self._palette_key(CUSTOM_COLORS_PALETTE), model_snapshot(custom_colors))
         except Exception as e:
             log_message(f"ERROR during saving QColorDialog custom colors: {e}\n{traceback.format_exc()}")
 
@@ -1026,6 +2005,19 @@ class CustomColorPickerDialog(QDialog):
             log_message("CustomColorPickerDialog: closeEvent - hiding tray icon before application quit.")
             self.tray_icon.hide()
 
+        if self.capture_backend: self.capture_backend.close()
+        self._display_refresh.cancel(); self._send_throttle.cancel(); self._history_refresh.cancel()
+        log_message(f"CustomColorPickerDialog: Color changes {self._display_refresh.stats()} (runs = values panel refreshes), external sends {self._send_throttle.stats()}")
+        self.settings_writer.stop()
+        log_message(f"CustomColorPickerDialog: Palette library {self.palette_store.stats()}")
+        self.palette_store.close()
+        if self.color_history is not None:
+            log_message(f"CustomColorPickerDialog: Color history {self.color_history.stats()}")
+            self.color_history.close()
+        self.external_sender.stop()
+        log_message(f"CustomColorPickerDialog: External dialog sends {self.external_sender.stats()}")
+        if self.dialog_locator.backend is not None: log_message(f"CustomColorPickerDialog: Color dialog lookups {self.dialog_locator.stats()}")
+
         log_message("CustomColorPickerDialog: closeEvent - accepting window close and signaling application quit.")
         e.accept()
         QApplication.instance().quit()
@@ -1044,48 +2036,262 @@ class CustomColorPickerDialog(QDialog):
         if self._picker_inst and self._picker_inst.isVisible():
             log_message("Closing previous ScreenColorPicker instance.")
             self._picker_inst.close();QApplication.processEvents()
-        self._picker_inst=ScreenColorPicker(self)
+        self._index_standard_custom_colors() # QColorDialog has no signal for edits of its custom colors
+        self._picker_inst=ScreenColorPicker(self,self._magnifier_max_fps(),self.capture_backend,self.freeze_chk.isChecked())
         self._picker_inst.colorSelected.connect(self.on_screen_color_picked)
         self._picker_inst.colorHovered.connect(self.handle_color_hovered_from_picker)
         self._picker_inst.pickerClosed.connect(self.restore_dialog_after_picker_closed)
         self._picker_inst.pick_color_on_screen()
 
+    def _set_broadcast(self,on:bool):
+        self.external_sender.broadcast=on;self.settings_writer.set_value(BROADCAST_KEY,on)
+
+    def _magnifier_max_fps(self)->float:
+        try: return float(self.settings.value(MAGNIFIER_MAX_FPS_KEY, 0) or 0)
+        except (TypeError, ValueError):
+            log_message(f"Invalid '{MAGNIFIER_MAX_FPS_KEY}' value in settings, following the screen refresh rate.")
+            return 0.0
+
+    def _read_nearest_max_delta_e(self)->float:
+        try: return float(self.settings.value(NEAREST_MAX_DELTA_E_KEY, DEFAULT_NEAREST_MAX_DELTA_E))
+        except (TypeError, ValueError):
+            log_message(f"Invalid '{NEAREST_MAX_DELTA_E_KEY}' value in settings, using {DEFAULT_NEAREST_MAX_DELTA_E}.")
+            return DEFAULT_NEAREST_MAX_DELTA_E
+
+    def _read_reference_color(self):
+        text=self.settings.value(REFERENCE_COLOR_KEY,"")
+        if not text: return None
+        argb=parse_color_string(str(text))
+        if argb<0:
+            log_message(f"Invalid '{REFERENCE_COLOR_KEY}' value in settings, no reference color."); return None
+        return argb
+
+    @Slot()
+    def handle_set_reference_color(self):
+        self._reference_argb=self.sel_color.rgba()
+        self.settings_writer.set_value(REFERENCE_COLOR_KEY,FORMAT_CACHE.get(self._reference_argb)['hex_argb'])
+        self._update_delta_e(self._formats())
+
+    def _delta_e(self,f:dict):
+        """(delta E76, delta E2000) of the color of record f to the reference color; None without a reference."""
+        if self._reference_argb is None: return None
+        ref_lab=FORMAT_CACHE.get(self._reference_argb)['lab_values']
+        return delta_e76(f['lab_values'],ref_lab),delta_e2000(f['lab_values'],ref_lab)
+
+    def _update_delta_e(self,f:dict):
+        d=self._delta_e(f)
+        if d is None: self.lbl_delta_e.setText("no reference color"); return
+        self.lbl_delta_e.setText(f"\u0394E76 {d[0]:.2f}  \u0394E2000 {d[1]:.2f}  (vs {FORMAT_CACHE.get(self._reference_argb)['html']})")
+
+    def _open_color_history(self):
+        if not _NUMPY_AVAILABLE:
+            log_message("Pick history is disabled (numpy missing)."); return None
+        try: capacity=int(self.settings.value(HISTORY_CAPACITY_KEY,ColorHistory.DEFAULT_CAPACITY))
+        except (TypeError, ValueError):
+            log_message(f"Invalid '{HISTORY_CAPACITY_KEY}' value in settings, keeping {ColorHistory.DEFAULT_CAPACITY} picks.")
+            capacity=ColorHistory.DEFAULT_CAPACITY
+        path=color_history_path(self.settings)
+        try: history=ColorHistory(capacity,path)
+        except (OSError, ValueError) as e:
+            log_message(f"Color history: Cannot open '{path}' ({e}). Picks will not be kept after this session.")
+            return ColorHistory(capacity)
+        log_message(f"Color history: {len(history)} picks loaded from '{path}'.")
+        return history
+
+    def _record_pick(self,c:QColor):
+        if self.color_history is None: return
+        x,y,frozen=(self._picker_inst.last_pick if self._picker_inst else None) or (NO_POSITION,NO_POSITION,False)
+        self.color_history.add(c.rgba(),x,y,SOURCE_FROZEN_SCREEN if frozen else SOURCE_SCREEN)
+        self._history_refresh.request()
+
+    def _history_range(self)->tuple:
+        """(start, end) timestamps of the selected Pick History range; None is unbounded."""
+        seconds=HISTORY_RANGES.get(self.history_range_combo.currentText())
+        if seconds is None: return None,None
+        if seconds==0: return time.mktime(time.localtime()[:3]+(0,0,0,0,0,-1)),None
+        return time.time()-seconds,None
+
+    def _refresh_history_panel(self):
+        """Lists the newest picks in the selected range, or the ones closest to the current color."""
+        if self.color_history is None: return
+        start,end=self._history_range();similar=self.history_similar_chk.isChecked()
+        if similar: entries=self.color_history.nearest(self.sel_color.rgba(),HISTORY_PANEL_ROWS,None,start,end)
+        else: entries=self.color_history.recent(HISTORY_PANEL_ROWS,start,end)
+        self.history_list.clear()
+        for e in entries:
+            f=FORMAT_CACHE.get(e.argb);pos=e.position
+            text=f"{time.strftime('%Y-%m-%d %H:%M:%S',time.localtime(e.time))}  {f['html']}"
+            if similar: text+=f"  \u0394E {e.delta_e:.1f}"
+            item=QListWidgetItem(text);pix=QPixmap(16,16);pix.fill(QColor.fromRgba(e.argb));item.setIcon(QIcon(pix))
+            item.setToolTip(f"RGB {f['rgb']}, picked from the {e.source_name}"+(f" at ({pos[0]}, {pos[1]})" if pos else ""))
+            item.setData(Qt.ItemDataRole.UserRole,e.argb);self.history_list.addItem(item)
+        total=len(self.color_history);shown=self.color_history.count(start,end)
+        self.lbl_history_count.setText(f"{shown} picks" if shown==total else f"{shown} of {total} picks")
+
+    @Slot(str)
+    def _on_history_range_selected(self,name:str):
+        self.settings_writer.set_value(HISTORY_RANGE_KEY,name);self._history_refresh.request()
+
+    @Slot(QListWidgetItem)
+    def _on_history_item_clicked(self,item:QListWidgetItem):
+        self.handle_palette_color_cell_clicked(QColor.fromRgba(item.data(Qt.ItemDataRole.UserRole)))
+
+    @Slot()
+    def handle_clear_history(self):
+        if self.color_history is None or not len(self.color_history): return
+        if QMessageBox.question(self,"Clear Pick History",f"Forget all {len(self.color_history)} picked colors?")!=QMessageBox.StandardButton.Yes: return
+        self.color_history.clear();self._refresh_history_panel()
+
+    def _palette_key(self,name:str)->str:
+        """Settings-writer key of a library palette."""
+        return f"palette:{name}"
+
+    def _register_palette(self,name:str,kind:str):
+        self.settings_writer.register(self._palette_key(name),lambda name=name:self.palette_store.snapshot(name),
+                                      lambda snap,name=name,kind=kind:self.palette_store.save_snapshot(name,snap,kind))
+
+    def _show_palette(self,pal:CustomColorPaletteWidget,name:str,kind:str):
+        """Shows library palette name in pal, creating it (with the widget's defaults) if it does not exist yet."""
+        self._shown_palettes[pal]=name
+        self._register_palette(name,kind)
+        model=self.palette_store.load(name); created=model is None
+        if created: model=PaletteModel(CustomColorPaletteWidget.TOTAL_CELLS)
+        pal.set_model(model)
+        if pal._populate_defaults and not model.filled_count(): pal.populate_default_colors(); created=True
+        if created: self.palette_store.save(name,model,kind); log_message(f"Palette store: Created palette '{name}'.")
+        if pal is self.usr_cust_pal_w: self.active_user_palette_sel_cell=-1
+
+    def _reload_palette_combo(self,current:str):
+        names=[info.name for info in self.palette_store.palettes(KIND_USER)]
+        if not names: names=[USER_PALETTE]
+        if current not in names: current=names[0]
+        self.palette_combo.blockSignals(True)
+        self.palette_combo.clear(); self.palette_combo.addItems(names); self.palette_combo.setCurrentText(current)
+        self.palette_combo.blockSignals(False)
+        if self._shown_palettes.get(self.usr_cust_pal_w)!=current: self._select_user_palette(current)
+
+    @Slot(str)
+    def _select_user_palette(self,name:str):
+        if not name or self._shown_palettes.get(self.usr_cust_pal_w)==name: return
+        log_message(f"Showing palette '{name}' in the user palette grid.")
+        self._show_palette(self.usr_cust_pal_w,name,KIND_USER)
+        self.settings_writer.set_value(CURRENT_USER_PALETTE_KEY,name)
+
+    @Slot()
+    def handle_new_palette(self):
+        name,ok=QInputDialog.getText(self,"New Palette","Palette name:",text=self.palette_store.unique_name("Palette"))
+        name=name.strip()
+        if not ok or not name: return
+        if name in self.palette_store: InfoPopupWindow(f"A palette named '{name}' already exists.",self,2500).show(); return
+        self.palette_store.save(name,PaletteModel(CustomColorPaletteWidget.TOTAL_CELLS),KIND_USER)
+        self._reload_palette_combo(name)
+
+    @Slot()
+    def handle_import_palette(self):
+        path,_=QFileDialog.getOpenFileName(self,"Import Palette","","GIMP palettes (*.gpl);;All files (*)")
+        if not path: return
+        try: gpl_name,colors=read_gpl(path)
+        except (OSError,ValueError) as e:
+            log_message(f"Palette import failed: {e}"); InfoPopupWindow(f"Cannot import palette:\n{e}",self,4000).show(); return
+        cols=CustomColorPaletteWidget.NUM_COLS
+        model=PaletteModel(max(CustomColorPaletteWidget.TOTAL_CELLS,(len(colors)+cols-1)//cols*cols))
+        for i,argb in enumerate(colors): model.set_argb(i,argb)
+        name=self.palette_store.unique_name(gpl_name)
+        self.palette_store.save(name,model,KIND_USER)
+        log_message(f"Imported {len(colors)} colors from '{path}' as palette '{name}'.")
+        self._reload_palette_combo(name)
+        InfoPopupWindow(f"Imported {len(colors)} colors as '{name}'.",self,2500).show()
+
+    def _on_palette_cell_changed(self,pal:CustomColorPaletteWidget,idx:int):
+        name=self._shown_palettes.get(pal)
+        if name is None: return
+        self.settings_writer.mark_dirty(self._palette_key(name))
+        if self.color_index is None: return
+        model=pal.model
+        if model.is_filled(idx): self.color_index.set(name,idx,model.argb(idx))
+        else: self.color_index.remove(name,idx)
+        self._nearest_shown_rgb=None
+
+    def _index_palette(self,pal:CustomColorPaletteWidget):
+        name=self._shown_palettes.get(pal)
+        if self.color_index is None or name is None: return
+        self.color_index.set_source(name,pal.model.colors,pal.model.filled)
+        self._indexed_palettes.add(name); self._nearest_shown_rgb=None
+
+    def _index_palette_library(self):
+        """Indexes the library palettes not shown yet (nearestColor/allPalettes), reading their colors without caching models."""
+        if self.color_index is None: return
+        for info in self.palette_store.palettes(KIND_USER):
+            if info.name in self._indexed_palettes: continue
+            data=self.palette_store.read_colors(info.name)
+            if data: self.color_index.set_source(info.name,*data); self._indexed_palettes.add(info.name)
+        self._nearest_shown_rgb=None
+
+    def _index_standard_custom_colors(self):
+        if self.color_index is None: return
+        self.color_index.set_source(CUSTOM_COLORS_PALETTE,[QColorDialog.customColor(i).rgba() for i in range(QColorDialog.customCount())])
+        self._nearest_shown_rgb=None
+
+    def _describe_match(self,m)->str:
+        return f"{m.source} #{m.slot+1} ({FORMAT_CACHE.get(m.argb)['html']}, \u0394E {m.delta_e:.1f})"
+
+    def _show_nearest_palette_color(self,c:QColor):
+        """Shows the closest saved color in the values panel and highlights its palette cell."""
+        if self.color_index is None or not c.isValid(): return
+        rgb=c.rgb()
+        if rgb==self._nearest_shown_rgb: return
+        self._nearest_shown_rgb=rgb
+        matches=self.color_index.nearest(rgb,3,self._nearest_max_delta_e)
+        best=self._nearest_match=matches[0] if matches else None
+        self.lbl_nearest.setText(self._describe_match(best) if best else f"none within \u0394E {self._nearest_max_delta_e:g}")
+        self.lbl_nearest.setToolTip("\n".join(self._describe_match(m) for m in matches))
+        for pal,name in self._shown_palettes.items():
+            pal.set_highlighted_cell(best.slot if best and best.source==name else -1)
+
     @Slot(QColor)
     def handle_color_hovered_from_picker(self,c:QColor):
-        if c.isValid(): self._color_to_send_tmr=c
-        if not self._send_tmr.isActive(): self._send_tmr.start(50) 
+        if c.isValid(): self._color_to_send_tmr=c; self._show_nearest_palette_color(c); self._update_template_preview(c.rgba()); self._send_throttle.request()
 
     @Slot()
     def _perform_send_to_external_dialog(self):
         if self._color_to_send_tmr and self._color_to_send_tmr.isValid():
-            send_rgb_values_to_external_dialog(
+            self.external_sender.submit(
                 self._color_to_send_tmr.red(),
                 self._color_to_send_tmr.green(),
                 self._color_to_send_tmr.blue(),
-                self, 
                 True  
             )
             self._color_to_send_tmr=None
 
+    @Slot(object)
+    def _on_external_send_finished(self,result:ExternalSendResult):
+        if result.is_hover: return
+        if result.context=="screen_pick":
+            # The clipboard part of the popup was decided when the color was picked.
+            pop_parts=[f"Copied RGB:\n{result.rgb[0]},{result.rgb[1]},{result.rgb[2]}"]
+            if self._picked_nearest_text: pop_parts.append(f"Nearest saved: {self._picked_nearest_text}")
+            if result.targets: pop_parts.append(result.message)
+            elif result.found: pop_parts.append(f"Sent to '{result.window_title}'.")
+            InfoPopupWindow("\n".join(pop_parts),self if self.isVisible() else None,3000).show()
+        elif result.message and self.isVisible():
+            InfoPopupWindow(result.message,self,result.popup_ms).show()
+
     @Slot(QColor)
     def on_screen_color_picked(self,c:QColor):
         log_message(f"Picked color from screen: {c.name()}")
         if c.isValid():
-            if self._send_tmr.isActive():self._send_tmr.stop()
-            self._color_to_send_tmr=None;self.c_dialog_w.setCurrentColor(c)
+            self.c_dialog_w.setCurrentColor(c);self._display_refresh.flush()
+            # The pick is sent below as an explicit send, which supersedes any hover send of the same drag.
+            self._send_throttle.cancel();self._color_to_send_tmr=None;self._show_nearest_palette_color(c)
+            self._picked_nearest_text=self._describe_match(self._nearest_match) if self._nearest_match else ""
             log_message(f"Sending picked color {c.name()} to external dialog.")
             
-            found_ext=send_rgb_values_to_external_dialog(c.red(),c.green(),c.blue(),self, False) 
-            rgb_txt=f"{c.red()},{c.green()},{c.blue()}"
+            self._record_pick(c)
+            rgb_txt=FORMAT_CACHE.get(c.rgba())['rgb']
             if self.clip: self.clip.setText(rgb_txt); log_message(f"Copied RGB ({rgb_txt}) to clipboard.")
             else: log_message("Error: Clipboard not accessible.")
-            
-            pop_parts=[f"Copied RGB:\n{rgb_txt}"]
-            if found_ext:
-                pop_parts.append("Sent to system color dialog.")
-
-            parent_for_popup = self if self.isVisible() else None
-            InfoPopupWindow("\n".join(pop_parts),parent_for_popup,3000).show()
+            # The popup is shown by _on_external_send_finished once the dialog write is done.
+            self.external_sender.submit(c.red(),c.green(),c.blue(),False,"screen_pick")
             self.close_picker_tmr.start(100)
 
     @Slot()
@@ -1097,8 +2303,8 @@ class CustomColorPickerDialog(QDialog):
     def restore_dialog_after_picker_closed(self):
         log_message("Restoring main dialog after picker closed.")
         if self.close_picker_tmr.isActive():self.close_picker_tmr.stop()
-        if self._send_tmr.isActive():self._send_tmr.stop()
-        self._color_to_send_tmr=None
+        self._send_throttle.cancel()
+        self._color_to_send_tmr=None;self._show_nearest_palette_color(self.sel_color)
         if self._picker_inst:
             try:self._picker_inst.colorSelected.disconnect(self.on_screen_color_picked)
             except RuntimeError:pass
@@ -1115,36 +2321,24 @@ class CustomColorPickerDialog(QDialog):
     @Slot(QColor)
     def on_color_dialog_widget_changed(self,c:QColor):
         if self.sel_color!=c and c.isValid():
-            self.sel_color=QColor(c);self.update_all_displays()
-            self._color_to_send_tmr=QColor(c)
-            if not self._send_tmr.isActive(): self._send_tmr.start(75) 
+            self.sel_color=QColor(c);self._display_refresh.request()
+            self._color_to_send_tmr=QColor(c);self._send_throttle.request()
 
 
-    def _update_hsl_inputs(self):self.lbl_hsl_win.setText(self._format_hsl_for_display())
-    def _update_cmyk_inputs(self):self.lbl_cmyk.setText(self._format_cmyk_for_display())
+    def _formats(self)->dict:
+        """Display and copy strings of the selected color, computed once per color and kept in FORMAT_CACHE."""
+        return FORMAT_CACHE.get(self.sel_color.rgba())
     def update_all_displays(self):
-        self.lbl_rgb.setText(self._format_rgb());self.lbl_rgba.setText(self._format_rgba())
-        self.lbl_hex_rgb.setText(self._format_html());self.lbl_hex_argb.setText(self._format_hex_argb())
-        self._update_hsl_inputs();self.lbl_hsv.setText(self._format_hsv_for_display())
-        self._update_cmyk_inputs();self.lbl_dec.setText(self._format_decimal_qrgb())
-
-    def _format_rgb(self)->str:return f"{self.sel_color.red()},{self.sel_color.green()},{self.sel_color.blue()}"
-    def _format_rgba(self)->str:return f"{self.sel_color.red()},{self.sel_color.green()},{self.sel_color.blue()},{self.sel_color.alpha()}"
-    def _format_html(self)->str:return self.sel_color.name(QColor.NameFormat.HexRgb)
-    def _format_hsl_for_display(self)->str:
-        h,s,l=self.sel_color.hue(),self.sel_color.saturation(),self.sel_color.lightness()
-        wh=(h/QCOLOR_HUE_MAX)*WIN_HUE_MAX if h!=-1 else 0.0;ws=(s/QCOLOR_SAT_LUM_VAL_MAX)*WIN_SAT_LUM_MAX;wl=(l/QCOLOR_SAT_LUM_VAL_MAX)*WIN_SAT_LUM_MAX
-        return f"H:{int(round(wh))} S:{int(round(ws))} L:{int(round(wl))}"
-    def _format_hsl_for_copy(self)->str:
-        h,s,l=self.sel_color.hue(),self.sel_color.saturation(),self.sel_color.lightness()
-        wh=(h/QCOLOR_HUE_MAX)*WIN_HUE_MAX if h!=-1 else 0.0;ws=(s/QCOLOR_SAT_LUM_VAL_MAX)*WIN_SAT_LUM_MAX;wl=(l/QCOLOR_SAT_LUM_VAL_MAX)*WIN_SAT_LUM_MAX
-        return f"{int(round(wh))},{int(round(ws))},{int(round(wl))}"
-    def _format_hsv_for_display(self)->str:h,s,v,_=self.sel_color.getHsv();hs=str(h)if h!=-1 else"0";return f"H:{hs} S:{s} V:{v}"
-    def _format_hsv_for_copy(self)->str:h,s,v,_=self.sel_color.getHsv();hs=str(h)if h!=-1 else"0";return f"{hs},{s},{v}"
-    def _format_cmyk_for_display(self)->str:c,m,y,k,_=self.sel_color.getCmyk();return f"C:{c} M:{m} Y:{y} K:{k}"
-    def _format_cmyk_for_copy(self)->str:c,m,y,k,_=self.sel_color.getCmyk();return f"{c},{m},{y},{k}"
-    def _format_hex_argb(self)->str:return self.sel_color.name(QColor.NameFormat.HexArgb)
-    def _format_decimal_qrgb(self)->str:return str(self.sel_color.rgba())
+        f=self._formats()
+        self.lbl_rgb.setText(f['rgb']);self.lbl_rgba.setText(f['rgba'])
+        self.lbl_hex_rgb.setText(f['html']);self.lbl_hex_argb.setText(f['hex_argb'])
+        self.lbl_hsl_win.setText(f['hsl_display']);self.lbl_hsv.setText(f['hsv_display'])
+        self.lbl_cmyk.setText(f['cmyk_display']);self.lbl_dec.setText(f['decimal'])
+        self.lbl_lab.setText(f['lab_display']);self.lbl_lch.setText(f['lch_display'])
+        self.lbl_oklab.setText(f['oklab_display']);self.lbl_oklch.setText(f['oklch_display'])
+        self._update_delta_e(f);self._update_template_preview(self.sel_color.rgba())
+        self._show_nearest_palette_color(self.sel_color)
+        if self.history_similar_chk.isChecked(): self._history_refresh.request()
 
     @Slot()
     def copy_to_clipboard(self,txt:str,desc:str=""):
@@ -1156,14 +2350,73 @@ class CustomColorPickerDialog(QDialog):
             InfoPopupWindow(pop_msg,parent_for_popup,2000).show()
         else: InfoPopupWindow("Error: Clipboard not accessible.",self if self.isVisible()else None,3000).show()
 
+    @Slot()
+    def copy_value_to_clipboard(self,button_id:str):
+        """Copies what the copy button button_id stands for: its bound format template, or its built-in format."""
+        btn,key,desc=self._copy_buttons[button_id];template=self.format_buttons.get(button_id)
+        if template: self.copy_to_clipboard(template.format(self.sel_color.rgba()),f"{desc} ({template.name})")
+        else: self.copy_to_clipboard(self._formats()[key],desc)
+
+    def _current_template(self):
+        return self.format_templates.get(self.template_combo.currentText())
+
+    @Slot()
+    def copy_template_to_clipboard(self):
+        template=self._current_template()
+        if template: self.copy_to_clipboard(template.format(self.sel_color.rgba()),template.name)
+
+    def _update_template_preview(self,argb:int):
+        """Live preview of the selected template; cheap enough for every hover sample."""
+        template=self._current_template()
+        self.lbl_template_preview.setText(template.format(argb) if template else "")
+
+    @Slot(str)
+    def _on_template_selected(self,name:str):
+        self.settings_writer.set_value(CURRENT_FORMAT_TEMPLATE_KEY,name);self._update_template_preview(self.sel_color.rgba())
+
+    def _show_copy_button_menu(self,button_id:str,pos:QPoint):
+        btn,_,desc=self._copy_buttons[button_id];bound=self.format_buttons.get(button_id)
+        menu=QMenu(self)
+        default_action=menu.addAction("Built-in format");default_action.setCheckable(True);default_action.setChecked(bound is None)
+        default_action.triggered.connect(lambda:self._bind_copy_button(button_id,None))
+        menu.addSeparator()
+        for name,template in self.format_templates.items():
+            action=menu.addAction(f"{name}:  {template.pattern}");action.setCheckable(True);action.setChecked(bound is template)
+            action.triggered.connect(lambda _=False,name=name:self._bind_copy_button(button_id,name))
+        menu.exec(btn.mapToGlobal(pos))
+
+    def _bind_copy_button(self,button_id:str,name):
+        if name is None: self.format_buttons.pop(button_id,None)
+        else: self.format_buttons[button_id]=self.format_templates[name]
+        # An empty value keeps the entry in the INI but restores the built-in format.
+        self.settings_writer.set_value(f"{FORMAT_BUTTONS_GROUP}/{button_id}",name or "")
+        self._update_copy_button_tooltips()
+
+    def _update_copy_button_tooltips(self):
+        for button_id,(btn,_,desc) in self._copy_buttons.items():
+            template=self.format_buttons.get(button_id)
+            btn.setToolTip(f"Copies template '{template.name}': {template.pattern}" if template else f"Copies {desc} (right-click to use a format template)")
+
     @Slot()
     def copy_all_values_to_clipboard(self):
-        lines=[f"RGB: {self._format_rgb()}",f"RGBA: {self._format_rgba()}",f"HTML: {self._format_html()}",
-                 f"HEX ARGB: {self._format_hex_argb()}",f"HSL(Win): {self._format_hsl_for_copy()}",
-                 f"HSV: {self._format_hsv_for_copy()}",f"CMYK: {self._format_cmyk_for_copy()}",
-                 f"Decimal: {self._format_decimal_qrgb()}"]
+        template=self.format_buttons.get('all')
+        if template: self.copy_to_clipboard(template.format(self.sel_color.rgba()),f"all values ({template.name})"); return
+        f=self._formats()
+        lines=[f"RGB: {f['rgb']}",f"RGBA: {f['rgba']}",f"HTML: {f['html']}",
+                 f"HEX ARGB: {f['hex_argb']}",f"HSL(Win): {f['hsl_copy']}",
+                 f"HSV: {f['hsv_copy']}",f"CMYK: {f['cmyk_copy']}",
+                 f"Decimal: {f['decimal']}",f"CIELAB: {f['lab_copy']}",f"LCh: {f['lch_copy']}",
+                 f"OKLab: {f['oklab_copy']}",f"OKLCh: {f['oklch_copy']}"]
+        d=self._delta_e(f)
+        if d: lines.append(f"\u0394E76,\u0394E2000 vs {FORMAT_CACHE.get(self._reference_argb)['html']}: {d[0]:.2f},{d[1]:.2f}")
         self.copy_to_clipboard("\n".join(lines),"all values")
 
+    @Slot()
+    def copy_delta_e_to_clipboard(self):
+        d=self._delta_e(self._formats())
+        if d is None: InfoPopupWindow("No reference color set (use 'Set' next to \u0394E).",self,2500).show(); return
+        self.copy_to_clipboard(f"{d[0]:.2f},{d[1]:.2f}","\u0394E76,\u0394E2000")
+
     def get_selected_color(self)->QColor:return QColor(self.sel_color)
 
     @Slot(QColor)
@@ -1171,15 +2424,19 @@ class CustomColorPickerDialog(QDialog):
         if c.isValid():
             self.c_dialog_w.setCurrentColor(c)
             if self.clip:self.clip.setText(f"{c.red()},{c.green()},{c.blue()}")
-            found_ext=send_rgb_values_to_external_dialog(c.red(),c.green(),c.blue(),self, False) 
-            if found_ext:InfoPopupWindow(f"Color sent to System Color Dialog.",self,2000).show() 
+            self.external_sender.submit(c.red(),c.green(),c.blue(),False,"palette")
 
     @Slot(int)
     def handle_request_save_color_to_palette_cell(self,cell_idx:int):
         log_message(f"Generic save request for cell {cell_idx} - should be handled by a dedicated handler.")
 
-if __name__=="__main__":
-    EXECUTABLE_NAME = "WindowsScreenColorCopyPaste.exe"
+def main(executable_name: str = "WindowsScreenColorCopyPaste.exe", enabled_profiles=None) -> int:
+    """
+    Runs the application; every enabled dialog profile is served by this one
+    process. enabled_profiles names the profiles searched for when the INI does
+    not set dialogs/enabledProfiles (None: all of them).
+    """
+    EXECUTABLE_NAME = executable_name
     log_message(f"Starting application. Executable name to check: {EXECUTABLE_NAME}")
     
     # kill_lingering_processes_by_name(EXECUTABLE_NAME) # Uncomment if needed
@@ -1199,7 +2456,7 @@ if __name__=="__main__":
 
     start_c=QColor(189,100,165)
     # Pass the loaded icon to the dialog
-    dlg=CustomColorPickerDialog(initial_color=start_c, app_icon=global_app_icon)
+    dlg=CustomColorPickerDialog(initial_color=start_c, app_icon=global_app_icon, enabled_profiles=enabled_profiles)
 
     dlg.show()
     log_message("--- colorPASTE: Starting main application event loop ---")
@@ -1207,5 +2464,9 @@ if __name__=="__main__":
     exit_code = app.exec()
 
     log_message(f"--- colorPASTE: Main application event loop finished with code: {exit_code} ---")
+    return exit_code
+
+if __name__=="__main__":
+    exit_code = main()
     log_message(f"--- colorPASTE: Calling sys.exit({exit_code}) ---")
     sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""Logging helper shared by the application script and its helper modules."""
+
+
+def log_message(message: str):
+    """Logs a message to standard output with the [LOG] prefix."""
+    print(f"[LOG] {message}", flush=True)
@@ -0,0 +1,720 @@
+"""
+Micro-benchmarks for the hot paths of Windows Screen Color Copy Paste.
+
+Run from the src directory:
+    python benchmarks.py                    (all benchmarks)
+    python benchmarks.py magnifier_render   (a single benchmark)
+
+Benchmarks that need widgets create an offscreen QApplication unless
+QT_QPA_PLATFORM is already set, so nothing is shown on screen.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import WindowsScreenColorCopyPaste as app_module
+from PIL import Image
+
+
+def _measure(func, number: int, repeat: int = 5) -> float:
+    """Returns the best time per call in seconds over `repeat` runs of `number` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _allocations_per_call(func, number: int = 200) -> float:
+    """Average count of memory blocks still allocated per call (numpy allocations are traced too)."""
+    func()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(number):
+        func()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    new_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    return new_blocks / number
+
+
+def _report(name: str, seconds: float, extra: str = ""):
+    print(f"  {name:<40} {seconds * 1e6:10.1f} us/call {extra}")
+
+
+def bench_magnifier_render():
+    """PIL resize + ImageDraw versus MagnifierRenderer for one magnifier frame."""
+    capture_size, magnifier_size = 10, 200
+    block = Image.frombytes("RGB", (capture_size, capture_size), os.urandom(capture_size * capture_size * 3))
+    block_bytes = block.tobytes("raw", "BGRX")
+    print(f"magnifier_render ({capture_size}x{capture_size} -> {magnifier_size}x{magnifier_size})")
+
+    def pil_path():
+        big_image = block.resize((magnifier_size, magnifier_size), Image.Resampling.NEAREST)
+        app_module.draw_magnifier_marks(app_module.ImageDraw.Draw(big_image), capture_size, magnifier_size)
+        return big_image
+
+    pil_time = _measure(pil_path, 200)
+    _report("PIL resize + ImageDraw", pil_time)
+
+    if not app_module.MagnifierRenderer.supports(capture_size, magnifier_size):
+        print("  MagnifierRenderer unavailable (numpy missing).")
+        return
+    renderer = app_module.MagnifierRenderer(capture_size, magnifier_size)
+
+    def numpy_path():
+        return renderer.render(app_module.MagnifierRenderer.block_from_bgrx(block_bytes, capture_size))
+
+    rendered = numpy_path()
+    expected = app_module.np.asarray(pil_path().convert("RGB"))
+    got = rendered.view(app_module.np.uint8).reshape(magnifier_size, magnifier_size, 4)[..., 2::-1]
+    identical = bool((expected == got).all())
+
+    numpy_time = _measure(numpy_path, 2000)
+    _report("MagnifierRenderer.render", numpy_time,
+            f"({pil_time / numpy_time:.1f}x faster, pixel-identical={identical}, "
+            f"{_allocations_per_call(lambda: renderer.render(renderer._block))} allocs/frame)")
+
+    pil_chain_time = _measure(lambda: app_module.ImageQt(pil_path()), 200)
+    numpy_chain_time = _measure(lambda: (numpy_path(), renderer.to_qimage()), 2000)
+    _report("PIL path + ImageQt", pil_chain_time)
+    _report("MagnifierRenderer + QImage", numpy_chain_time, f"({pil_chain_time / numpy_chain_time:.1f}x faster)")
+
+
+def _ensure_app():
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+def bench_frame_handoff():
+    """Worker-to-label frame handoff: ImageQt per frame versus the pooled RGB32 buffers."""
+    _ensure_app()
+    from PySide6.QtGui import QPixmap
+    capture_size, magnifier_size = 10, 200
+    block = Image.frombytes("RGB", (capture_size, capture_size), os.urandom(capture_size * capture_size * 3))
+    block_bytes = block.tobytes("raw", "BGRX")
+    print(f"frame_handoff ({magnifier_size}x{magnifier_size}, render + hand over + QPixmap.fromImage)")
+
+    def imageqt_path():
+        big_image = block.resize((magnifier_size, magnifier_size), Image.Resampling.NEAREST)
+        app_module.draw_magnifier_marks(app_module.ImageDraw.Draw(big_image), capture_size, magnifier_size)
+        return QPixmap.fromImage(app_module.ImageQt(big_image))
+
+    imageqt_time = _measure(imageqt_path, 200)
+    _report("PIL + ImageQt + QPixmap", imageqt_time)
+
+    if not app_module.MagnifierRenderer.supports(capture_size, magnifier_size):
+        print("  Frame pool unavailable (numpy missing).")
+        return
+    renderer = app_module.MagnifierRenderer(capture_size, magnifier_size)
+    pool = app_module.FrameBufferPool(magnifier_size, magnifier_size)
+
+    def pooled_path():
+        frame = pool.acquire()
+        renderer.render(app_module.MagnifierRenderer.block_from_bgrx(block_bytes, capture_size), frame.pixels)
+        pixmap = QPixmap.fromImage(frame.qimage)
+        pool.release(frame)
+        return pixmap
+
+    pooled_time = _measure(pooled_path, 2000)
+    _report("pooled RGB32 frame + QPixmap", pooled_time, f"({imageqt_time / pooled_time:.1f}x faster)")
+    print(f"  pool counters: {pool.stats()}")
+
+
+def bench_capture_backends():
+    """Grab latency of every capture backend available on this machine."""
+    _ensure_app()
+    import screen_capture
+    backends = [b for b in (screen_capture.create_capture_backend(name) for name in screen_capture.CAPTURE_BACKEND_CLASSES) if b]
+    for width, height in ((1, 1), (10, 10)):
+        print(f"capture_backends ({width}x{height} region)")
+        for seconds, backend in screen_capture.benchmark_capture_backends(backends, width, height, rounds=25):
+            _report(backend.name, seconds)
+    for backend in backends:
+        backend.close()
+
+
+def bench_freeze_frame():
+    """Hover/magnifier reads served from a frozen desktop snapshot."""
+    _ensure_app()
+    import screen_capture
+    start = time.perf_counter()
+    snapshot = screen_capture.SnapshotCaptureBackend.from_desktop(screen_capture.SyntheticCaptureBackend())
+    snap = snapshot.snapshot
+    print(f"freeze_frame ({snap.width}x{snap.height} snapshot taken in {(time.perf_counter() - start) * 1000:.1f} ms)")
+    _report("1x1 hover pixel", _measure(lambda: snapshot.grab(snap.width // 2, snap.height // 2, 1, 1), 5000))
+    _report("10x10 magnifier block", _measure(lambda: snapshot.grab(snap.width // 2, snap.height // 2, 10, 10), 5000))
+    _report("10x10 block at the desktop edge", _measure(lambda: snapshot.grab(-5, -5, 10, 10), 5000))
+
+
+def bench_hover_coalescing():
+    """Raw mouse-move events at a 1000 Hz polling rate versus hover samples actually taken."""
+    _ensure_app()
+    import screen_capture
+    sampler = app_module.ScreenSampler(screen_capture.SyntheticCaptureBackend())
+    sampler.start()
+    start = time.perf_counter()
+    x = 0
+    while time.perf_counter() - start < 1.0:
+        x += 1
+        sampler.set_target(x % 1000, 500)
+        time.sleep(0.001)
+    sampler.stop()
+    stats = sampler.stats()
+    print("hover_coalescing (1 s of simulated 1000 Hz mouse movement)")
+    print(f"  {'raw move events':<40} {stats['move_events']:10d} ({stats['move_event_rate']:.0f}/s)")
+    print(f"  {'samples taken':<40} {stats['frames_rendered']:10d} ({stats['sample_rate']:.0f}/s, max {stats['max_fps']:.0f} fps)")
+
+
+def bench_dialog_enumeration():
+    """Cost of one full dialog search against the fake window backend, by number of top-level windows."""
+    import dialog_profiles
+    import window_backend
+    profiles = list(dialog_profiles.BUILTIN_PROFILES)
+    print("dialog_enumeration (both built-in profiles, dialog at the bottom of the Z-order)")
+    for window_count in (50, 200, 1000, 5000):
+        backend = window_backend.FakeWindowBackend(window_count)
+        backend.add_dialog(profiles[0])
+        seconds = _measure(lambda: app_module._find_color_dialogs(backend, profiles), 5, repeat=3)
+        backend.reset_counters()
+        app_module._find_color_dialogs(backend, profiles)
+        _report(f"{window_count} windows", seconds, f"({sum(backend.calls.values())} window calls)")
+    backend = window_backend.FakeWindowBackend(1000, call_latency=2e-6)
+    backend.add_dialog(profiles[0])
+    _report("1000 windows, 2 us per window call", _measure(lambda: app_module._find_color_dialogs(backend, profiles), 5, repeat=3))
+
+
+def bench_dialog_send():
+    """End-to-end write_rgb_to_external_dialog latency for click and hover sends (fake backend, 500 windows)."""
+    import dialog_profiles
+    import window_backend
+    print("dialog_send (includes the settle sleeps between window messages)")
+    for profile in dialog_profiles.BUILTIN_PROFILES:
+        backend = window_backend.FakeWindowBackend(500, call_latency=2e-6)
+        backend.add_dialog(profile)
+        locator = app_module.ColorDialogLocator([profile], backend)
+        colors = iter(range(1 << 30))
+
+        def click():
+            value = next(colors) % 256
+            return app_module.write_rgb_to_external_dialog(locator, value, 0, 0, False)
+
+        def hover_changed():
+            value = next(colors) % 256
+            return app_module.write_rgb_to_external_dialog(locator, value, value, value, True)
+
+        def uncached_click():
+            locator.invalidate()
+            return click()
+
+        _report(f"{profile.name}: click, uncached lookup", _measure(uncached_click, 3, repeat=2))
+        _report(f"{profile.name}: click, cached lookup", _measure(click, 3, repeat=2))
+        _report(f"{profile.name}: hover, 3 channels changed", _measure(hover_changed, 3, repeat=2))
+        app_module.write_rgb_to_external_dialog(locator, 7, 7, 7, True)
+        backend.reset_counters()
+        _report(f"{profile.name}: hover, unchanged color", _measure(lambda: app_module.write_rgb_to_external_dialog(locator, 7, 7, 7, True), 200),
+                f"({backend.messages} window messages)")
+        print(f"  {profile.name} locator counters: {locator.stats()}")
+
+
+def bench_dialog_broadcast():
+    """Click send to 3 open dialogs: one enumeration, written one after another versus concurrently."""
+    from concurrent.futures import ThreadPoolExecutor
+    import dialog_profiles
+    import window_backend
+    profiles = list(dialog_profiles.BUILTIN_PROFILES)
+    backend = window_backend.FakeWindowBackend(500, call_latency=2e-6)
+    for profile in (profiles[0], profiles[1], profiles[0]):
+        backend.add_dialog(profile)
+    locator = app_module.ColorDialogLocator(profiles, backend)
+    print("dialog_broadcast (3 dialogs, 500 windows)")
+    sequential = _measure(lambda: app_module.write_rgb_to_external_dialog(locator, 1, 2, 3, False, broadcast=True), 2, repeat=2)
+    _report("sequential", sequential)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        result = app_module.write_rgb_to_external_dialog(locator, 1, 2, 3, False, broadcast=True, executor=executor)
+        concurrent = _measure(lambda: app_module.write_rgb_to_external_dialog(locator, 1, 2, 3, False, broadcast=True, executor=executor), 2, repeat=2)
+    _report("concurrent", concurrent, f"({sequential / concurrent:.1f}x faster)")
+    print("  " + result.message.replace("\n", "\n  "))
+
+
+def _legacy_label_palette_class():
+    """
+    The pre-painted palette grid (64 QLabels styled via setStyleSheet), kept
+    only for comparison. It has just enough of the current widget's interface
+    (model, set_model, the change signals) for the dialog to build with it.
+    """
+    import palette_model
+    from PySide6.QtCore import Signal
+    from PySide6.QtGui import QColor
+    from PySide6.QtWidgets import QFrame, QGridLayout, QLabel, QWidget
+
+    class LegacyLabelPaletteWidget(QWidget):
+        paletteColorClicked = Signal(QColor)
+        requestSaveColorToCell = Signal(int)
+        cellSelectedSignal = Signal(int, QWidget)
+        cellColorChanged = Signal(int)
+        paletteReset = Signal()
+        NUM_ROWS = NUM_COLS = 8
+        TOTAL_CELLS = 64
+
+        def __init__(self, populate_defaults=True, parent=None):
+            super().__init__(parent)
+            self.empty_color = QColor("#F0F0F0")
+            self.palette_colors = [QColor(self.empty_color) for _ in range(self.TOTAL_CELLS)]
+            self.selected_cell_index = -1
+            self._populate_defaults = populate_defaults
+            self.model = palette_model.PaletteModel(self.TOTAL_CELLS)
+            self.color_cells_labels = []
+            layout = QGridLayout(self)
+            layout.setSpacing(1); layout.setContentsMargins(1, 1, 1, 1)
+            for i in range(self.TOTAL_CELLS):
+                lbl = QLabel(); lbl.setFixedSize(22, 22); lbl.setFrameShape(QFrame.Shape.Box); lbl.setLineWidth(1)
+                lbl.setProperty("cell_index", i); layout.addWidget(lbl, i // 8, i % 8); self.color_cells_labels.append(lbl)
+            self.update_cells_appearance()
+
+        def update_cells_appearance(self):
+            for i in range(self.TOTAL_CELLS): self.update_cell_appearance(i)
+
+        def update_cell_appearance(self, idx):
+            color_obj = self.palette_colors[idx]
+            style = f"background-color: {color_obj.name()}; border: 1px solid #555555;"
+            if not self._populate_defaults and idx == self.selected_cell_index:
+                style = f"background-color: {color_obj.name()}; border: 2px solid #0078D7;"
+            self.color_cells_labels[idx].setStyleSheet(style)
+            self.color_cells_labels[idx].setToolTip(f"{color_obj.name(QColor.NameFormat.HexArgb)}\nRGB: {color_obj.red()},{color_obj.green()},{color_obj.blue()}")
+
+        def set_model(self, model):
+            self.model = model
+            self.palette_colors = [model.color(i, QColor(self.empty_color)) for i in range(self.TOTAL_CELLS)]
+            self.update_cells_appearance()
+
+        def populate_default_colors(self):
+            hues = [0, 30, 60, 120, 180, 240, 300, -1]; vals = [255, 225, 200, 175, 150, 125, 100, 70]
+            for i in range(self.TOTAL_CELLS):
+                self.model.set_color(i, QColor.fromHsv(hues[i % 8], 0 if hues[i % 8] < 0 else 255, vals[i // 8]))
+            self.set_model(self.model)
+
+        def set_highlighted_cell(self, index):
+            pass
+
+        def load_colors_from_settings(self, settings, key):
+            saved_list = settings.value(key, [])
+            if isinstance(saved_list, str): saved_list = [saved_list]
+            self.palette_colors = [QColor(self.empty_color) for _ in range(self.TOTAL_CELLS)]
+            for i in range(min(len(saved_list), self.TOTAL_CELLS)):
+                color = QColor(saved_list[i])
+                if color.isValid(): self.palette_colors[i] = color
+            self.update_cells_appearance()
+
+    return LegacyLabelPaletteWidget
+
+
+def _temporary_settings_dir():
+    """Points the user-scope INI at a temporary directory so benchmarks never touch the real settings."""
+    import tempfile
+    from PySide6.QtCore import QSettings
+    tmp_dir = tempfile.mkdtemp(prefix="colorpaste-bench-")
+    QSettings.setPath(QSettings.Format.IniFormat, QSettings.Scope.UserScope, tmp_dir)
+    return tmp_dir
+
+
+def bench_palette_widget():
+    """Palette reload and dialog construction: 64 stylesheet QLabels versus the painted grid."""
+    _ensure_app()
+    import random
+    from PySide6.QtCore import QSettings
+    tmp_dir = _temporary_settings_dir()
+    settings = QSettings(os.path.join(tmp_dir, "palette.ini"), QSettings.Format.IniFormat)
+    settings.setValue("palette", [f"#ff{random.randrange(1 << 24):06x}" for _ in range(64)])
+    import screen_capture
+    # Pin the capture backend so dialog construction does not include the backend benchmark.
+    dialog_settings = QSettings(QSettings.Format.IniFormat, QSettings.Scope.UserScope, "ColorPasteOrg", "WindowsScreenColorCopyPaste")
+    dialog_settings.setValue(screen_capture.CAPTURE_BACKEND_KEY, "qt"); dialog_settings.sync()
+    legacy_class, painted_class = _legacy_label_palette_class(), app_module.CustomColorPaletteWidget
+    legacy, painted = legacy_class(False), painted_class(False)
+    print("palette_widget (one 8x8 palette)")
+    # Few rounds for the QLabel grid: it costs 64 setStyleSheet calls per reload.
+    legacy_reload = _measure(lambda: legacy.load_colors_from_settings(settings, "palette"), 2, repeat=2)
+    painted_reload = _measure(lambda: painted.load_colors_from_settings(settings, "palette"), 50)
+    _report("reload, QLabel grid", legacy_reload)
+    _report("reload, painted grid", painted_reload, f"({legacy_reload / painted_reload:.1f}x faster)")
+    legacy_new = _measure(lambda: legacy_class(True).deleteLater(), 2, repeat=1)
+    painted_new = _measure(lambda: painted_class(True).deleteLater(), 20)
+    _report("construction, QLabel grid", legacy_new)
+    _report("construction, painted grid", painted_new, f"({legacy_new / painted_new:.1f}x faster)")
+
+    def build_dialog():
+        dialog = app_module.CustomColorPickerDialog()
+        dialog.external_sender.stop()
+        dialog.deleteLater()
+
+    print("palette_widget (whole CustomColorPickerDialog, both palettes)")
+    app_module.CustomColorPaletteWidget = legacy_class
+    try:
+        legacy_dialog = _measure(build_dialog, 1, repeat=2)
+    finally:
+        app_module.CustomColorPaletteWidget = painted_class
+    painted_dialog = _measure(build_dialog, 3, repeat=3)
+    _report("dialog construction, QLabel grids", legacy_dialog)
+    _report("dialog construction, painted grids", painted_dialog, f"({legacy_dialog / painted_dialog:.1f}x faster)")
+
+
+def bench_large_palette():
+    """Loading and showing a 10,000-color palette through PaletteModel and the virtualized grid."""
+    _ensure_app()
+    import random
+    import palette_model
+    from PySide6.QtCore import QSettings
+    count = 10000
+    strings = [f"#ff{random.randrange(1 << 24):06x}" for _ in range(count)]
+    settings = QSettings(os.path.join(_temporary_settings_dir(), "palette.ini"), QSettings.Format.IniFormat)
+    settings.setValue("brand", strings); settings.sync()
+    print(f"large_palette ({count} colors)")
+    model = palette_model.PaletteModel()
+    _report("PaletteModel.load_strings", _measure(lambda: model.load_strings(strings), 10),
+            f"({_allocations_per_call(lambda: model.load_strings(strings), 20):.0f} live allocations per load)")
+    widget = app_module.CustomColorPaletteWidget(False)
+    _report("load_colors_from_settings (INI read)", _measure(lambda: widget.load_colors_from_settings(settings, "brand"), 10))
+    _report("first paint of the visible rows", _measure(lambda: widget.grab(), 10))
+
+    def load_and_show():
+        fresh = app_module.CustomColorPaletteWidget(False)
+        fresh.load_colors_from_settings(settings, "brand")
+        fresh.grab()
+        fresh.deleteLater()
+
+    _report("new widget + load + paint", _measure(load_and_show, 5))
+
+
+def bench_nearest_color():
+    """Nearest saved color for one hover sample: grid-bucketed ColorIndex versus a full numpy scan."""
+    import random
+    import numpy as np
+    from color_index import ColorIndex
+    from color_spaces import argb_array_to_oklab, argb_to_oklab
+    rng = random.Random(17)
+    queries = [0xFF000000 | rng.randrange(1 << 24) for _ in range(500)]
+    for count in (1000, 10000, 100000):
+        colors = [0xFF000000 | rng.randrange(1 << 24) for _ in range(count)]
+        index = ColorIndex()
+        start = time.perf_counter(); index.set_source("bench", colors); build = time.perf_counter() - start
+        lab = argb_array_to_oklab(colors)
+        print(f"nearest_color ({count} colors, built in {build * 1e3:.1f} ms)")
+
+        def full_scan(q):
+            diff = lab - argb_to_oklab(q)
+            return int(np.argmin(np.einsum('ij,ij->i', diff, diff)))
+
+        it = iter(queries * 1000)
+        _report("full scan, k=1", _measure(lambda: full_scan(next(it)), 200))
+        it = iter(queries * 1000)
+        _report("ColorIndex.nearest, k=1", _measure(lambda: index.nearest(next(it)), 200))
+        it = iter(queries * 1000)
+        _report("ColorIndex.nearest, k=5", _measure(lambda: index.nearest(next(it), 5), 200))
+        it = iter(queries * 1000)
+        _report("ColorIndex.nearest, k=1, dE <= 5", _measure(lambda: index.nearest(next(it), 1, 5.0), 200))
+        worst = 0.0
+        for q in queries:
+            start = time.perf_counter(); index.nearest(q, 5); worst = max(worst, time.perf_counter() - start)
+        _report("worst k=5 query", worst)
+        slots = iter(range(10 ** 9))
+        _report("ColorIndex.set (one palette cell edited)", _measure(lambda: index.set("bench", next(slots) % count, rng.randrange(1 << 32)), 1000))
+
+
+def bench_settings_persistence():
+    """GUI-thread cost of saving an edited palette: setValue + sync per save versus the write-behind SettingsWriter."""
+    _ensure_app()
+    import random
+    from PySide6.QtCore import QSettings
+    from PySide6.QtGui import QColor
+    from settings_writer import SettingsWriter
+    path = os.path.join(_temporary_settings_dir(), "persistence.ini")
+    settings = QSettings(path, QSettings.Format.IniFormat)
+    palettes = [app_module.CustomColorPaletteWidget(False) for _ in range(2)]
+    keys = [app_module.DEFAULT_SHADES_PALETTE_KEY, app_module.USER_CUSTOM_PALETTE_KEY]
+    rng = random.Random(18)
+    print("settings_persistence (2 palettes of 64 colors)")
+
+    def edit():
+        palettes[1].set_color_at_index(rng.randrange(64), QColor.fromRgb(rng.randrange(1 << 24)))
+
+    def sync_every_save():
+        edit()
+        for pal, key in zip(palettes, keys):
+            settings.setValue(key, pal.model.to_strings()); settings.sync()
+        settings.sync()
+
+    # Values must differ from the last sync or QSettings skips the write entirely.
+    _report("setValue + sync on the GUI thread", _measure(sync_every_save, 20))
+    writer = SettingsWriter(settings, debounce_ms=60000)
+    for pal, key in zip(palettes, keys):
+        writer.register(key, lambda pal=pal: pal.model.to_strings())
+
+    def write_behind():
+        edit(); writer.mark_dirty(keys[1]); writer.commit()
+
+    _report("SettingsWriter mark_dirty + commit", _measure(write_behind, 20))
+    writer.flush()
+    _report("  worker write, off the GUI thread", writer.last_write_ms / 1e3, f"{writer.stats()}")
+    writer.stop()
+
+
+def bench_palette_store():
+    """Startup with a library of 200 palettes x 256 colors: INI string lists versus the SQLite palette store."""
+    _ensure_app()
+    import random
+    import palette_model
+    import palette_store
+    from PySide6.QtCore import QSettings
+    count, size = 200, 256
+    rng = random.Random(19)
+    directory = _temporary_settings_dir()
+    settings = QSettings(os.path.join(directory, "library.ini"), QSettings.Format.IniFormat)
+    store = palette_store.PaletteStore(os.path.join(directory, "library.sqlite3"))
+    for i in range(count):
+        model = palette_model.PaletteModel(size)
+        for slot in range(size): model.set_argb(slot, 0xFF000000 | rng.randrange(1 << 24))
+        settings.setValue(f"palettes/p{i}", model.to_strings())
+        store.save(f"p{i}", model)
+    settings.sync(); store.close()
+    print(f"palette_store ({count} palettes x {size} colors)")
+
+    def ini_startup():
+        ini = QSettings(os.path.join(directory, "library.ini"), QSettings.Format.IniFormat)
+        for i in range(count):
+            palette_model.PaletteModel().load_strings(ini.value(f"palettes/p{i}", []))
+
+    def store_startup():
+        library = palette_store.PaletteStore(os.path.join(directory, "library.sqlite3"))
+        library.palettes(); library.load("p0"); library.load("p1")
+        library.close()
+
+    _report("INI: read and parse every palette", _measure(ini_startup, 3))
+    _report("store: open, list, load the 2 shown", _measure(store_startup, 20))
+    library = palette_store.PaletteStore(os.path.join(directory, "library.sqlite3"))
+    names = iter([f"p{i % count}" for i in range(10 ** 5)])
+    _report("store: lazy load of one palette", _measure(lambda: library.read_colors(next(names)), 200))
+    model = library.load("p0")
+    _report("store: save one edited palette", _measure(lambda: library.save("p0", model), 50))
+    library.close()
+
+
+def _qcolor_reference(values: list) -> tuple:
+    """HSV, Windows HSL, CMYK and decimal of each packed color via QColor, as the dialog formats them."""
+    from PySide6.QtGui import QColor
+    from color_conversion import QCOLOR_HUE_MAX, QCOLOR_SAT_LUM_VAL_MAX, WIN_HUE_MAX, WIN_SAT_LUM_MAX
+    hsv, hsl_win, cmyk, decimal = [], [], [], []
+    for v in values:
+        c = QColor.fromRgba(v)
+        h, s, val, _ = c.getHsv(); l = c.lightness()
+        hsv.append([h, s, val])
+        wh = (h / QCOLOR_HUE_MAX) * WIN_HUE_MAX if h != -1 else 0.0
+        hsl_win.append([int(round(wh)), int(round((s / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX)),
+                        int(round((l / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX))])
+        cmyk.append(list(c.getCmyk()[:4])); decimal.append(c.rgba())
+    return hsv, hsl_win, cmyk, decimal
+
+
+def bench_color_conversion():
+    """Every representation of many colors: a QColor loop versus the vectorized color_conversion module."""
+    _ensure_app()
+    import numpy as np
+    import color_conversion
+    rng = np.random.default_rng(20)
+    print("color_conversion")
+    for count in (1000, 1000000):
+        values = rng.integers(0, 1 << 32, count, dtype=np.uint32)
+        rgba = color_conversion.rgba_components(values).astype(np.uint8)
+        if count <= 1000:
+            listed = values.tolist()
+            _report(f"QColor loop, {count} colors", _measure(lambda: _qcolor_reference(listed), 5))
+        seconds = _measure(lambda: color_conversion.convert_all(values), 3, 3)
+        _report(f"convert_all, {count} packed colors", seconds, f"({count / seconds / 1e6:.1f} M colors/s)")
+        _report(f"convert_all, {count} RGBA rows", _measure(lambda: color_conversion.convert_all(rgba), 3, 3))
+    _report("color_formats, one color (dialog strings)", _measure(lambda: color_conversion.color_formats(0xFF336699), 1000))
+
+
+def bench_color_conversion_conformance():
+    """Checks color_conversion against QColor for all 16.7M colors of the 24-bit RGB cube (takes a minute or two)."""
+    _ensure_app()
+    import numpy as np
+    import color_conversion
+    chunk = 1 << 18
+    rng = np.random.default_rng(21)
+    mismatches, start = 0, time.perf_counter()
+    for first in range(0, 1 << 24, chunk):
+        # A random alpha per color also checks that alpha never leaks into the other channels.
+        values = np.arange(first, first + chunk, dtype=np.uint32) | (rng.integers(0, 256, chunk, dtype=np.uint32) << 24)
+        got = color_conversion.convert_all(values)
+        for key, expected in zip(('hsv', 'hsl_win', 'cmyk', 'decimal'), _qcolor_reference(values.tolist())):
+            bad = np.nonzero(np.any((got[key] != np.array(expected)).reshape(chunk, -1), axis=1))[0]
+            mismatches += len(bad)
+            for i in bad[:3].tolist():
+                print(f"  mismatch {key} #{int(values[i]):08x}: {got[key][i].tolist()} != {expected[i]}")
+        # The scalar path behind color_formats() and FORMAT_CACHE, on every 64th color.
+        for i in range(0, chunk, 64):
+            h, s, v = got['hsv'][i].tolist(); f = color_conversion.color_formats(int(values[i]))
+            if (f['hsv_copy'], f['hsl_copy'], f['cmyk_copy']) != (f"{h if h != -1 else 0},{s},{v}", ",".join(map(str, got['hsl_win'][i].tolist())),
+                                                                 ",".join(map(str, got['cmyk'][i].tolist()))):
+                mismatches += 1; print(f"  mismatch color_formats #{int(values[i]):08x}: {f}")
+    print(f"color_conversion_conformance: {1 << 24} colors, {mismatches} mismatches ({time.perf_counter() - start:.0f} s)")
+
+
+def bench_format_cache():
+    """Value-panel strings while dragging across the color dialog spectrum: eight QColor formatters per update versus FORMAT_CACHE."""
+    _ensure_app()
+    from PySide6.QtGui import QColor
+    from color_conversion import QCOLOR_HUE_MAX, QCOLOR_SAT_LUM_VAL_MAX, WIN_HUE_MAX, WIN_SAT_LUM_MAX, FormatCache
+    # A drag sweeps back and forth over the same strip of the spectrum, so colors repeat.
+    path = [QColor.fromHsv(h, 200, 220).rgba() for h in list(range(0, 120)) + list(range(120, 0, -1))] * 10
+
+    def qcolor_formats(c):
+        h, s, v, _ = c.getHsv(); l = c.lightness(); cy, m, y, k, _ = c.getCmyk()
+        wh = (h / QCOLOR_HUE_MAX) * WIN_HUE_MAX if h != -1 else 0.0
+        ws = (s / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX; wl = (l / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX
+        return (f"{c.red()},{c.green()},{c.blue()}", f"{c.red()},{c.green()},{c.blue()},{c.alpha()}", c.name(QColor.NameFormat.HexRgb),
+                c.name(QColor.NameFormat.HexArgb), f"H:{int(round(wh))} S:{int(round(ws))} L:{int(round(wl))}",
+                f"H:{h} S:{s} V:{v}", f"C:{cy} M:{m} Y:{y} K:{k}", str(c.rgba()))
+
+    print(f"format_cache ({len(path)} drag updates, {len(set(path))} distinct colors)")
+    _report("QColor formatters, per update", _measure(lambda: [qcolor_formats(QColor.fromRgba(v)) for v in path], 3) / len(path))
+    cache = FormatCache()
+    _report("FormatCache.get, per update", _measure(lambda: [cache.get(v) for v in path], 3) / len(path), f"{cache.stats()}")
+    _report("  record build on a miss", _measure(lambda: [FormatCache().get(v) for v in path[:120]], 3) / 120)
+
+
+def bench_color_dialog_drag():
+    """A 1000 Hz drag in the embedded QColorDialog: a values-panel refresh per event versus one per screen frame."""
+    _ensure_app()
+    from PySide6.QtCore import QSettings
+    from PySide6.QtGui import QColor
+    from PySide6.QtWidgets import QApplication
+    import screen_capture
+    _temporary_settings_dir()
+    dialog_settings = QSettings(QSettings.Format.IniFormat, QSettings.Scope.UserScope, "ColorPasteOrg", "WindowsScreenColorCopyPaste")
+    dialog_settings.setValue(screen_capture.CAPTURE_BACKEND_KEY, "qt"); dialog_settings.sync()
+    dialog = app_module.CustomColorPickerDialog()
+    dialog.external_sender.stop()
+    # Few events: every label update is a Qt call and the legacy path makes eight per event.
+    colors = [QColor.fromHsv(h, 200, 220) for h in range(200)]
+
+    def legacy_changed(c):
+        if dialog.sel_color != c and c.isValid():
+            dialog.sel_color = QColor(c); dialog.update_all_displays()
+
+    def drag(handler) -> float:
+        """GUI-thread time spent per event: the handler plus whatever the event loop runs for it."""
+        busy = 0.0
+        for c in colors:
+            start = time.perf_counter()
+            handler(c); QApplication.processEvents()
+            busy += time.perf_counter() - start
+            time.sleep(0.001)
+        return busy / len(colors)
+
+    print(f"color_dialog_drag ({len(colors)} currentColorChanged events at ~1000 Hz)")
+    _report("refresh per event (before)", drag(legacy_changed), f"({len(colors)} refreshes)")
+    dialog.sel_color = QColor(0, 0, 0)
+    seconds = drag(dialog.on_color_dialog_widget_changed)
+    dialog._display_refresh.flush()
+    _report("coalesced to the screen frame", seconds, f"{dialog._display_refresh.stats()}")
+    print(f"  {'external sends':<40} {dialog._send_throttle.stats()}")
+    dialog.deleteLater()
+
+
+def bench_format_templates():
+    """Live template preview per hover sample: str.format_map on a field dict versus the compiled FormatTemplate."""
+    import random
+    import format_templates
+    rng = random.Random(24)
+    samples = [0xFF000000 | rng.randrange(1 << 24) for _ in range(1000)]
+    print("format_templates (one template formatted per hover sample)")
+    for name in ("GLSL vec3", "CSS oklch()"):
+        template = format_templates.FormatTemplate(name, dict(format_templates.BUILTIN_TEMPLATES)[name])
+
+        def format_map(argb, pattern=template.pattern):
+            a, r, g, b = argb >> 24, (argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF
+            fields = {'r': r, 'g': g, 'b': b, 'a': a, 'rf': r / 255.0, 'gf': g / 255.0, 'bf': b / 255.0, 'af': a / 255.0, 'argb': argb}
+            if template._needs_record: fields.update(format_templates._record_fields(format_templates.FORMAT_CACHE.get(argb)))
+            return pattern.format_map(fields)
+
+        it = iter(samples * 1000)
+        _report(f"{name}: str.format_map", _measure(lambda: format_map(next(it)), 2000))
+        it = iter(samples * 1000)
+        _report(f"{name}: compiled template", _measure(lambda: template.format(next(it)), 2000))
+
+
+def bench_color_history():
+    """Pick history of 300k records: list-of-tuples scans versus the numpy ring and its memory-mapped file."""
+    import math
+    import random
+    import color_history
+    from color_spaces import argb_to_oklab
+    count = 300000
+    rng = random.Random(25)
+    now = time.time()
+    picks = [(now - (count - i) * 30.0, 0xFF000000 | rng.randrange(1 << 24), rng.randrange(-1920, 3840), rng.randrange(2160),
+              color_history.SOURCE_SCREEN) for i in range(count)]
+    path = os.path.join(_temporary_settings_dir(), color_history.HISTORY_FILE_NAME)
+    history = color_history.ColorHistory(count, path)
+    start = time.perf_counter()
+    for pick in picks: history.add(pick[1], pick[2], pick[3], pick[4], pick[0])
+    print(f"color_history ({count} picks, one every 30 s; appended in {(time.perf_counter() - start) * 1e3:.0f} ms)")
+    history.close()
+    start = time.perf_counter(); history = color_history.ColorHistory(count, path)
+    _report("open: map the file, fill the ring", time.perf_counter() - start, f"({os.path.getsize(path) / 2 ** 20:.1f} MB)")
+    labs = [argb_to_oklab(pick[1]) for pick in picks]
+    query = argb_to_oklab(0xFF336699)
+    day = (now - 86400, None)
+    _report("list: picks of the last day", _measure(lambda: [p for p in picks if p[0] >= day[0]], 5))
+    _report("ColorHistory.recent(200, last day)", _measure(lambda: history.recent(200, *day), 200))
+    _report("ColorHistory.count(last day)", _measure(lambda: history.count(*day), 200))
+    _report("list: nearest pick", _measure(lambda: min(range(count), key=lambda i: math.dist(labs[i], query)), 2, 3))
+    _report("ColorHistory.nearest, k=1", _measure(lambda: history.nearest(0xFF336699), 50))
+    _report("ColorHistory.nearest, k=200", _measure(lambda: history.nearest(0xFF336699, 200), 50))
+    _report("ColorHistory.nearest, k=200, last day", _measure(lambda: history.nearest(0xFF336699, 200, None, *day), 200))
+    _report("ColorHistory.add (ring + file append)", _measure(lambda: history.add(0xFF336699, 1, 2, color_history.SOURCE_SCREEN), 2000))
+    history.close()
+
+
+BENCHMARKS = {
+    "magnifier_render": bench_magnifier_render,
+    "frame_handoff": bench_frame_handoff,
+    "capture_backends": bench_capture_backends,
+    "freeze_frame": bench_freeze_frame,
+    "hover_coalescing": bench_hover_coalescing,
+    "dialog_enumeration": bench_dialog_enumeration,
+    "dialog_send": bench_dialog_send,
+    "dialog_broadcast": bench_dialog_broadcast,
+    "palette_widget": bench_palette_widget,
+    "large_palette": bench_large_palette,
+    "nearest_color": bench_nearest_color,
+    "settings_persistence": bench_settings_persistence,
+    "palette_store": bench_palette_store,
+    "color_conversion": bench_color_conversion,
+    "color_conversion_conformance": bench_color_conversion_conformance,
+    "format_cache": bench_format_cache,
+    "color_dialog_drag": bench_color_dialog_drag,
+    "format_templates": bench_format_templates,
+    "color_history": bench_color_history,
+}
+
+
+def main(argv):
+    names = argv[1:] or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+        return 2
+    for name in names:
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
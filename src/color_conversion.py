@@ -0,0 +1,266 @@
+"""
+Batch color conversion without QColor.
+
+Every function takes packed 0xAARRGGBB values (QRgb, as QColor.rgba()
+returns them) as an int, a sequence or a numpy array; an (N, 4) uint8 array
+is read as RGBA rows instead. Results are numpy arrays with one row per
+input color, so millions of colors convert in one call.
+
+The numbers are bit-exact with QColor over the whole 24-bit RGB cube
+(benchmarks.py color_conversion_conformance checks it): channels are widened
+to 16 bits like QColor stores them, the math is done in float32 in the same
+order as QColor::toHsv/toHsl/toCmyk (HSV saturation in double, as QColor
+does it), and results are rounded with the same qRound() and narrowed back to
+8 bits the way each QColor getter does.
+The Windows-normalized HSL keeps the dialog's definition: QColor hue scaled
+to 0-239, QColor (HSV) saturation and HSL lightness scaled to 0-240.
+
+color_formats() builds every display and clipboard string of one color,
+including CIELAB, LCh, OKLab and OKLCh (color_spaces.py), with a pure-Python
+copy of the same float32 arithmetic (a float32 operation done
+in double and rounded back to float32 gives the float32 result), so it needs
+neither numpy nor QColor. FORMAT_CACHE keeps those records for the colors
+seen last; a drag across the color dialog's spectrum keeps revisiting them.
+"""
+import struct
+from collections import OrderedDict
+
+from color_spaces import argb_to_lab, argb_to_oklab, to_polar
+
+np = None
+try:
+    import numpy as np
+except ImportError:
+    pass
+
+WIN_HUE_MAX = 239.0
+WIN_SAT_LUM_MAX = 240.0
+QCOLOR_HUE_MAX = 359.0
+QCOLOR_SAT_LUM_VAL_MAX = 255.0
+
+# Chroma below which an 8-bit sRGB color is a gray (CIELAB, OKLab); its hue is reported as 0.
+LAB_GRAY_CHROMA = 1e-3
+OKLAB_GRAY_CHROMA = 1e-5
+
+_F32_USHRT_MAX = None if np is None else np.float32(65535.0)
+
+
+def as_argb(colors):
+    """uint32 array of packed ARGB values from ints or an (N, 4) uint8 RGBA array."""
+    arr = np.asarray(colors)
+    if arr.ndim == 2 and arr.shape[1] == 4:
+        rgba = arr.astype(np.uint32)
+        return (rgba[:, 3] << 24) | (rgba[:, 0] << 16) | (rgba[:, 1] << 8) | rgba[:, 2]
+    return np.atleast_1d(arr.astype(np.uint32))
+
+
+def rgba_components(colors):
+    """(N, 4) int32 array of red, green, blue, alpha (0-255)."""
+    argb = as_argb(colors)
+    return np.stack(((argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF, argb >> 24), axis=-1).astype(np.int32)
+
+
+def _q_round(x):
+    """qRound() for non-negative float32 values: int(x + 0.5f)."""
+    return (x + np.float32(0.5)).astype(np.int32)
+
+
+def _div_257(x):
+    """qt_div_257(): a 16-bit QColor channel back to 8 bits, as getHsv() (value) and lightness() do."""
+    return (x - (x >> 8) + 0x80) >> 8
+
+
+def _round_div_257(x):
+    """qRound(x / 257.0): how getCmyk() and getHsv() (saturation) narrow (differs from qt_div_257 near .5)."""
+    return (2 * x + 257) // 514
+
+
+def _unit_channels(argb):
+    """Red, green and blue as float32 0-1, the way QColor's conversions read its 16-bit channels."""
+    return tuple((((argb >> shift) & 0xFF) * 0x101).astype(np.float32) / _F32_USHRT_MAX for shift in (16, 8, 0))
+
+
+def hsv(colors):
+    """(N, 3) int32 array of QColor.getHsv() hue (-1 for grays), saturation and value."""
+    argb = as_argb(colors)
+    r, g, b = _unit_channels(argb)
+    cmax = np.maximum(np.maximum(r, g), b)
+    cmin = np.minimum(np.minimum(r, g), b)
+    delta = cmax - cmin
+    chromatic = delta != 0
+    safe_delta = np.where(chromatic, delta, np.float32(1.0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hue = np.where(r == cmax, (g - b) / safe_delta,
+              np.where(g == cmax, np.float32(2.0) + (b - r) / safe_delta, np.float32(4.0) + (r - g) / safe_delta))
+    hue = hue * np.float32(60.0)
+    hue = np.where(hue < 0, hue + np.float32(360.0), hue)
+    hue100 = _q_round(hue * np.float32(100.0))
+    out = np.empty((len(argb), 3), dtype=np.int32)
+    out[:, 0] = np.where(chromatic, hue100 // 100, -1)
+    # Saturation is the one value QColor works out in double from the integer channels.
+    channels = rgba_components(argb)[:, :3]
+    cmax8 = channels.max(axis=1); cmin8 = channels.min(axis=1)
+    sat16 = ((cmax8 - cmin8) / np.where(chromatic, cmax8, 1) * 65535.0 + 0.5).astype(np.int32)
+    out[:, 1] = np.where(chromatic, _round_div_257(sat16), 0)
+    out[:, 2] = _div_257(_q_round(cmax * _F32_USHRT_MAX))
+    return out
+
+
+def lightness(colors):
+    """(N,) int32 array of QColor.lightness() (HSL lightness, 0-255)."""
+    r, g, b = _unit_channels(as_argb(colors))
+    cmax = np.maximum(np.maximum(r, g), b)
+    cmin = np.minimum(np.minimum(r, g), b)
+    return _div_257(_q_round(np.float32(0.5) * (cmax + cmin) * _F32_USHRT_MAX))
+
+
+def cmyk(colors):
+    """(N, 4) int32 array of QColor.getCmyk() cyan, magenta, yellow and black."""
+    argb = as_argb(colors)
+    r, g, b = _unit_channels(argb)
+    one = np.float32(1.0)
+    c, m, y = one - r, one - g, one - b
+    k = np.minimum(c, np.minimum(m, y))
+    black = (argb & 0xFFFFFF) == 0
+    scale = np.where(black, one, one - k)
+    out = np.empty((len(argb), 4), dtype=np.int32)
+    for i, channel in enumerate((c, m, y)):
+        out[:, i] = np.where(black, 0, _round_div_257(_q_round(((channel - k) / scale) * _F32_USHRT_MAX)))
+    out[:, 3] = np.where(black, 255, _round_div_257(_q_round(k * _F32_USHRT_MAX)))
+    return out
+
+
+def windows_hsl(colors, hsv_values=None, lightness_values=None):
+    """(N, 3) int32 array of the Windows-normalized H (0-239), S and L (0-240) shown by the dialog."""
+    hsv_values = hsv(colors) if hsv_values is None else hsv_values
+    lightness_values = lightness(colors) if lightness_values is None else lightness_values
+    h = hsv_values[:, 0].astype(np.float64)
+    # np.round rounds half to even, like Python's round() in the dialog's original formatter.
+    out = np.empty((len(h), 3), dtype=np.int32)
+    out[:, 0] = np.round(np.where(h != -1, (h / QCOLOR_HUE_MAX) * WIN_HUE_MAX, 0.0))
+    out[:, 1] = np.round((hsv_values[:, 1] / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX)
+    out[:, 2] = np.round((lightness_values / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX)
+    return out
+
+
+def convert_all(colors) -> dict:
+    """Every representation at once: rgba, hsv, hsl_win, cmyk and decimal (QColor.rgba()) arrays."""
+    argb = as_argb(colors)
+    hsv_values = hsv(argb)
+    return {'rgba': rgba_components(argb), 'hsv': hsv_values, 'hsl_win': windows_hsl(argb, hsv_values, lightness(argb)),
+            'cmyk': cmyk(argb), 'decimal': argb.astype(np.int64)}
+
+
+_F32 = struct.Struct('f')
+
+
+def _f32(x: float) -> float:
+    """x rounded to the nearest float32."""
+    return _F32.unpack(_F32.pack(x))[0]
+
+
+# float32 0-1 value of every 8-bit channel, as _unit_channels() computes it.
+_UNIT_F32 = tuple(_f32(i * 0x101 / 65535.0) for i in range(256))
+
+
+def _hsv_lightness_cmyk(r8: int, g8: int, b8: int) -> tuple:
+    """Scalar hsv(), lightness() and cmyk() of one color, step for step like the array versions."""
+    r, g, b = _UNIT_F32[r8], _UNIT_F32[g8], _UNIT_F32[b8]
+    cmax, cmin = max(r, g, b), min(r, g, b)
+    delta = _f32(cmax - cmin)
+    value = _div_257(int(_f32(cmax * 65535.0) + 0.5))
+    light = _div_257(int(_f32(_f32(0.5 * _f32(cmax + cmin)) * 65535.0) + 0.5))
+    if delta == 0:
+        hue, sat = -1, 0
+    else:
+        if r == cmax: hue = _f32(_f32(g - b) / delta)
+        elif g == cmax: hue = _f32(2.0 + _f32(_f32(b - r) / delta))
+        else: hue = _f32(4.0 + _f32(_f32(r - g) / delta))
+        hue = _f32(hue * 60.0)
+        if hue < 0: hue = _f32(hue + 360.0)
+        hue = int(_f32(_f32(hue * 100.0) + 0.5)) // 100
+        max8, min8 = max(r8, g8, b8), min(r8, g8, b8)
+        sat = _round_div_257(int((max8 - min8) / max8 * 65535.0 + 0.5))
+    if r8 == g8 == b8 == 0:
+        c = m = y = 0; k = 255
+    else:
+        c, m, y = _f32(1.0 - r), _f32(1.0 - g), _f32(1.0 - b)
+        k = min(c, m, y); scale = _f32(1.0 - k)
+        c, m, y = (_round_div_257(int(_f32(_f32(_f32(v - k) / scale) * 65535.0) + 0.5)) for v in (c, m, y))
+        k = _round_div_257(int(_f32(k * 65535.0) + 0.5))
+    return (hue, sat, value), light, (c, m, y, k)
+
+
+def _num(x: float, digits: int) -> str:
+    """x with a fixed number of decimals, never as "-0.00"."""
+    return f"{round(x, digits) + 0.0:.{digits}f}"
+
+
+def _triple(labels: str, values: tuple, digits: tuple) -> tuple:
+    """(display, copy) strings of three numbers, e.g. ("L:53.24 a:80.09 b:67.20", "53.24,80.09,67.20")."""
+    texts = [_num(v, d) for v, d in zip(values, digits)]
+    return " ".join(f"{name}:{t}" for name, t in zip(labels.split(), texts)), ",".join(texts)
+
+
+def color_formats(argb: int) -> dict:
+    """
+    Display and copy strings of one color, keyed like the dialog's value rows
+    and copy buttons, plus the numbers behind them in the *_values entries
+    (for delta E and format templates).
+    """
+    argb &= 0xFFFFFFFF
+    a, r, g, b = argb >> 24, (argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF
+    (h, s, v), light, (c, m, y, k) = _hsv_lightness_cmyk(r, g, b)
+    wh = round((h / QCOLOR_HUE_MAX) * WIN_HUE_MAX) if h != -1 else 0
+    ws = round((s / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX); wl = round((light / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX)
+    hs = str(h) if h != -1 else "0"
+    lab, oklab = argb_to_lab(argb), argb_to_oklab(argb)
+    lab_display, lab_copy = _triple("L a b", lab, (2, 2, 2))
+    lch_display, lch_copy = _triple("L C h", to_polar(lab, LAB_GRAY_CHROMA), (2, 2, 2))
+    oklab_display, oklab_copy = _triple("L a b", oklab, (4, 4, 4))
+    oklch_display, oklch_copy = _triple("L C h", to_polar(oklab, OKLAB_GRAY_CHROMA), (4, 4, 2))
+    return {'rgb': f"{r},{g},{b}", 'rgba': f"{r},{g},{b},{a}", 'html': f"#{r:02x}{g:02x}{b:02x}",
+            'hex_argb': f"#{a:02x}{r:02x}{g:02x}{b:02x}",
+            'hsl_display': f"H:{wh} S:{ws} L:{wl}", 'hsl_copy': f"{wh},{ws},{wl}",
+            'hsv_display': f"H:{hs} S:{s} V:{v}", 'hsv_copy': f"{hs},{s},{v}",
+            'cmyk_display': f"C:{c} M:{m} Y:{y} K:{k}", 'cmyk_copy': f"{c},{m},{y},{k}",
+            'decimal': str(argb),
+            'lab_display': lab_display, 'lab_copy': lab_copy, 'lch_display': lch_display, 'lch_copy': lch_copy,
+            'oklab_display': oklab_display, 'oklab_copy': oklab_copy, 'oklch_display': oklch_display, 'oklch_copy': oklch_copy,
+            'hsv_values': (h, s, v), 'hsl_win_values': (wh, ws, wl), 'cmyk_values': (c, m, y, k),
+            'lab_values': lab, 'oklab_values': oklab}
+
+
+class FormatCache:
+    """Bounded LRU of color_formats() records keyed by packed ARGB; records are shared, do not modify them."""
+    CAPACITY = 4096
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._records = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, argb: int) -> dict:
+        argb &= 0xFFFFFFFF
+        record = self._records.get(argb)
+        if record is not None:
+            self.hits += 1
+            self._records.move_to_end(argb)
+            return record
+        self.misses += 1
+        record = self._records[argb] = color_formats(argb)
+        if len(self._records) > self.capacity: self._records.popitem(last=False)
+        return record
+
+    def clear(self):
+        self._records.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'records': len(self._records), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0}
+
+
+# The one cache the dialog, its copy buttons and the palette tooltips share.
+FORMAT_CACHE = FormatCache()
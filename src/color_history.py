@@ -0,0 +1,301 @@
+"""
+Picked-color history.
+
+Every color picked from the screen becomes one fixed-width record: the time
+it was picked, its packed ARGB value, the screen position and the source
+(live or frozen screen). ColorHistory keeps the newest `capacity` records in
+a ring of preallocated numpy arrays, together with the OKLab coordinates of
+each color as three float32 columns. Listing recent picks, selecting a time
+range and finding the picks nearest a color are therefore vectorized scans
+over those arrays; only the rows a query returns become HistoryEntry
+objects.
+
+Records are also appended to a HistoryFile: a small header followed by the
+same records, memory-mapped. An append writes one record into the mapped
+pages and only then bumps the record count in the header, so nothing
+already in the file is ever rewritten and an interrupted append loses at
+most that record. The file grows GROW_RECORDS records at a time. On open
+the newest `capacity` records are copied into the ring; a file that has
+grown past COMPACT_FACTOR times the capacity is rewritten once, at open,
+with just those records.
+
+Time ranges are binary-searched in the two chronological halves of the ring
+as long as the timestamps never went backwards (the clock was not set back),
+and found with a mask otherwise.
+"""
+np = None
+try:
+    import numpy as np
+except ImportError:
+    pass
+
+import math
+import os
+import time
+
+from app_logging import log_message
+from color_spaces import argb_array_to_oklab, argb_to_oklab
+
+HISTORY_FILE_NAME = "color_history.bin"
+FILE_MAGIC = b"SCCPHIST"
+FILE_VERSION = 1
+HEADER_SIZE = 64
+
+SOURCE_UNKNOWN = 0
+SOURCE_SCREEN = 1           # picked from the live screen
+SOURCE_FROZEN_SCREEN = 2    # picked from the frozen desktop snapshot
+SOURCE_NAMES = {SOURCE_UNKNOWN: "unknown", SOURCE_SCREEN: "screen", SOURCE_FROZEN_SCREEN: "frozen screen"}
+
+NO_POSITION = -0x80000000   # x and y of a record without a screen position (screen coordinates can be negative)
+
+if np is not None:
+    # Little-endian and 24 bytes per record, so the file reads the same on any machine.
+    RECORD_DTYPE = np.dtype([('time', '<f8'), ('argb', '<u4'), ('x', '<i4'), ('y', '<i4'), ('source', 'u1')], align=True)
+    HEADER_DTYPE = np.dtype({'names': ['magic', 'version', 'record_size', 'count'], 'formats': ['S8', '<u4', '<u4', '<u8'],
+                             'offsets': [0, 8, 12, 16], 'itemsize': HEADER_SIZE})
+else:
+    RECORD_DTYPE = HEADER_DTYPE = None
+
+
+def color_history_path(settings) -> str:
+    """History file next to the QSettings INI."""
+    return os.path.join(os.path.dirname(settings.fileName()), HISTORY_FILE_NAME)
+
+
+class HistoryEntry:
+    """One picked color; delta_e is set by ColorHistory.nearest() (OKLab delta E x100, as in ColorIndex)."""
+    __slots__ = ('time', 'argb', 'x', 'y', 'source', 'delta_e')
+
+    def __init__(self, time: float, argb: int, x: int, y: int, source: int, delta_e: float = None):
+        self.time = time
+        self.argb = argb
+        self.x = x
+        self.y = y
+        self.source = source
+        self.delta_e = delta_e
+
+    @property
+    def position(self):
+        """(x, y) on the screen, or None if the pick has no position."""
+        return None if self.x == NO_POSITION else (self.x, self.y)
+
+    @property
+    def source_name(self) -> str:
+        return SOURCE_NAMES.get(self.source, SOURCE_NAMES[SOURCE_UNKNOWN])
+
+    def __repr__(self):
+        return f"HistoryEntry({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.time))}, #{self.argb:08x}, {self.position}, {self.source_name})"
+
+
+class HistoryFile:
+    """Memory-mapped append-only file of RECORD_DTYPE records."""
+    GROW_RECORDS = 65536
+
+    def __init__(self, path: str):
+        self.path = path
+        self._map = self._header = self._records = None
+        self.count = 0
+        directory = os.path.dirname(path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0: self._write_file(path, None)
+        self._open()
+
+    @staticmethod
+    def _write_file(path: str, records):
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'] = FILE_MAGIC; header['version'] = FILE_VERSION; header['record_size'] = RECORD_DTYPE.itemsize
+        header['count'] = 0 if records is None else len(records)
+        with open(path, "wb") as f:
+            f.write(header.tobytes())
+            if records is not None: f.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+
+    def _open(self):
+        size = os.path.getsize(self.path)
+        if size < HEADER_SIZE:
+            raise ValueError(f"'{self.path}' is too short to be a color history file.")
+        self._map = np.memmap(self.path, dtype=np.uint8, mode="r+")
+        self._header = self._map[:HEADER_SIZE].view(HEADER_DTYPE)
+        magic, version, record_size, count = (self._header[field][0] for field in HEADER_DTYPE.names)
+        if magic != FILE_MAGIC or version != FILE_VERSION or record_size != RECORD_DTYPE.itemsize:
+            self._release()
+            raise ValueError(f"'{self.path}' is not a color history file of this version.")
+        slots = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        self._records = self._map[HEADER_SIZE:HEADER_SIZE + slots * RECORD_DTYPE.itemsize].view(RECORD_DTYPE)
+        self.count = min(int(count), slots)
+        if self.count < count: log_message(f"Color history: '{self.path}' is shorter than its header says, reading {self.count} of {count} records.")
+
+    def _release(self):
+        # The mapping is unmapped once no view of it is left; Windows cannot resize or replace a mapped file.
+        if self._map is not None: self._map.flush()
+        self._map = self._header = self._records = None
+
+    def _grow(self):
+        slots = len(self._records) + self.GROW_RECORDS
+        self._release()
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + slots * RECORD_DTYPE.itemsize)
+        self._open()
+
+    def records(self, start: int = 0):
+        """Copy of the records from index start on."""
+        return np.array(self._records[start:self.count])
+
+    def append(self, record):
+        """Writes one record (a tuple in RECORD_DTYPE field order) after the last one."""
+        if self.count >= len(self._records): self._grow()
+        self._records[self.count] = record
+        self.count += 1
+        # The count covers the record only once it is in place.
+        self._header['count'] = self.count
+
+    def rewrite(self, records):
+        """Replaces the whole file with records, through a temporary file renamed over it."""
+        temp = self.path + ".tmp"
+        self._write_file(temp, records)
+        self._release()
+        os.replace(temp, self.path)
+        self._open()
+
+    def flush(self):
+        if self._map is not None: self._map.flush()
+
+    def close(self):
+        self._release()
+
+
+class ColorHistory:
+    DEFAULT_CAPACITY = 262144   # picks kept and searched; about 9 MB with their OKLab coordinates
+    COMPACT_FACTOR = 4          # a file holding more than this many capacities of records is rewritten at open
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, path: str = None):
+        if np is None:
+            raise RuntimeError("ColorHistory needs numpy.")
+        self.capacity = max(1, int(capacity))
+        self._records = np.zeros(self.capacity, dtype=RECORD_DTYPE)
+        self._lab = np.zeros((3, self.capacity), dtype=np.float32)   # L, a, b columns: distances stream through contiguous memory
+        self._next = 0              # ring row of the next record
+        self._size = 0
+        self._monotonic = True      # timestamps never went backwards, so time ranges can be binary-searched
+        self._last_time = -math.inf
+        self.file = None
+        self.appends = 0
+        self.queries = 0
+        if path is not None: self._open_file(path)
+
+    def __len__(self):
+        return self._size
+
+    def _open_file(self, path: str):
+        history_file = HistoryFile(path)
+        total = history_file.count
+        newest = history_file.records(max(0, total - self.capacity))
+        if total > self.COMPACT_FACTOR * self.capacity:
+            history_file.rewrite(newest)
+            log_message(f"Color history: Compacted '{path}' from {total} to the newest {len(newest)} records.")
+        self.file = history_file
+        self._load(newest)
+
+    def _load(self, records):
+        count = len(records)
+        self._records[:count] = records
+        self._lab[:, :count] = argb_array_to_oklab(records['argb']).T
+        self._size = count; self._next = count % self.capacity
+        times = records['time']
+        self._monotonic = bool(np.all(times[1:] >= times[:-1]))
+        self._last_time = float(times[-1]) if count else -math.inf
+
+    def add(self, argb: int, x: int = NO_POSITION, y: int = NO_POSITION, source: int = SOURCE_UNKNOWN, timestamp: float = None) -> HistoryEntry:
+        """Records one pick (now, unless timestamp is given), overwriting the oldest one when the ring is full."""
+        t = time.time() if timestamp is None else float(timestamp)
+        record = (t, argb & 0xFFFFFFFF, x, y, source)
+        row = self._next
+        self._records[row] = record; self._lab[:, row] = argb_to_oklab(record[1])
+        self._next = (row + 1) % self.capacity; self._size = min(self._size + 1, self.capacity)
+        if t < self._last_time: self._monotonic = False
+        self._last_time = t
+        self.appends += 1
+        if self.file is not None:
+            try:
+                self.file.append(record)
+            except (OSError, ValueError) as e:
+                log_message(f"Color history: Appending to '{self.file.path}' failed ({e}). Picks will not be saved for the rest of this session.")
+                self.file = None
+        return HistoryEntry(*record)
+
+    def clear(self):
+        """Forgets every pick, in memory and in the file."""
+        self._next = self._size = 0
+        self._monotonic = True; self._last_time = -math.inf
+        if self.file is not None: self.file.rewrite(self._records[:0])
+
+    def _entry(self, row: int) -> HistoryEntry:
+        return HistoryEntry(*self._records[row].item())
+
+    def _segments(self) -> list:
+        """(first row, end row) of the filled parts of the ring, oldest part first."""
+        if self._size < self.capacity: return [(0, self._size)]
+        return [(self._next, self.capacity), (0, self._next)] if self._next else [(0, self.capacity)]
+
+    def _rows_between(self, start: float = None, end: float = None):
+        """Ring rows of the picks with start <= time < end, oldest first; None means unbounded."""
+        parts = []
+        for lo, hi in self._segments():
+            times = self._records['time'][lo:hi]
+            if self._monotonic:
+                first = int(np.searchsorted(times, start, 'left')) if start is not None else 0
+                last = int(np.searchsorted(times, end, 'left')) if end is not None else hi - lo
+                parts.append(np.arange(lo + first, lo + max(first, last)))
+            else:
+                mask = np.ones(hi - lo, dtype=bool)
+                if start is not None: mask &= times >= start
+                if end is not None: mask &= times < end
+                parts.append(np.flatnonzero(mask) + lo)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+
+    def count(self, start: float = None, end: float = None) -> int:
+        if start is None and end is None: return self._size
+        return len(self._rows_between(start, end))
+
+    def recent(self, limit: int = 100, start: float = None, end: float = None) -> list:
+        """Up to limit HistoryEntries, newest first, optionally only those picked in [start, end)."""
+        self.queries += 1
+        if start is None and end is None:
+            rows = (self._next - 1 - np.arange(min(limit, self._size))) % self.capacity
+        else:
+            rows = self._rows_between(start, end)[::-1][:limit]
+        return [self._entry(row) for row in rows.tolist()]
+
+    def nearest(self, argb: int, k: int = 1, max_delta_e: float = None, start: float = None, end: float = None) -> list:
+        """Up to k HistoryEntries closest to argb, nearest first, with delta_e set; optionally within max_delta_e and [start, end)."""
+        self.queries += 1
+        if not self._size or k <= 0: return []
+        query = argb_to_oklab(argb & 0xFFFFFFFF)
+        if start is None and end is None:
+            # Every filled row; the order of the rows does not matter for distances.
+            rows = None; lab = self._lab[:, :self._size]
+        else:
+            rows = self._rows_between(start, end); lab = self._lab[:, rows]
+        if not lab.shape[1]: return []
+        dist = np.square(lab[0] - np.float32(query[0]))
+        dist += np.square(lab[1] - np.float32(query[1])); dist += np.square(lab[2] - np.float32(query[2]))
+        if k == 1: part = np.argmin(dist)[None]
+        elif k < len(dist): part = np.argpartition(dist, k - 1)[:k]
+        else: part = np.arange(len(dist))
+        max_dist = (max_delta_e / 100.0) ** 2 if max_delta_e is not None else math.inf
+        entries = []
+        for i in part[np.argsort(dist[part], kind="stable")].tolist():
+            if dist[i] > max_dist: break
+            entry = self._entry(i if rows is None else int(rows[i]))
+            entry.delta_e = math.sqrt(float(dist[i])) * 100.0
+            entries.append(entry)
+        return entries
+
+    def flush(self):
+        if self.file is not None: self.file.flush()
+
+    def close(self):
+        if self.file is not None: self.file.close(); self.file = None
+
+    def stats(self) -> dict:
+        return {'picks': self._size, 'capacity': self.capacity, 'file_records': self.file.count if self.file else None,
+                'appends': self.appends, 'queries': self.queries}
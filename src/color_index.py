@@ -0,0 +1,200 @@
+"""
+Nearest-color index over every saved palette.
+
+ColorIndex holds the colors of all palettes (the 16 QColorDialog custom
+colors, Default Shades, the User Palette and any other named source) as
+OKLab points and answers "which saved colors are closest to this one".
+Distances are reported as delta_e = 100 * Euclidean OKLab distance, which
+puts them on the familiar CIELAB-like scale (about 1-2 is barely visible).
+
+Points live in preallocated numpy arrays and are bucketed into a uniform
+OKLab grid of CELL_SIZE cubes. A query scans rings of grid cells outward
+from the query point and stops once no unscanned cell can hold a closer
+color, so it touches a few hundred candidates even with 100k colors.
+Setting or clearing one slot only moves that slot between buckets, which
+keeps the index in step with palette edits without rebuilding it.
+"""
+np = None
+try:
+    import numpy as np
+except ImportError:
+    pass
+
+from color_spaces import argb_array_to_oklab, argb_to_oklab
+
+# Grid keys pack three cell coordinates into one int; the bias keeps them positive.
+_KEY_BIAS = 512
+_KEY_SHIFT = 10
+
+
+def _pack_key(i: int, j: int, k: int) -> int:
+    return ((i + _KEY_BIAS) << (2 * _KEY_SHIFT)) | ((j + _KEY_BIAS) << _KEY_SHIFT) | (k + _KEY_BIAS)
+
+
+class ColorMatch:
+    """One query result: slot `slot` of palette `source` holds `argb`, delta_e away from the query."""
+    __slots__ = ('source', 'slot', 'argb', 'delta_e')
+
+    def __init__(self, source: str, slot: int, argb: int, delta_e: float):
+        self.source = source
+        self.slot = slot
+        self.argb = argb
+        self.delta_e = delta_e
+
+    def __repr__(self):
+        return f"ColorMatch({self.source!r}, {self.slot}, #{self.argb:08x}, dE={self.delta_e:.2f})"
+
+
+class ColorIndex:
+    CELL_SIZE = 0.02        # OKLab units per grid cell (delta_e 2)
+    BRUTE_FORCE_MAX = 2048  # below this many colors a plain vectorized scan is faster than the grid
+    MAX_RING = 4            # rings scanned before a query falls back to a full scan
+
+    def __init__(self, capacity: int = 256):
+        if np is None:
+            raise RuntimeError("ColorIndex needs numpy.")
+        self._lab = np.zeros((capacity, 3), dtype=np.float64)
+        self._argb = np.zeros(capacity, dtype=np.uint32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._keys = [None] * capacity   # row -> (source, slot), None for a free row
+        self._cells = [0] * capacity     # row -> grid key
+        self._rows = {}                  # (source, slot) -> row
+        self._free = list(range(capacity - 1, -1, -1))
+        self._buckets = {}               # grid key -> list of rows
+        self._ring_offsets = [self._ring(r) for r in range(self.MAX_RING + 1)]
+        self.queries = 0
+        self.full_scans = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    @staticmethod
+    def _ring(r: int) -> list:
+        """Packed key deltas of the grid cells at Chebyshev distance r."""
+        return [(di << (2 * _KEY_SHIFT)) + (dj << _KEY_SHIFT) + dk
+                for di in range(-r, r + 1) for dj in range(-r, r + 1) for dk in range(-r, r + 1)
+                if max(abs(di), abs(dj), abs(dk)) == r]
+
+    def _cell_key(self, lab) -> int:
+        size = self.CELL_SIZE
+        return _pack_key(int(lab[0] // size), int(lab[1] // size), int(lab[2] // size))
+
+    def _grow(self):
+        old = len(self._keys); new = old * 2
+        self._lab = np.concatenate((self._lab, np.zeros((old, 3), dtype=np.float64)))
+        self._argb = np.concatenate((self._argb, np.zeros(old, dtype=np.uint32)))
+        self._alive = np.concatenate((self._alive, np.zeros(old, dtype=bool)))
+        self._keys.extend([None] * old); self._cells.extend([0] * old)
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    def _store(self, key, argb: int, lab):
+        row = self._rows.get(key)
+        if row is None:
+            if not self._free: self._grow()
+            row = self._free.pop()
+            self._rows[key] = row; self._keys[row] = key
+        else:
+            self._unbucket(row)
+        self._lab[row] = lab; self._argb[row] = argb; self._alive[row] = True
+        cell = self._cell_key(lab)
+        self._cells[row] = cell
+        self._buckets.setdefault(cell, []).append(row)
+
+    def _unbucket(self, row: int):
+        """Takes row out of its grid bucket, dropping the bucket once it is empty so the grid never fills with dead cells."""
+        cell = self._cells[row]
+        bucket = self._buckets[cell]
+        bucket.remove(row)
+        if not bucket: del self._buckets[cell]
+
+    def set(self, source: str, slot: int, argb: int):
+        """Adds or updates one palette slot."""
+        argb &= 0xFFFFFFFF
+        self._store((source, slot), argb, argb_to_oklab(argb))
+
+    def remove(self, source: str, slot: int):
+        row = self._rows.pop((source, slot), None)
+        if row is None: return
+        self._unbucket(row)
+        self._keys[row] = None; self._alive[row] = False
+        self._free.append(row)
+
+    def clear_source(self, source: str):
+        for key in [key for key in self._rows if key[0] == source]:
+            self.remove(*key)
+
+    def set_source(self, source: str, colors, filled=None):
+        """Replaces all slots of source; colors are packed ARGB values, filled an optional mask (e.g. a PaletteModel's)."""
+        self.clear_source(source)
+        slots = [i for i in range(len(colors)) if filled is None or filled[i]]
+        if not slots: return
+        argb = np.asarray(colors, dtype=np.uint32)[slots]
+        labs = argb_array_to_oklab(argb)
+        while len(self._free) < len(slots): self._grow()
+        rows = [self._free.pop() for _ in slots]
+        self._lab[rows] = labs; self._argb[rows] = argb; self._alive[rows] = True
+        coords = (np.floor(labs / self.CELL_SIZE).astype(np.int64) + _KEY_BIAS).tolist()
+        keys, cells, buckets = self._keys, self._cells, self._buckets
+        for slot, row, (i, j, k) in zip(slots, rows, coords):
+            key = (source, slot); cell = (i << (2 * _KEY_SHIFT)) | (j << _KEY_SHIFT) | k
+            self._rows[key] = row; keys[row] = key; cells[row] = cell
+            bucket = buckets.get(cell)
+            if bucket is None: buckets[cell] = [row]
+            else: bucket.append(row)
+
+    def nearest(self, argb: int, k: int = 1, max_delta_e: float = None) -> list:
+        """Up to k ColorMatches closest to argb, nearest first, optionally only those within max_delta_e."""
+        self.queries += 1
+        if not self._rows or k <= 0: return []
+        query = argb_to_oklab(argb & 0xFFFFFFFF)
+        max_dist = max_delta_e / 100.0 if max_delta_e is not None else float("inf")
+        if len(self._rows) <= self.BRUTE_FORCE_MAX: return self._scan_all(query, k, max_dist)
+        size = self.CELL_SIZE
+        center = self._cell_key(query)
+        # Distance from the query to the nearest face of its own grid cell.
+        margin = min(min(v - (v // size) * size, (v // size + 1) * size - v) for v in query)
+        buckets, candidates = self._buckets, []
+        for r, ring in enumerate(self._ring_offsets):
+            for delta in ring:
+                bucket = buckets.get(center + delta)
+                if bucket: candidates.extend(bucket)
+            # Anything outside the scanned cube is at least this far from the query.
+            covered = r * size + margin
+            if covered >= max_dist or len(candidates) >= k:
+                rows = np.array(candidates, dtype=np.intp); dist = self._distances(rows, query)
+                if covered >= max_dist or np.partition(dist, k - 1)[k - 1] <= covered:
+                    return self._best(rows, dist, k, max_dist)
+        self.full_scans += 1
+        return self._scan_all(query, k, max_dist)
+
+    def _scan_all(self, query, k: int, max_dist: float) -> list:
+        # Scanning every row, free ones included, is cheaper than gathering the live ones first.
+        diff = self._lab - query
+        dist = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        dist[~self._alive] = np.inf
+        return self._best(None, dist, k, max_dist)
+
+    def _distances(self, rows, query):
+        diff = self._lab[rows] - query
+        return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+    def _best(self, rows, dist, k: int, max_dist: float) -> list:
+        """Matches for the k smallest of dist; rows maps dist positions to rows (None: they are rows)."""
+        if not len(dist): return []
+        if rows is None: rows = np.arange(len(dist))
+        if k == 1:
+            part = np.argmin(dist)
+            rows, dist = rows[part:part + 1], dist[part:part + 1]
+        elif k < len(dist):
+            part = np.argpartition(dist, k - 1)[:k]
+            rows, dist = rows[part], dist[part]
+        matches = []
+        for i in np.argsort(dist, kind="stable").tolist():
+            row = int(rows[i])
+            if dist[i] > max_dist or self._keys[row] is None: break
+            source, slot = self._keys[row]
+            matches.append(ColorMatch(source, slot, int(self._argb[row]), float(dist[i]) * 100.0))
+        return matches
+
+    def stats(self) -> dict:
+        return {'colors': len(self._rows), 'grid_cells': len(self._buckets), 'queries': self.queries, 'full_scans': self.full_scans}
@@ -0,0 +1,141 @@
+"""
+Perceptual color spaces for comparing colors.
+
+OKLab (Björn Ottosson, 2020) is used for nearest-color lookups because plain
+Euclidean distance in it tracks perceived difference well and it is cheap to
+compute: a 3x3 matrix, a cube root and another 3x3 matrix on linear sRGB.
+CIELAB (D65 white, as sRGB defines it) and the polar LCh/OKLCh forms are
+shown in the values panel, with CIE76 and CIEDE2000 color differences.
+sRGB decoding goes through a 256-entry table, so 8-bit channels never hit
+pow() at all.
+
+The scalar functions are pure Python; the *_array variants take numpy arrays
+and are only usable when numpy is installed.
+"""
+np = None
+try:
+    import numpy as np
+except ImportError:
+    pass
+
+import math
+
+
+def _srgb_to_linear(v: float) -> float:
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+# Linear-light value of every 8-bit sRGB channel value.
+SRGB_TO_LINEAR = tuple(_srgb_to_linear(i / 255.0) for i in range(256))
+_SRGB_TO_LINEAR_ARRAY = np.array(SRGB_TO_LINEAR, dtype=np.float64) if np is not None else None
+
+# Linear sRGB -> LMS and cube-rooted LMS -> OKLab.
+_M1 = ((0.4122214708, 0.5363325363, 0.0514459929),
+       (0.2119034982, 0.6806995451, 0.1073969566),
+       (0.0883024619, 0.2817188376, 0.6299787005))
+_M2 = ((0.2104542553, 0.7936177850, -0.0040720468),
+       (1.9779984951, -2.4285922050, 0.4505937099),
+       (0.0259040371, 0.7827717662, -0.8086757660))
+
+
+def _cbrt(x: float) -> float:
+    return x ** (1.0 / 3.0) if x >= 0 else -((-x) ** (1.0 / 3.0))
+
+
+def srgb8_to_oklab(r: int, g: int, b: int) -> tuple:
+    """(L, a, b) of an 8-bit sRGB color; L is 0..1, a and b roughly -0.4..0.4."""
+    lr, lg, lb = SRGB_TO_LINEAR[r], SRGB_TO_LINEAR[g], SRGB_TO_LINEAR[b]
+    l_ = _cbrt(_M1[0][0] * lr + _M1[0][1] * lg + _M1[0][2] * lb)
+    m_ = _cbrt(_M1[1][0] * lr + _M1[1][1] * lg + _M1[1][2] * lb)
+    s_ = _cbrt(_M1[2][0] * lr + _M1[2][1] * lg + _M1[2][2] * lb)
+    return (_M2[0][0] * l_ + _M2[0][1] * m_ + _M2[0][2] * s_,
+            _M2[1][0] * l_ + _M2[1][1] * m_ + _M2[1][2] * s_,
+            _M2[2][0] * l_ + _M2[2][1] * m_ + _M2[2][2] * s_)
+
+
+def argb_to_oklab(argb: int) -> tuple:
+    """OKLab of a packed 0xAARRGGBB value; alpha is ignored."""
+    return srgb8_to_oklab((argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF)
+
+
+def argb_array_to_oklab(argb):
+    """(N, 3) float64 OKLab array for a sequence of packed 0xAARRGGBB values (needs numpy)."""
+    argb = np.asarray(argb, dtype=np.uint32)
+    lut = _SRGB_TO_LINEAR_ARRAY
+    rgb = np.stack((lut[(argb >> 16) & 0xFF], lut[(argb >> 8) & 0xFF], lut[argb & 0xFF]), axis=-1)
+    lms = np.cbrt(rgb @ np.array(_M1).T)
+    return lms @ np.array(_M2).T
+
+
+# Linear sRGB -> CIE XYZ (IEC 61966-2-1) and the D65 reference white.
+_M_XYZ = ((0.4124564, 0.3575761, 0.1804375),
+          (0.2126729, 0.7151522, 0.0721750),
+          (0.0193339, 0.1191920, 0.9503041))
+_WHITE_D65 = (0.95047, 1.0, 1.08883)
+_LAB_EPSILON = 216.0 / 24389.0
+_LAB_KAPPA = 24389.0 / 27.0
+
+
+def _lab_f(t: float) -> float:
+    return _cbrt(t) if t > _LAB_EPSILON else (_LAB_KAPPA * t + 16.0) / 116.0
+
+
+def srgb8_to_lab(r: int, g: int, b: int) -> tuple:
+    """CIELAB (L 0..100, a, b) of an 8-bit sRGB color, D65 white."""
+    lr, lg, lb = SRGB_TO_LINEAR[r], SRGB_TO_LINEAR[g], SRGB_TO_LINEAR[b]
+    fx = _lab_f((_M_XYZ[0][0] * lr + _M_XYZ[0][1] * lg + _M_XYZ[0][2] * lb) / _WHITE_D65[0])
+    fy = _lab_f((_M_XYZ[1][0] * lr + _M_XYZ[1][1] * lg + _M_XYZ[1][2] * lb) / _WHITE_D65[1])
+    fz = _lab_f((_M_XYZ[2][0] * lr + _M_XYZ[2][1] * lg + _M_XYZ[2][2] * lb) / _WHITE_D65[2])
+    return 116.0 * fy - 16.0, 500.0 * (fx - fy), 200.0 * (fy - fz)
+
+
+def argb_to_lab(argb: int) -> tuple:
+    """CIELAB of a packed 0xAARRGGBB value; alpha is ignored."""
+    return srgb8_to_lab((argb >> 16) & 0xFF, (argb >> 8) & 0xFF, argb & 0xFF)
+
+
+def to_polar(lab: tuple, gray_chroma: float = 0.0) -> tuple:
+    """(L, C, h) of a Lab or OKLab triple, h in degrees 0..360; h is 0 when C <= gray_chroma."""
+    L, a, b = lab
+    c = math.hypot(a, b)
+    if c <= gray_chroma: return L, c, 0.0
+    return L, c, math.degrees(math.atan2(b, a)) % 360.0
+
+
+def delta_e76(lab1: tuple, lab2: tuple) -> float:
+    """CIE76 color difference: Euclidean distance in CIELAB."""
+    return math.sqrt((lab1[0] - lab2[0]) ** 2 + (lab1[1] - lab2[1]) ** 2 + (lab1[2] - lab2[2]) ** 2)
+
+
+def delta_e2000(lab1: tuple, lab2: tuple) -> float:
+    """CIEDE2000 color difference (kL = kC = kH = 1), following Sharma, Wu and Dalal (2005)."""
+    L1, a1, b1 = lab1
+    L2, a2, b2 = lab2
+    c_mean7 = ((math.hypot(a1, b1) + math.hypot(a2, b2)) / 2.0) ** 7
+    g = 0.5 * (1.0 - math.sqrt(c_mean7 / (c_mean7 + 25.0 ** 7)))
+    a1p, a2p = (1.0 + g) * a1, (1.0 + g) * a2
+    c1p, c2p = math.hypot(a1p, b1), math.hypot(a2p, b2)
+    h1p = math.degrees(math.atan2(b1, a1p)) % 360.0 if c1p else 0.0
+    h2p = math.degrees(math.atan2(b2, a2p)) % 360.0 if c2p else 0.0
+    dlp, dcp = L2 - L1, c2p - c1p
+    if c1p * c2p == 0: dhp = 0.0
+    elif abs(h2p - h1p) <= 180.0: dhp = h2p - h1p
+    elif h2p - h1p > 180.0: dhp = h2p - h1p - 360.0
+    else: dhp = h2p - h1p + 360.0
+    dHp = 2.0 * math.sqrt(c1p * c2p) * math.sin(math.radians(dhp) / 2.0)
+    lp_mean, cp_mean = (L1 + L2) / 2.0, (c1p + c2p) / 2.0
+    if c1p * c2p == 0: hp_mean = h1p + h2p
+    elif abs(h1p - h2p) <= 180.0: hp_mean = (h1p + h2p) / 2.0
+    elif h1p + h2p < 360.0: hp_mean = (h1p + h2p + 360.0) / 2.0
+    else: hp_mean = (h1p + h2p - 360.0) / 2.0
+    t = (1.0 - 0.17 * math.cos(math.radians(hp_mean - 30.0)) + 0.24 * math.cos(math.radians(2.0 * hp_mean))
+         + 0.32 * math.cos(math.radians(3.0 * hp_mean + 6.0)) - 0.20 * math.cos(math.radians(4.0 * hp_mean - 63.0)))
+    d_theta = 30.0 * math.exp(-(((hp_mean - 275.0) / 25.0) ** 2))
+    cp_mean7 = cp_mean ** 7
+    r_c = 2.0 * math.sqrt(cp_mean7 / (cp_mean7 + 25.0 ** 7))
+    l50 = (lp_mean - 50.0) ** 2
+    s_l = 1.0 + 0.015 * l50 / math.sqrt(20.0 + l50)
+    s_c = 1.0 + 0.045 * cp_mean
+    s_h = 1.0 + 0.015 * cp_mean * t
+    r_t = -math.sin(math.radians(2.0 * d_theta)) * r_c
+    return math.sqrt((dlp / s_l) ** 2 + (dcp / s_c) ** 2 + (dHp / s_h) ** 2 + r_t * (dcp / s_c) * (dHp / s_h))
@@ -0,0 +1,120 @@
+"""
+Target-dialog profiles: which external color dialogs RGB values are sent to.
+
+A profile declares how to recognise a dialog (top-level window class plus the
+control IDs and class of its R, G and B edit controls) and how to write into
+it. The built-in profiles cover the standard Windows Color dialog (MS Paint
+and most Win32 apps) and Microsoft Word's "Colors" dialog. More profiles can
+be added to the QSettings INI without touching the code, e.g.:
+
+    [dialogProfiles]
+    myapp\\title=My App Colors
+    myapp\\dialogClass=#32770
+    myapp\\controlIds=1001, 1002, 1003
+    myapp\\editClass=Edit
+    myapp\\setText=settext
+    myapp\\bringToFront=true
+
+A user profile with the name of a built-in one replaces it. The optional
+dialogs/enabledProfiles key (comma-separated names) limits which profiles
+are searched for; without it the launcher's default list is used (all
+profiles for the main script, only "word" for the WORD launcher).
+"""
+from app_logging import log_message
+
+DIALOG_PROFILES_GROUP = "dialogProfiles"
+ENABLED_PROFILES_KEY = "dialogs/enabledProfiles"
+
+SET_TEXT_WM_SETTEXT = "settext"       # WM_SETTEXT, fine for plain Edit controls
+SET_TEXT_REPLACE_SEL = "replacesel"   # EM_SETSEL(0, -1) + EM_REPLACESEL, needed by RichEdit controls
+SET_TEXT_STRATEGIES = (SET_TEXT_WM_SETTEXT, SET_TEXT_REPLACE_SEL)
+
+
+class DialogProfile:
+    """Declarative description of one external color dialog."""
+    def __init__(self, name: str, title: str, dialog_class: str, control_ids, edit_class: str = "Edit",
+                 set_text: str = SET_TEXT_WM_SETTEXT, bring_to_front: bool = True):
+        control_ids = tuple(int(cid) for cid in control_ids)
+        if len(control_ids) != 3:
+            raise ValueError(f"expected 3 control IDs (R, G, B), got {len(control_ids)}")
+        if set_text not in SET_TEXT_STRATEGIES:
+            raise ValueError(f"unknown set-text strategy '{set_text}' (use one of {', '.join(SET_TEXT_STRATEGIES)})")
+        if not dialog_class:
+            raise ValueError("dialog class is empty")
+        self.name = name
+        self.title = title or name
+        self.dialog_class = dialog_class
+        self.control_ids = control_ids
+        self.edit_class = edit_class
+        self.set_text = set_text
+        self.bring_to_front = bring_to_front
+
+    def __repr__(self):
+        return f"DialogProfile({self.name!r}, class={self.dialog_class!r}, ids={self.control_ids}, edit={self.edit_class!r}, set_text={self.set_text!r})"
+
+
+BUILTIN_PROFILES = (
+    DialogProfile("system", "System Color Dialog", "#32770", (706, 707, 708), "Edit", SET_TEXT_WM_SETTEXT, True),
+    # Raising Word's dialog on every send steals focus from the document window.
+    DialogProfile("word", "Word Color Dialog", "bosa_sdm_msword", (1613, 1614, 1615), "RichEdit20W", SET_TEXT_REPLACE_SEL, False),
+)
+
+
+def _as_bool(value, default: bool) -> bool:
+    if value is None or value == "": return default
+    if isinstance(value, bool): return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _as_list(value) -> list:
+    # QSettings returns comma-separated INI values as a list, a single value as a str.
+    if value is None: return []
+    if isinstance(value, str): value = value.split(",")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def load_user_profiles(settings) -> list:
+    """Reads the [dialogProfiles] group; invalid entries are logged and skipped."""
+    profiles = []
+    if settings is None: return profiles
+    settings.beginGroup(DIALOG_PROFILES_GROUP)
+    try:
+        for name in settings.childGroups():
+            settings.beginGroup(name)
+            try:
+                profiles.append(DialogProfile(
+                    name,
+                    str(settings.value("title", "") or ""),
+                    str(settings.value("dialogClass", "") or ""),
+                    _as_list(settings.value("controlIds")),
+                    str(settings.value("editClass", "Edit") or "Edit"),
+                    str(settings.value("setText", SET_TEXT_WM_SETTEXT) or SET_TEXT_WM_SETTEXT).lower(),
+                    _as_bool(settings.value("bringToFront"), True)))
+            except (TypeError, ValueError) as e:
+                log_message(f"Dialog profiles: Ignoring invalid profile '{name}' in settings: {e}")
+            finally:
+                settings.endGroup()
+    finally:
+        settings.endGroup()
+    return profiles
+
+
+def load_dialog_profiles(settings=None, default_enabled=None) -> list:
+    """
+    Built-in profiles merged with the user profiles from settings, filtered by
+    ENABLED_PROFILES_KEY, or by the names in default_enabled when the key is
+    not set (None: all profiles).
+    """
+    profiles = {p.name: p for p in BUILTIN_PROFILES}
+    for profile in load_user_profiles(settings):
+        if profile.name in profiles: log_message(f"Dialog profiles: User profile '{profile.name}' replaces the built-in one.")
+        profiles[profile.name] = profile
+    enabled = _as_list(settings.value(ENABLED_PROFILES_KEY)) if settings is not None else []
+    if not enabled and default_enabled: enabled = list(default_enabled)
+    if enabled:
+        unknown = [name for name in enabled if name not in profiles]
+        if unknown: log_message(f"Dialog profiles: Unknown profile(s) in '{ENABLED_PROFILES_KEY}': {', '.join(unknown)}.")
+        profiles = {name: profiles[name] for name in enabled if name in profiles}
+    result = list(profiles.values())
+    log_message(f"Dialog profiles: Searching for {', '.join(p.name for p in result) or 'no dialogs'}.")
+    return result
@@ -0,0 +1,177 @@
+"""
+User-defined clipboard format templates.
+
+A template is a str.format() pattern over the fields of one color, e.g.
+
+    rgb({r}, {g}, {b})
+    Color(0x{argb:08X})
+    vec3({rf:.3f}, {gf:.3f}, {bf:.3f})
+
+Fields (FIELDS lists them all): r g b a (0-255), rf gf bf af (0-1), argb
+(0xAARRGGBB), rgb (0xRRGGBB), rgba (0xRRGGBBAA), html ("#rrggbb"), h s v
+(HSV as the values panel shows it), wh ws wl (Windows HSL), c m y k, lab_l
+lab_a lab_b, lch_c lch_h, ok_l ok_a ok_b, oklch_c oklch_h.
+
+The built-in templates can be extended or replaced in the INI, and any copy
+button (by its id in COPY_BUTTONS) can be bound to a template:
+
+    [formatTemplates]
+    Unity=Color32({r}, {g}, {b}, {a})
+    CSS%20rgb()="rgb({r} {g} {b} / {af:.2f})"
+
+    [formatButtons]
+    html=CSS rgb()
+
+Quote patterns that contain commas; QSettings otherwise splits them into a
+list, which is joined back with ", ".
+
+Each pattern is parsed and checked once, when it is loaded: unknown fields
+and format specs that do not fit the field are reported then, and the
+pattern is rewritten as a positional str.format() pattern fed by the getters
+of just the fields it uses, so using a template (e.g. for the live preview
+on every hover sample) never computes unused fields. Templates that only use
+channel fields do not even look up the FORMAT_CACHE record.
+"""
+import string
+
+from app_logging import log_message
+from color_conversion import FORMAT_CACHE, LAB_GRAY_CHROMA, OKLAB_GRAY_CHROMA
+from color_spaces import to_polar
+
+FORMAT_TEMPLATES_GROUP = "formatTemplates"
+FORMAT_BUTTONS_GROUP = "formatButtons"
+
+# Fields computed straight from the packed ARGB value.
+CHANNEL_FIELDS = ('r', 'g', 'b', 'a', 'rf', 'gf', 'bf', 'af', 'argb', 'rgb', 'rgba')
+# Fields taken from the color's FORMAT_CACHE record.
+RECORD_FIELDS = ('html', 'h', 's', 'v', 'wh', 'ws', 'wl', 'c', 'm', 'y', 'k', 'lab_l', 'lab_a', 'lab_b', 'lch_c', 'lch_h',
+                 'ok_l', 'ok_a', 'ok_b', 'oklch_c', 'oklch_h')
+FIELDS = CHANNEL_FIELDS + RECORD_FIELDS
+
+# Copy button ids that [formatButtons] can bind, in the order of the COPY TO CLIPBOARD group.
+COPY_BUTTONS = ('rgb', 'rgba', 'html', 'hsv', 'hsl', 'cmyk', 'argb', 'dec', 'lab', 'lch', 'oklab', 'oklch', 'all')
+
+BUILTIN_TEMPLATES = (
+    ("CSS rgb()", "rgb({r}, {g}, {b})"),
+    ("CSS rgba()", "rgba({r}, {g}, {b}, {af:.3g})"),
+    ("CSS lab()", "lab({lab_l:.2f}% {lab_a:.2f} {lab_b:.2f})"),
+    ("CSS oklch()", "oklch({ok_l:.4f} {oklch_c:.4f} {oklch_h:.2f})"),
+    ("0xAARRGGBB", "0x{argb:08X}"),
+    ("GLSL vec3", "vec3({rf:.3f}, {gf:.3f}, {bf:.3f})"),
+    ("GLSL vec4", "vec4({rf:.3f}, {gf:.3f}, {bf:.3f}, {af:.3f})"),
+)
+
+_SAMPLE_COLOR = 0x80336699
+# Each channel field as a function of the packed value x.
+_CHANNEL_GETTERS = {'r': lambda x: x >> 16 & 255, 'g': lambda x: x >> 8 & 255, 'b': lambda x: x & 255, 'a': lambda x: x >> 24,
+                    'rf': lambda x: (x >> 16 & 255) / 255.0, 'gf': lambda x: (x >> 8 & 255) / 255.0,
+                    'bf': lambda x: (x & 255) / 255.0, 'af': lambda x: (x >> 24) / 255.0, 'argb': lambda x: x,
+                    'rgb': lambda x: x & 0xFFFFFF, 'rgba': lambda x: (x << 8 & 0xFFFFFF00) | x >> 24}
+
+
+def _polar_fields(lab: tuple, gray_chroma: float) -> tuple:
+    """(a, b, C, h) of a Lab/OKLab triple; a, b and C of grays are exactly 0 so they never print as -0.00."""
+    _, chroma, hue = to_polar(lab, gray_chroma)
+    if chroma <= gray_chroma: return 0.0, 0.0, 0.0, 0.0
+    return lab[1], lab[2], chroma, hue
+
+
+def _record_fields(record: dict) -> dict:
+    h, s, v = record['hsv_values']
+    wh, ws, wl = record['hsl_win_values']
+    c, m, y, k = record['cmyk_values']
+    lab, oklab = record['lab_values'], record['oklab_values']
+    lab_a, lab_b, lch_c, lch_h = _polar_fields(lab, LAB_GRAY_CHROMA)
+    ok_a, ok_b, oklch_c, oklch_h = _polar_fields(oklab, OKLAB_GRAY_CHROMA)
+    return {'html': record['html'], 'h': max(h, 0), 's': s, 'v': v, 'wh': wh, 'ws': ws, 'wl': wl, 'c': c, 'm': m, 'y': y, 'k': k,
+            'lab_l': lab[0], 'lab_a': lab_a, 'lab_b': lab_b, 'lch_c': lch_c, 'lch_h': lch_h,
+            'ok_l': oklab[0], 'ok_a': ok_a, 'ok_b': ok_b, 'oklch_c': oklch_c, 'oklch_h': oklch_h}
+
+
+class FormatTemplate:
+    """A named pattern, checked and compiled when created; format(argb) renders it."""
+    __slots__ = ('name', 'pattern', 'fields', '_format', '_getters', '_needs_record')
+
+    def __init__(self, name: str, pattern: str):
+        if not pattern:
+            raise ValueError("pattern is empty")
+        fields, positional = [], []
+        try:
+            parsed = list(string.Formatter().parse(pattern))
+        except ValueError as e:
+            raise ValueError(f"cannot parse pattern: {e}") from None
+        for literal, field, spec, conversion in parsed:
+            positional.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None: continue
+            if field not in FIELDS:
+                raise ValueError(f"unknown field '{{{field}}}'" if field else "empty field '{}'; name a field, e.g. {r}")
+            if "{" in spec:
+                raise ValueError(f"nested fields in the format spec of '{{{field}}}' are not supported")
+            if field not in fields: fields.append(field)
+            positional.append(f"{{{fields.index(field)}{'!' + conversion if conversion else ''}{':' + spec if spec else ''}}}")
+        # The pattern becomes a positional one ("vec3({0:.3f}, ...)") whose arguments are plain numbers and
+        # strings, so it can name no attribute or item; None marks a field taken from the FORMAT_CACHE record.
+        self._format = "".join(positional).format
+        self._getters = tuple(_CHANNEL_GETTERS.get(f) for f in fields)
+        self.name = name
+        self.pattern = pattern
+        self.fields = tuple(fields)
+        self._needs_record = any(f in RECORD_FIELDS for f in fields)
+        try:
+            self.format(_SAMPLE_COLOR)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"pattern does not format a color: {e}") from None
+
+    def format(self, argb: int) -> str:
+        argb &= 0xFFFFFFFF
+        record = _record_fields(FORMAT_CACHE.get(argb)) if self._needs_record else None
+        return self._format(*[get(argb) if get is not None else record[f] for f, get in zip(self.fields, self._getters)])
+
+    def __repr__(self):
+        return f"FormatTemplate({self.name!r}, {self.pattern!r})"
+
+
+def _as_pattern(value) -> str:
+    # QSettings returns an unquoted INI value containing commas as a list.
+    if isinstance(value, (list, tuple)): return ", ".join(str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+def load_format_templates(settings=None) -> dict:
+    """Built-in templates merged with the [formatTemplates] group, by name; invalid ones are logged and skipped."""
+    templates = {name: FormatTemplate(name, pattern) for name, pattern in BUILTIN_TEMPLATES}
+    if settings is None: return templates
+    settings.beginGroup(FORMAT_TEMPLATES_GROUP)
+    try:
+        for name in settings.childKeys():
+            try:
+                template = FormatTemplate(name, _as_pattern(settings.value(name)))
+            except ValueError as e:
+                log_message(f"Format templates: Ignoring invalid template '{name}' in settings: {e}")
+                continue
+            if name in templates: log_message(f"Format templates: User template '{name}' replaces the built-in one.")
+            templates[name] = template
+    finally:
+        settings.endGroup()
+    log_message(f"Format templates: {len(templates)} loaded ({', '.join(templates)}).")
+    return templates
+
+
+def load_button_bindings(settings, templates: dict) -> dict:
+    """Copy button id -> FormatTemplate from the [formatButtons] group; empty entries keep the built-in format."""
+    bindings = {}
+    if settings is None: return bindings
+    settings.beginGroup(FORMAT_BUTTONS_GROUP)
+    try:
+        for button in settings.childKeys():
+            name = _as_pattern(settings.value(button)).strip()
+            if not name: continue
+            if button not in COPY_BUTTONS:
+                log_message(f"Format templates: Unknown copy button '{button}' in [{FORMAT_BUTTONS_GROUP}] (use one of {', '.join(COPY_BUTTONS)}).")
+            elif name not in templates:
+                log_message(f"Format templates: Button '{button}' is bound to unknown template '{name}'.")
+            else:
+                bindings[button] = templates[name]
+    finally:
+        settings.endGroup()
+    return bindings
@@ -0,0 +1,93 @@
+"""
+Compact storage for color palettes of any size.
+
+PaletteModel keeps colors as packed 32-bit ARGB values in an array('I') plus
+a bytearray mask of filled slots, so a palette of thousands of swatches is
+two flat buffers rather than one QColor object per cell. The palette views
+read it directly and only build QColor objects for the cells they paint.
+
+Palettes are stored in the INI as lists of "#AARRGGBB" strings; an empty
+string marks an empty slot.
+"""
+from array import array
+
+from PySide6.QtGui import QColor
+
+EMPTY_SLOT = ""
+
+
+def parse_color_string(text) -> int:
+    """ARGB value of "#RRGGBB", "#AARRGGBB" or any other QColor name; -1 if empty or invalid."""
+    if not isinstance(text, str) or not text: return -1
+    if text[0] == "#":
+        digits = text[1:]
+        try:
+            value = int(digits, 16)
+        except ValueError:
+            return -1
+        if len(digits) == 6: return 0xFF000000 | value
+        if len(digits) == 8: return value
+    color = QColor(text)
+    return color.rgba() if color.isValid() else -1
+
+
+class PaletteModel:
+    """Fixed-capacity list of color slots, each either empty or holding one ARGB color."""
+    def __init__(self, size: int = 0):
+        self.colors = array('I', bytes(4 * size))
+        self.filled = bytearray(size)
+
+    def __len__(self):
+        return len(self.filled)
+
+    def resize(self, size: int):
+        """Grows with empty slots or truncates to size."""
+        current = len(self.filled)
+        if size > current:
+            self.colors.frombytes(bytes(4 * (size - current)))
+            self.filled.extend(bytes(size - current))
+        elif size < current:
+            del self.colors[size:]
+            del self.filled[size:]
+
+    def is_filled(self, idx: int) -> bool:
+        return bool(self.filled[idx])
+
+    def argb(self, idx: int) -> int:
+        return self.colors[idx]
+
+    def color(self, idx: int, empty_color: QColor = None):
+        """QColor of a slot; empty_color (or None) for an empty one."""
+        return QColor.fromRgba(self.colors[idx]) if self.filled[idx] else empty_color
+
+    def set_argb(self, idx: int, argb: int):
+        self.colors[idx] = argb & 0xFFFFFFFF
+        self.filled[idx] = 1
+
+    def set_color(self, idx: int, color: QColor):
+        self.set_argb(idx, color.rgba())
+
+    def clear(self, idx: int = None):
+        """Empties one slot, or all slots if idx is None."""
+        if idx is None:
+            self.filled[:] = bytes(len(self.filled))
+        else:
+            self.filled[idx] = 0
+
+    def filled_count(self) -> int:
+        return len(self.filled) - self.filled.count(0)
+
+    def load_strings(self, strings, min_size: int = 0) -> int:
+        """Replaces the contents with parsed color strings; returns how many slots were filled."""
+        self.colors = array('I', bytes(4 * max(len(strings), min_size)))
+        self.filled = bytearray(len(self.colors))
+        colors, filled, loaded = self.colors, self.filled, 0
+        for idx, text in enumerate(strings):
+            value = parse_color_string(text)
+            if value >= 0:
+                colors[idx] = value; filled[idx] = 1; loaded += 1
+        return loaded
+
+    def to_strings(self) -> list:
+        colors, filled = self.colors, self.filled
+        return [f"#{colors[idx]:08x}" if filled[idx] else EMPTY_SLOT for idx in range(len(filled))]
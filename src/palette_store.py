@@ -0,0 +1,244 @@
+"""
+Palette library: many named palettes in one SQLite file.
+
+Each palette is one row of metadata (name, kind, size, number of filled
+slots) plus one row holding its colors as two BLOBs: the PaletteModel's
+packed little-endian ARGB array and its filled mask. Listing the library
+reads only the metadata table; the colors of a palette are read the first
+time it is loaded and cached after that. Saving a palette replaces its two
+BLOBs in a single transaction, so an interrupted write leaves the previous
+version intact.
+
+On first run migrate_from_settings() copies the palettes kept in the
+QSettings INI by earlier versions (the QColorDialog custom colors, Default
+Shades and User Palette string lists) into the library. The INI entries are
+left in place so an older version still finds them.
+
+GIMP palettes (.gpl) can be imported with read_gpl().
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+
+from app_logging import log_message
+from palette_model import PaletteModel
+
+PALETTE_STORE_FILE_NAME = "palettes.sqlite3"
+SCHEMA_VERSION = 1
+
+KIND_USER = "user"          # shown in the User Palette selector
+KIND_SHADES = "shades"      # the Default Shades grid
+KIND_CUSTOM = "custom"      # the 16 QColorDialog custom colors
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS palettes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL DEFAULT 'user',
+    size INTEGER NOT NULL,
+    filled INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS palette_colors (
+    palette_id INTEGER PRIMARY KEY REFERENCES palettes(id) ON DELETE CASCADE,
+    colors BLOB NOT NULL,
+    mask BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def palette_store_path(settings) -> str:
+    """Library file next to the QSettings INI."""
+    return os.path.join(os.path.dirname(settings.fileName()), PALETTE_STORE_FILE_NAME)
+
+
+def _colors_to_blob(colors: array) -> bytes:
+    if sys.byteorder == "little": return colors.tobytes()
+    swapped = array('I', colors); swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _colors_from_blob(blob: bytes) -> array:
+    colors = array('I'); colors.frombytes(blob)
+    if sys.byteorder != "little": colors.byteswap()
+    return colors
+
+
+def model_snapshot(model: PaletteModel) -> tuple:
+    """(colors blob, mask blob) of a model, the form PaletteStore.save_snapshot() writes."""
+    return _colors_to_blob(model.colors), bytes(model.filled)
+
+
+class PaletteInfo:
+    """Library metadata of one palette; reading it never touches the colors."""
+    __slots__ = ('name', 'kind', 'size', 'filled')
+
+    def __init__(self, name: str, kind: str, size: int, filled: int):
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.filled = filled
+
+    def __repr__(self):
+        return f"PaletteInfo({self.name!r}, {self.kind!r}, {self.filled}/{self.size})"
+
+
+class PaletteStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._models = {}   # name -> PaletteModel loaded so far
+        self.loads = 0
+        self.saves = 0
+        directory = os.path.dirname(path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        # The settings writer saves from its worker thread; every use of the connection holds _lock.
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("PRAGMA foreign_keys=ON")
+            self._db.executescript(_SCHEMA)
+            self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def palettes(self, kind: str = None) -> list:
+        """PaletteInfo of every palette (of one kind), in creation order."""
+        query = "SELECT name, kind, size, filled FROM palettes"
+        args = ()
+        if kind is not None: query += " WHERE kind = ?"; args = (kind,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY id", args).fetchall()
+        return [PaletteInfo(*row) for row in rows]
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM palettes WHERE name = ?", (name,)).fetchone() is not None
+
+    def read_colors(self, name: str):
+        """(colors, filled) of a palette straight from the file, bypassing the model cache; None if missing."""
+        with self._lock:
+            row = self._db.execute("SELECT c.colors, c.mask FROM palettes p JOIN palette_colors c ON c.palette_id = p.id "
+                                   "WHERE p.name = ?", (name,)).fetchone()
+        if row is None: return None
+        return _colors_from_blob(row[0]), bytearray(row[1])
+
+    def load(self, name: str):
+        """The palette's model, read on first use and cached; None if there is no such palette."""
+        model = self._models.get(name)
+        if model is not None: return model
+        data = self.read_colors(name)
+        if data is None: return None
+        model = PaletteModel()
+        model.colors, model.filled = data
+        self.loads += 1
+        self._models[name] = model
+        return model
+
+    def snapshot(self, name: str) -> tuple:
+        """Bytes of the cached model of name, as save_snapshot() expects them (call on the GUI thread)."""
+        return model_snapshot(self._models[name])
+
+    def save_snapshot(self, name: str, snapshot: tuple, kind: str = KIND_USER):
+        """Writes (colors blob, mask blob) as palette name, creating it if needed; safe from any thread."""
+        colors, mask = snapshot
+        size = len(mask); filled = size - mask.count(0)
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT id FROM palettes WHERE name = ?", (name,)).fetchone()
+                if row is None:
+                    palette_id = db.execute("INSERT INTO palettes (name, kind, size, filled, modified) VALUES (?, ?, ?, ?, ?)",
+                                            (name, kind, size, filled, time.time())).lastrowid
+                else:
+                    palette_id = row[0]
+                    db.execute("UPDATE palettes SET size = ?, filled = ?, modified = ? WHERE id = ?", (size, filled, time.time(), palette_id))
+                db.execute("INSERT OR REPLACE INTO palette_colors (palette_id, colors, mask) VALUES (?, ?, ?)", (palette_id, colors, mask))
+                db.execute("COMMIT")
+            except sqlite3.Error:
+                db.execute("ROLLBACK")
+                raise
+            self.saves += 1
+
+    def save(self, name: str, model: PaletteModel, kind: str = KIND_USER):
+        """Makes model the cached palette name and writes it synchronously."""
+        self._models[name] = model
+        self.save_snapshot(name, model_snapshot(model), kind)
+
+    def delete(self, name: str):
+        self._models.pop(name, None)
+        with self._lock:
+            self._db.execute("DELETE FROM palettes WHERE name = ?", (name,))
+
+    def unique_name(self, base: str) -> str:
+        """base, or base followed by the first free number."""
+        name, n = base, 2
+        while name in self: name = f"{base} {n}"; n += 1
+        return name
+
+    def meta(self, key: str, default=None):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def migrate_from_settings(self, settings, sources) -> int:
+        """
+        Copies INI palettes into the library once. sources is a list of
+        (settings key, palette name, kind, minimum size); returns how many
+        palettes were migrated.
+        """
+        if self.meta("migratedFromSettings"): return 0
+        migrated = 0
+        for key, name, kind, min_size in sources:
+            if name in self or not settings.contains(key): continue
+            strings = settings.value(key, [])
+            if isinstance(strings, str): strings = [strings]
+            model = PaletteModel()
+            loaded = model.load_strings(strings if isinstance(strings, list) else [], min_size)
+            self.save(name, model, kind)
+            migrated += 1
+            log_message(f"Palette store: Migrated '{key}' from the settings file as '{name}' ({loaded} colors).")
+        self.set_meta("migratedFromSettings", time.strftime("%Y-%m-%d %H:%M:%S"))
+        return migrated
+
+    def stats(self) -> dict:
+        return {'palettes_cached': len(self._models), 'loads': self.loads, 'saves': self.saves}
+
+
+def read_gpl(path: str) -> tuple:
+    """Parses a GIMP palette file; returns (palette name, list of ARGB values)."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    colors = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+    if not lines or lines[0].strip() != "GIMP Palette":
+        raise ValueError(f"'{path}' is not a GIMP palette (missing 'GIMP Palette' header).")
+    for line in lines[1:]:
+        line = line.strip()
+        if not line or line.startswith("#"): continue
+        if line.startswith("Name:"): name = line[5:].strip() or name; continue
+        if line.startswith("Columns:"): continue
+        parts = line.split(None, 3)
+        try:
+            r, g, b = (int(v) for v in parts[:3])
+        except ValueError:
+            raise ValueError(f"'{path}': cannot read color line '{line}'.") from None
+        if not all(0 <= v <= 255 for v in (r, g, b)):
+            raise ValueError(f"'{path}': color value out of range in '{line}'.")
+        colors.append(0xFF000000 | (r << 16) | (g << 8) | b)
+    return name, colors
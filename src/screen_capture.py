@@ -0,0 +1,639 @@
+"""
+Screen capture backends for the picker and the magnifier.
+
+Every backend returns a CapturedRegion whose pixels are stored as BGRX bytes,
+the native layout of Windows GDI, X11 and QImage.Format_RGB32, so consumers
+can read single pixels, view the buffer as a numpy array or wrap it in a
+QImage without converting it.
+
+select_capture_backend() benchmarks the backends that work on the current
+machine once and caches the winner in the QSettings INI under
+CAPTURE_BACKEND_KEY.
+"""
+import contextlib
+import ctypes
+import ctypes.util
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from PIL import Image
+from PySide6.QtCore import QObject, QPoint, QThread, Qt, Signal, Slot
+from PySide6.QtGui import QGuiApplication, QImage
+
+from app_logging import log_message
+
+ImageGrab = None
+try:
+    from PIL import ImageGrab
+except ImportError:
+    log_message("Screen capture: PIL.ImageGrab is not available on this platform.")
+
+mss = None
+try:
+    import mss
+except ImportError:
+    pass
+
+np = None
+try:
+    import numpy as np
+except ImportError:
+    pass
+
+CAPTURE_BACKEND_KEY = "capture/backend"
+
+
+class CapturedRegion:
+    """
+    A captured screen rectangle in global desktop coordinates. data holds
+    width * height BGRX pixels (4 bytes each, row-major, no padding).
+    """
+    __slots__ = ('x', 'y', 'width', 'height', 'data')
+
+    def __init__(self, x: int, y: int, width: int, height: int, data: bytes):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.data = data
+
+    def pixel(self, px: int, py: int):
+        """Returns (r, g, b) of the pixel at (px, py) relative to the region origin."""
+        offset = (py * self.width + px) * 4
+        data = self.data
+        return data[offset + 2], data[offset + 1], data[offset]
+
+    def center_pixel(self):
+        return self.pixel(self.width // 2, self.height // 2)
+
+    def to_pil(self) -> Image.Image:
+        return Image.frombuffer('RGB', (self.width, self.height), self.data, 'raw', 'BGRX', 0, 1)
+
+
+class CaptureBackend(ABC):
+    """Interface of a screen capture backend."""
+    name = ""
+
+    def is_available(self) -> bool:
+        return True
+
+    def interrupt(self):
+        """Makes a grab() blocked in another thread return early (with an exception); most backends never block."""
+        pass
+
+    @abstractmethod
+    def grab(self, x: int, y: int, width: int, height: int) -> CapturedRegion:
+        """The BGRX pixels of the width x height screen area at (x, y)."""
+
+    def close(self):
+        pass
+
+
+class PilCaptureBackend(CaptureBackend):
+    """PIL ImageGrab. On Windows it grabs the whole virtual desktop and crops it."""
+    name = "pil"
+
+    def is_available(self) -> bool:
+        return ImageGrab is not None
+
+    def grab(self, x: int, y: int, width: int, height: int) -> CapturedRegion:
+        img = ImageGrab.grab(bbox=(x, y, x + width, y + height), all_screens=True)
+        if img.mode != 'RGB': img = img.convert('RGB')
+        if img.size != (width, height): img = img.resize((width, height), Image.Resampling.NEAREST)
+        return CapturedRegion(x, y, width, height, img.tobytes('raw', 'BGRX'))
+
+
+def _qt_grab(x: int, y: int, width: int, height: int) -> CapturedRegion:
+    point = QPoint(x, y)
+    screen = QGuiApplication.screenAt(point) or QGuiApplication.primaryScreen()
+    if screen is None:
+        raise RuntimeError("No screen available for grabWindow.")
+    geometry = screen.geometry()
+    # With window id 0 the offset is relative to the screen being grabbed.
+    image = screen.grabWindow(0, x - geometry.x(), y - geometry.y(), width, height).toImage()
+    if image.isNull():
+        raise RuntimeError("QScreen.grabWindow returned a null image.")
+    if image.width() != width or image.height() != height:
+        # High-DPI screens return device pixels.
+        image = image.scaled(width, height)
+    if image.format() != QImage.Format.Format_RGB32:
+        image = image.convertToFormat(QImage.Format.Format_RGB32)
+    return CapturedRegion(x, y, width, height, bytes(image.constBits())[:width * height * 4])
+
+
+class _GuiThreadGrabber(QObject):
+    """Runs QScreen.grabWindow on the GUI thread on behalf of worker threads."""
+    grabRequested = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._request = None
+        self._result = None
+        self.grabRequested.connect(self._grab_on_gui_thread, Qt.ConnectionType.QueuedConnection)
+
+    @Slot()
+    def _grab_on_gui_thread(self):
+        request = self._request
+        if request is None: return   # cancelled, or queued for a request that already gave up
+        try:
+            result = _qt_grab(*request)
+        except Exception as e:
+            result = e
+        if self._request is request:
+            self._result = result
+            self._done.set()
+
+    def grab(self, x: int, y: int, width: int, height: int, timeout: float = 1.0) -> CapturedRegion:
+        with self._lock:
+            request = (x, y, width, height)
+            self._result = None
+            self._done.clear()
+            self._request = request
+            self.grabRequested.emit()
+            done = self._done.wait(timeout)
+            self._request = None
+            if not done:
+                raise TimeoutError("GUI thread did not service the screen grab in time.")
+            if self._result is None:
+                raise InterruptedError("Screen grab was cancelled.")
+            if isinstance(self._result, Exception):
+                raise self._result
+            return self._result
+
+    def cancel(self):
+        """Wakes a worker waiting in grab(), which then raises InterruptedError instead of waiting for the GUI thread."""
+        self._request = None
+        self._done.set()
+
+
+class QtCaptureBackend(CaptureBackend):
+    """
+    QScreen.grabWindow. Qt only allows screen grabs on the GUI thread, so calls
+    from other threads are marshalled there and wait for the result.
+    """
+    name = "qt"
+
+    def __init__(self):
+        self._gui_grabber = None
+        app = QGuiApplication.instance()
+        if app is not None:
+            self._gui_grabber = _GuiThreadGrabber()
+            if QThread.currentThread() != app.thread():
+                self._gui_grabber.moveToThread(app.thread())
+
+    def is_available(self) -> bool:
+        return QGuiApplication.instance() is not None
+
+    def grab(self, x: int, y: int, width: int, height: int) -> CapturedRegion:
+        app = QGuiApplication.instance()
+        if app is None:
+            raise RuntimeError("QtCaptureBackend needs a running QGuiApplication.")
+        if QThread.currentThread() == app.thread():
+            return _qt_grab(x, y, width, height)
+        return self._gui_grabber.grab(x, y, width, height)
+
+    def interrupt(self):
+        # Called from the GUI thread before joining a worker, which cannot service the grab the worker waits for.
+        if self._gui_grabber is not None: self._gui_grabber.cancel()
+
+
+class MssCaptureBackend(CaptureBackend):
+    """The mss library (BitBlt on Windows, XGetImage on X11). One instance per thread."""
+    name = "mss"
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances = []
+
+    def is_available(self) -> bool:
+        return mss is not None
+
+    def _sct(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock: self._instances.append(sct)
+        return sct
+
+    def grab(self, x: int, y: int, width: int, height: int) -> CapturedRegion:
+        shot = self._sct().grab({'left': x, 'top': y, 'width': width, 'height': height})
+        return CapturedRegion(x, y, width, height, bytes(shot.bgra))
+
+    def close(self):
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for sct in instances:
+            try: sct.close()
+            except Exception: pass
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [('shmseg', ctypes.c_ulong), ('shmid', ctypes.c_int),
+                ('shmaddr', ctypes.c_void_p), ('readOnly', ctypes.c_int)]
+
+
+class _XImage(ctypes.Structure):
+    # Leading fields of Xlib's XImage; the rest of the struct is never touched.
+    _fields_ = [('width', ctypes.c_int), ('height', ctypes.c_int), ('xoffset', ctypes.c_int),
+                ('format', ctypes.c_int), ('data', ctypes.c_void_p), ('byte_order', ctypes.c_int),
+                ('bitmap_unit', ctypes.c_int), ('bitmap_bit_order', ctypes.c_int),
+                ('bitmap_pad', ctypes.c_int), ('depth', ctypes.c_int),
+                ('bytes_per_line', ctypes.c_int), ('bits_per_pixel', ctypes.c_int)]
+
+
+_X_ERROR_HANDLER_FUNC = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+# XSetErrorHandler is process-wide: one thread at a time installs the handler around its XShm calls.
+_x_error_lock = threading.Lock()
+_x_error_state = threading.local()
+
+
+def _on_x_error(display, event):
+    # Xlib's default handler terminates the process; flag the error for the thread that made the call instead.
+    _x_error_state.failed = True
+    return 0
+
+
+# One callback for the whole process, never freed, so Xlib never holds a pointer into a collected backend.
+_X_ERROR_HANDLER = _X_ERROR_HANDLER_FUNC(_on_x_error)
+
+
+class X11ShmCaptureBackend(CaptureBackend):
+    """
+    X11 MIT-SHM (XShmGetImage) through ctypes: the server copies pixels straight
+    into a shared-memory segment. Each thread gets its own display connection
+    and one segment per region size. Areas outside the root window are black.
+    """
+    name = "x11shm"
+    _IPC_PRIVATE = 0
+    _IPC_CREAT = 0o1000
+    _IPC_RMID = 0
+    _ZPIXMAP = 2
+    _ALL_PLANES = ctypes.c_ulong(-1)
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._states = []
+        self._xlib = self._xext = self._libc = None
+        if not os.environ.get('DISPLAY'):
+            return
+        try:
+            x11_path, xext_path = ctypes.util.find_library('X11'), ctypes.util.find_library('Xext')
+            if not (x11_path and xext_path):
+                return
+            self._xlib = ctypes.CDLL(x11_path)
+            self._xext = ctypes.CDLL(xext_path)
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            self._declare_prototypes()
+        except (OSError, AttributeError) as e:
+            log_message(f"Screen capture: X11 shared-memory backend unavailable: {e}")
+            self._xlib = None
+
+    def _declare_prototypes(self):
+        xlib, xext, libc = self._xlib, self._xext, self._libc
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultVisual.restype = ctypes.c_void_p
+        xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XFree.argtypes = [ctypes.c_void_p]
+        # void pointers both ways, so the handler XSetErrorHandler returns can be put back as it is.
+        xlib.XSetErrorHandler.argtypes = [ctypes.c_void_p]
+        xlib.XSetErrorHandler.restype = ctypes.c_void_p
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                         ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo),
+                                         ctypes.c_uint, ctypes.c_uint]
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage),
+                                      ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    @contextlib.contextmanager
+    def _trapped_x_errors(self):
+        """
+        Installs _X_ERROR_HANDLER for the block and restores the previous
+        handler (mss's, Qt's or Xlib's default) after it; the block reads
+        _x_error_state.failed. Every call in it must round-trip (XSync or a
+        reply) so that its errors arrive before the handler is restored.
+        """
+        with _x_error_lock:
+            _x_error_state.failed = False
+            previous = self._xlib.XSetErrorHandler(ctypes.cast(_X_ERROR_HANDLER, ctypes.c_void_p))
+            try:
+                yield
+            finally:
+                self._xlib.XSetErrorHandler(previous)
+
+    def _display_state(self):
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            display = self._xlib.XOpenDisplay(None)
+            if not display:
+                raise RuntimeError("XOpenDisplay failed.")
+            if not self._xext.XShmQueryExtension(display):
+                self._xlib.XCloseDisplay(display)
+                raise RuntimeError("X server does not support MIT-SHM.")
+            screen = self._xlib.XDefaultScreen(display)
+            state = {
+                'display': display,
+                'root': self._xlib.XDefaultRootWindow(display),
+                'visual': self._xlib.XDefaultVisual(display, screen),
+                'depth': self._xlib.XDefaultDepth(display, screen),
+                'root_size': (self._xlib.XDisplayWidth(display, screen), self._xlib.XDisplayHeight(display, screen)),
+                'images': {},
+            }
+            self._local.state = state
+            with self._lock: self._states.append(state)
+        return state
+
+    def _shm_image(self, state, width: int, height: int):
+        key = (width, height)
+        cached = state['images'].get(key)
+        if cached is not None:
+            return cached
+        shminfo = _XShmSegmentInfo()
+        ximage = self._xext.XShmCreateImage(state['display'], state['visual'], state['depth'],
+                                            self._ZPIXMAP, None, ctypes.byref(shminfo), width, height)
+        if not ximage:
+            raise RuntimeError("XShmCreateImage failed.")
+        if ximage.contents.bits_per_pixel != 32:
+            self._xlib.XFree(ximage)
+            raise RuntimeError(f"Unsupported X11 pixel size: {ximage.contents.bits_per_pixel} bits.")
+        size = ximage.contents.bytes_per_line * height
+        shminfo.shmid = self._libc.shmget(self._IPC_PRIVATE, size, self._IPC_CREAT | 0o600)
+        if shminfo.shmid < 0:
+            self._xlib.XFree(ximage)
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        address = self._libc.shmat(shminfo.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            self._libc.shmctl(shminfo.shmid, self._IPC_RMID, None)
+            self._xlib.XFree(ximage)
+            raise OSError(ctypes.get_errno(), "shmat failed")
+        shminfo.shmaddr = address
+        shminfo.readOnly = 0
+        ximage.contents.data = address
+        with self._trapped_x_errors():
+            self._xext.XShmAttach(state['display'], ctypes.byref(shminfo))
+            self._xlib.XSync(state['display'], 0)
+            failed = _x_error_state.failed
+        # Mark the segment for removal now; it disappears once both sides detach.
+        self._libc.shmctl(shminfo.shmid, self._IPC_RMID, None)
+        if failed:
+            self._libc.shmdt(address)
+            self._xlib.XFree(ximage)
+            raise RuntimeError("XShmAttach failed.")
+        cached = (ximage, shminfo)
+        state['images'][key] = cached
+        return cached
+
+    def is_available(self) -> bool:
+        if self._xlib is None:
+            return False
+        try:
+            self._display_state()
+            return True
+        except Exception as e:
+            log_message(f"Screen capture: X11 shared-memory backend unavailable: {e}")
+            return False
+
+    def grab(self, x: int, y: int, width: int, height: int) -> CapturedRegion:
+        state = self._display_state()
+        root_w, root_h = state['root_size']
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + width, root_w), min(y + height, root_h)
+        if right <= left or bottom <= top:
+            return CapturedRegion(x, y, width, height, bytes(width * height * 4))
+        inner_w, inner_h = right - left, bottom - top
+        ximage, shminfo = self._shm_image(state, inner_w, inner_h)
+        with self._trapped_x_errors():
+            ok = self._xext.XShmGetImage(state['display'], state['root'], ximage, left, top, self._ALL_PLANES)
+            failed = _x_error_state.failed
+        if not ok or failed:
+            raise RuntimeError("XShmGetImage failed.")
+        stride = ximage.contents.bytes_per_line
+        raw = ctypes.string_at(shminfo.shmaddr, stride * inner_h)
+        row_bytes = inner_w * 4
+        if (inner_w, inner_h) == (width, height):
+            data = raw if stride == row_bytes else b"".join(raw[r * stride:r * stride + row_bytes] for r in range(inner_h))
+            return CapturedRegion(x, y, width, height, data)
+        # Part of the request lies outside the root window: pad it with black.
+        out = bytearray(width * height * 4)
+        dst_x = (left - x) * 4
+        for r in range(inner_h):
+            dst = ((top - y + r) * width) * 4 + dst_x
+            out[dst:dst + row_bytes] = raw[r * stride:r * stride + row_bytes]
+        return CapturedRegion(x, y, width, height, bytes(out))
+
+    def close(self):
+        with self._lock:
+            states, self._states = self._states, []
+        for state in states:
+            try:
+                with self._trapped_x_errors():
+                    for ximage, shminfo in state['images'].values():
+                        self._xext.XShmDetach(state['display'], ctypes.byref(shminfo))
+                    self._xlib.XSync(state['display'], 0)
+                for ximage, shminfo in state['images'].values():
+                    self._libc.shmdt(shminfo.shmaddr)
+                    self._xlib.XFree(ximage)
+                self._xlib.XCloseDisplay(state['display'])
+            except Exception as e:
+                log_message(f"Screen capture: error while closing X11 display: {e}")
+
+
+class SyntheticCaptureBackend(CaptureBackend):
+    """
+    In-memory test pattern (B = x, G = y, R = x ^ y, each modulo 256) for
+    benchmarks and headless runs. It never touches the screen and is never
+    picked automatically; select it explicitly with capture/backend=synthetic.
+    """
+    name = "synthetic"
+
+    def grab(self, x: int, y: int, width: int, height: int) -> CapturedRegion:
+        if np is not None:
+            xs = (np.arange(x, x + width, dtype=np.int64) & 0xFF).astype(np.uint32)
+            ys = (np.arange(y, y + height, dtype=np.int64) & 0xFF).astype(np.uint32)[:, None]
+            pixels = np.uint32(0xFF000000) | ((xs ^ ys) << 16) | (ys << 8) | xs
+            return CapturedRegion(x, y, width, height, pixels.astype('<u4').tobytes())
+        data = bytearray(width * height * 4)
+        offset = 0
+        for py in range(y, y + height):
+            g = py & 0xFF
+            for px in range(x, x + width):
+                b = px & 0xFF
+                data[offset:offset + 4] = bytes((b, g, b ^ g, 0xFF))
+                offset += 4
+        return CapturedRegion(x, y, width, height, bytes(data))
+
+
+class SnapshotCaptureBackend(CaptureBackend):
+    """
+    Serves grabs from one frozen capture of the whole virtual desktop held in a
+    single contiguous BGRX buffer. A pixel is one index computation and a
+    region is a handful of row slices; areas outside the snapshot are black.
+    """
+    name = "snapshot"
+
+    def __init__(self, snapshot: CapturedRegion):
+        self.snapshot = snapshot
+        self._pixels = None
+        if np is not None:
+            self._pixels = np.frombuffer(snapshot.data, dtype=np.uint32).reshape(snapshot.height, snapshot.width)
+
+    @classmethod
+    def from_desktop(cls, backend: CaptureBackend):
+        """Captures every screen once through backend and stitches them into one snapshot."""
+        return cls(capture_virtual_desktop(backend))
+
+    def pixel(self, x: int, y: int):
+        """Returns (r, g, b) at global desktop coordinates, black outside the snapshot."""
+        snap = self.snapshot
+        px, py = x - snap.x, y - snap.y
+        if 0 <= px < snap.width and 0 <= py < snap.height:
+            return snap.pixel(px, py)
+        return 0, 0, 0
+
+    def grab(self, x: int, y: int, width: int, height: int) -> CapturedRegion:
+        snap = self.snapshot
+        if width == 1 and height == 1:
+            r, g, b = self.pixel(x, y)
+            return CapturedRegion(x, y, 1, 1, bytes((b, g, r, 0xFF)))
+        left, top = max(x, snap.x), max(y, snap.y)
+        right, bottom = min(x + width, snap.x + snap.width), min(y + height, snap.y + snap.height)
+        if left == x and top == y and right == x + width and bottom == y + height and self._pixels is not None:
+            block = self._pixels[y - snap.y:bottom - snap.y, x - snap.x:right - snap.x]
+            return CapturedRegion(x, y, width, height, block.tobytes())
+        out = bytearray(width * height * 4)
+        if right > left and bottom > top:
+            row_bytes = (right - left) * 4
+            for row in range(top, bottom):
+                src = ((row - snap.y) * snap.width + (left - snap.x)) * 4
+                dst = ((row - y) * width + (left - x)) * 4
+                out[dst:dst + row_bytes] = snap.data[src:src + row_bytes]
+        return CapturedRegion(x, y, width, height, bytes(out))
+
+
+def capture_virtual_desktop(backend: CaptureBackend) -> CapturedRegion:
+    """
+    Captures the bounding rectangle of all screens into one CapturedRegion.
+    Each screen is grabbed separately so backends limited to a single screen
+    (Qt) work too; gaps between screens of different sizes stay black.
+    """
+    screens = QGuiApplication.screens()
+    if not screens:
+        raise RuntimeError("No screens available for a desktop snapshot.")
+    virtual = screens[0].virtualGeometry()
+    vx, vy, vw, vh = virtual.x(), virtual.y(), virtual.width(), virtual.height()
+    if len(screens) == 1:
+        return backend.grab(vx, vy, vw, vh)
+    out = bytearray(vw * vh * 4)
+    for screen in screens:
+        geo = screen.geometry()
+        region = backend.grab(geo.x(), geo.y(), geo.width(), geo.height())
+        row_bytes = region.width * 4
+        for row in range(region.height):
+            dst = ((region.y - vy + row) * vw + (region.x - vx)) * 4
+            out[dst:dst + row_bytes] = region.data[row * row_bytes:(row + 1) * row_bytes]
+    return CapturedRegion(vx, vy, vw, vh, bytes(out))
+
+
+CAPTURE_BACKEND_CLASSES = {
+    cls.name: cls for cls in (PilCaptureBackend, QtCaptureBackend, MssCaptureBackend,
+                              X11ShmCaptureBackend, SyntheticCaptureBackend)
+}
+AUTO_SELECT_BACKENDS = ("x11shm", "mss", "qt", "pil")
+
+
+def create_capture_backend(name: str):
+    """Instantiates a backend by name; returns None for unknown or unavailable backends."""
+    cls = CAPTURE_BACKEND_CLASSES.get(name)
+    if cls is None:
+        return None
+    try:
+        backend = cls()
+        if backend.is_available():
+            return backend
+        backend.close()
+    except Exception as e:
+        log_message(f"Screen capture: could not create backend '{name}': {e}")
+    return None
+
+
+def benchmark_capture_backends(backends, width: int = 10, height: int = 10, rounds: int = 5):
+    """
+    Times a few grabs of a width x height region per backend. Returns a list of
+    (seconds_per_grab, backend) sorted fastest first; failing backends are left out.
+    """
+    results = []
+    for backend in backends:
+        try:
+            backend.grab(0, 0, width, height)  # warm-up (lazy handles, first-call costs)
+            timings = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                region = backend.grab(0, 0, width, height)
+                timings.append(time.perf_counter() - start)
+                if len(region.data) != width * height * 4:
+                    raise RuntimeError(f"returned {len(region.data)} bytes instead of {width * height * 4}")
+            timings.sort()
+            results.append((timings[len(timings) // 2], backend))
+        except Exception as e:
+            log_message(f"Screen capture: backend '{backend.name}' failed the benchmark: {e}")
+    results.sort(key=lambda item: item[0])
+    return results
+
+
+def select_capture_backend(settings=None) -> CaptureBackend:
+    """
+    Returns the backend cached in settings if it still works, otherwise benchmarks
+    all available backends, stores the fastest one in settings and returns it.
+    """
+    cached_name = str(settings.value(CAPTURE_BACKEND_KEY, "") or "") if settings is not None else ""
+    if cached_name:
+        backend = create_capture_backend(cached_name)
+        if backend is not None:
+            try:
+                backend.grab(0, 0, 1, 1)
+                log_message(f"Screen capture: using cached backend '{cached_name}'.")
+                return backend
+            except Exception as e:
+                log_message(f"Screen capture: cached backend '{cached_name}' failed ({e}), re-running benchmark.")
+                backend.close()
+        else:
+            log_message(f"Screen capture: cached backend '{cached_name}' is not available, re-running benchmark.")
+
+    candidates = [b for b in (create_capture_backend(name) for name in AUTO_SELECT_BACKENDS) if b is not None]
+    results = benchmark_capture_backends(candidates)
+    for seconds, backend in results:
+        log_message(f"Screen capture: backend '{backend.name}' grabs 10x10 in {seconds * 1000:.3f} ms.")
+    if not results:
+        log_message("Screen capture: no backend passed the benchmark, falling back to PIL ImageGrab.")
+        for backend in candidates: backend.close()
+        return PilCaptureBackend()
+    best = results[0][1]
+    for backend in candidates:
+        if backend is not best: backend.close()
+    if settings is not None:
+        settings.setValue(CAPTURE_BACKEND_KEY, best.name)
+    log_message(f"Screen capture: selected backend '{best.name}'.")
+    return best
@@ -0,0 +1,160 @@
+"""
+Write-behind persistence for the QSettings INI.
+
+Callers mark keys dirty as the user edits (a palette cell, a checkbox) and
+SettingsWriter batches the changes on a debounce timer. When the timer fires
+it snapshots the dirty values on the GUI thread, which is cheap (a palette is
+one list of strings), and hands them to a worker thread that stores them
+through its own QSettings instance and syncs. QSettings instances for the
+same file share one in-process cache, so the dialog's QSettings sees the new
+values, and with atomic syncing required QSettings writes the INI to a
+temporary file and renames it over the old one. A crash or kill mid-write
+therefore never leaves a truncated INI, and at most DEBOUNCE_MS of edits is
+lost. flush() forces out everything still pending and waits for it; call it
+on exit.
+
+A key registered with its own write function (the palette library, for
+instance) is written by calling that function on the worker thread instead
+of going into the INI.
+"""
+import threading
+import time
+
+from PySide6.QtCore import QObject, QSettings, QTimer
+
+from app_logging import log_message
+
+
+class SettingsWriter(QObject):
+    DEBOUNCE_MS = 500
+
+    def __init__(self, settings: QSettings, debounce_ms: int = DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self._file_name = settings.fileName()
+        self._format = settings.format()
+        self._snapshots = {}    # key -> callable returning the value to store
+        self._writers = {}      # key -> callable storing the value somewhere other than the INI
+        self._values = {}       # key -> value given to set_value() and not yet committed
+        self._dirty = {}        # key -> cells changed since the last commit
+        self._last_written = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self.commit)
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._queued = 0        # batches handed to the worker
+        self._done = 0          # batches the worker has finished
+        self.running = True
+        self.changes = 0
+        self.commits = 0
+        self.writes = 0
+        self.keys_written = 0
+        self.cells_written = 0
+        self.unchanged_skipped = 0
+        self.write_errors = 0
+        self.last_write_ms = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def register(self, key: str, snapshot, write=None):
+        """
+        Declares how to read the current value of key when it is dirty
+        (snapshot() runs on the GUI thread) and, optionally, how to store it
+        (write(value) runs on the worker thread).
+        """
+        self._snapshots[key] = snapshot
+        if write is not None: self._writers[key] = write
+
+    def remember(self, key: str, value):
+        """Records value as what the file already holds for key, so committing it unchanged is skipped."""
+        self._last_written[key] = value
+
+    def mark_dirty(self, key: str, cells: int = 1):
+        """Schedules key for writing; cells is how many entries of it changed (for stats)."""
+        self.changes += 1
+        self._dirty[key] = self._dirty.get(key, 0) + cells
+        if not self._timer.isActive(): self._timer.start()
+
+    def set_value(self, key: str, value):
+        """Stores a plain value through the write-behind queue."""
+        self._values[key] = value
+        self.mark_dirty(key)
+
+    def commit(self):
+        """Snapshots the dirty keys and queues them for the worker without waiting."""
+        self._timer.stop()
+        if not self._dirty: return
+        batch = {}
+        for key in self._dirty:
+            value = self._values.pop(key) if key in self._values else self._snapshots[key]()
+            if self._last_written.get(key) == value:
+                self.unchanged_skipped += 1
+                continue
+            batch[key] = value
+            self.cells_written += self._dirty[key]
+        self._dirty.clear()
+        if not batch: return
+        self._last_written.update(batch)
+        self.commits += 1
+        with self._cond:
+            self._pending.update(batch)
+            self._queued += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Commits pending changes and waits until they are on disk; False on timeout."""
+        self.commit()
+        with self._cond:
+            target = self._queued
+            return self._cond.wait_for(lambda: self._done >= target or not self._thread.is_alive(), timeout)
+
+    def stop(self, timeout: float = 5.0):
+        self.flush(timeout)
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread.is_alive(): self._thread.join(timeout=timeout)
+
+    def stats(self) -> dict:
+        return {'changes': self.changes, 'commits': self.commits, 'writes': self.writes, 'keys_written': self.keys_written,
+                'cells_written': self.cells_written, 'unchanged_skipped': self.unchanged_skipped, 'write_errors': self.write_errors,
+                'last_write_ms': round(self.last_write_ms, 2)}
+
+    def _run(self):
+        settings = QSettings(self._file_name, self._format)
+        settings.setAtomicSyncRequired(True)
+        while True:
+            with self._cond:
+                while self.running and not self._pending:
+                    self._cond.wait()
+                if not self._pending: break
+                batch, self._pending, batches = self._pending, {}, self._queued
+            start = time.perf_counter()
+            failed, to_ini = [], False
+            for key, value in batch.items():
+                write = self._writers.get(key)
+                if write is None:
+                    settings.setValue(key, value); to_ini = True
+                    continue
+                try:
+                    write(value)
+                except Exception as e:
+                    failed.append(key)
+                    log_message(f"SettingsWriter: Writing {key} failed: {e}")
+            if to_ini:
+                settings.sync()
+                if settings.status() != QSettings.Status.NoError:
+                    failed.extend(key for key in batch if key not in self._writers)
+                    log_message(f"SettingsWriter: Writing to '{self._file_name}' failed ({settings.status().name}).")
+            self.last_write_ms = (time.perf_counter() - start) * 1e3
+            if failed:
+                self.write_errors += 1
+                # Forget what was "written" so the next commit retries these keys.
+                for key in failed: self._last_written.pop(key, None)
+            else:
+                self.writes += 1
+            self.keys_written += len(batch) - len(failed)
+            with self._cond:
+                self._done = batches
+                self._cond.notify_all()
@@ -0,0 +1,63 @@
+"""
+color_conversion against QColor on a deterministic sample of the 24-bit RGB
+cube: every 97th color, the whole gray axis and the primaries/secondaries.
+benchmarks.py color_conversion_conformance checks the whole cube.
+"""
+import unittest
+
+from PySide6.QtGui import QColor
+
+import color_conversion
+from color_conversion import QCOLOR_HUE_MAX, QCOLOR_SAT_LUM_VAL_MAX, WIN_HUE_MAX, WIN_SAT_LUM_MAX
+
+
+def _sample() -> list:
+    """Packed ARGB values; the alpha varies so that it never leaks into the other channels unnoticed."""
+    rgb = list(range(0, 1 << 24, 97)) + [i * 0x010101 for i in range(256)]
+    rgb += [0xFF0000, 0x00FF00, 0x0000FF, 0xFFFF00, 0x00FFFF, 0xFF00FF, 0x000000, 0xFFFFFF]
+    return [(((i * 37) & 0xFF) << 24) | v for i, v in enumerate(rgb)]
+
+
+def _qcolor(argb: int) -> tuple:
+    """HSV, Windows HSL, CMYK and decimal of one color via QColor, as the dialog formats them."""
+    c = QColor.fromRgba(argb)
+    h, s, v, _ = c.getHsv(); l = c.lightness()
+    wh = (h / QCOLOR_HUE_MAX) * WIN_HUE_MAX if h != -1 else 0.0
+    hsl_win = [int(round(wh)), int(round((s / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX)),
+               int(round((l / QCOLOR_SAT_LUM_VAL_MAX) * WIN_SAT_LUM_MAX))]
+    return [h, s, v], hsl_win, list(c.getCmyk()[:4]), c.rgba()
+
+
+class ColorConversionConformanceTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.values = _sample()
+        cls.expected = [_qcolor(v) for v in cls.values]
+
+    @unittest.skipIf(color_conversion.np is None, "numpy is not installed")
+    def test_convert_all_matches_qcolor(self):
+        got = color_conversion.convert_all(self.values)
+        for i, key in enumerate(('hsv', 'hsl_win', 'cmyk', 'decimal')):
+            with self.subTest(key=key):
+                self.assertEqual(got[key].tolist(), [e[i] for e in self.expected])
+
+    @unittest.skipIf(color_conversion.np is None, "numpy is not installed")
+    def test_rgba_rows_match_packed_values(self):
+        packed = color_conversion.convert_all(self.values)
+        rows = color_conversion.convert_all(color_conversion.rgba_components(self.values).astype(color_conversion.np.uint8))
+        for key in ('hsv', 'hsl_win', 'cmyk', 'decimal'):
+            with self.subTest(key=key):
+                self.assertEqual(rows[key].tolist(), packed[key].tolist())
+
+    def test_color_formats_matches_qcolor(self):
+        # The pure-Python path behind the dialog's value panel and FORMAT_CACHE.
+        for argb, (hsv, hsl_win, cmyk, decimal) in zip(self.values[::7], self.expected[::7]):
+            f = color_conversion.color_formats(argb)
+            h, s, v = hsv
+            self.assertEqual((f['hsv_copy'], f['hsl_copy'], f['cmyk_copy'], f['decimal']),
+                             (f"{h if h != -1 else 0},{s},{v}", ",".join(map(str, hsl_win)), ",".join(map(str, cmyk)), str(decimal)),
+                             f"#{argb:08x}")
+
+
+if __name__ == "__main__":
+    unittest.main()
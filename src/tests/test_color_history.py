@@ -0,0 +1,115 @@
+"""ColorHistory: ring wraparound, time ranges, nearest picks, reopening the history file and compaction."""
+import math
+import os
+import random
+import tempfile
+import unittest
+
+import color_history
+from color_history import NO_POSITION, SOURCE_FROZEN_SCREEN, SOURCE_SCREEN, ColorHistory
+from color_spaces import argb_to_oklab
+
+T0 = 1_700_000_000.0
+
+
+@unittest.skipIf(color_history.np is None, "numpy is not installed")
+class ColorHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "color_history.bin")
+        self.colors = []
+
+    def _open(self, capacity: int, path: str = None) -> ColorHistory:
+        history = ColorHistory(capacity, path if path is not None else self.path)
+        self.addCleanup(history.close)   # runs before the directory is removed; the file is memory-mapped
+        return history
+
+    def _fill(self, history: ColorHistory, count: int):
+        """Pick i at x=i, y=-i, T0+i seconds."""
+        rng = random.Random(25)
+        for i in range(count):
+            argb = 0xFF000000 | rng.getrandbits(24)
+            self.colors.append(argb)
+            history.add(argb, i, -i, SOURCE_SCREEN, T0 + i)
+
+    def test_ring_wraps_around(self):
+        history = self._open(1000)
+        self._fill(history, 2500)
+        self.assertEqual((len(history), history.file.count), (1000, 2500))
+        self.assertEqual([e.x for e in history.recent(3)], [2499, 2498, 2497])
+        self.assertEqual([e.x for e in history.recent(10 ** 6)], list(range(2499, 1499, -1)))
+        self.assertEqual([e.argb for e in history.recent(2)], self.colors[:-3:-1])
+        # A range straddling the ring's wrap point, one that was overwritten and one open-ended.
+        self.assertEqual([e.x for e in history.recent(100, T0 + 1995, T0 + 2005)], list(range(2004, 1994, -1)))
+        self.assertEqual(history.count(T0 + 1600, T0 + 1610), 10)
+        self.assertEqual(history.count(T0, T0 + 1500), 0)
+        self.assertEqual(history.count(T0 + 2400, None), 100)
+
+    def test_nearest_matches_brute_force(self):
+        history = self._open(1000)
+        self._fill(history, 2500)
+        kept = self.colors[1500:]
+        for query in (0xFF336699, 0xFFFFFFFF, 0xFF000000, 0xFF80FF00):
+            expected = sorted(math.dist(argb_to_oklab(v), argb_to_oklab(query)) * 100.0 for v in kept)[:5]
+            got = history.nearest(query, 5)
+            self.assertEqual(len(got), 5)
+            for entry, delta_e in zip(got, expected):
+                self.assertAlmostEqual(entry.delta_e, delta_e, places=3)
+        in_range = history.nearest(0xFF336699, 5, None, T0 + 2000, T0 + 2100)
+        self.assertEqual(len(in_range), 5)
+        self.assertTrue(all(2000 <= e.x < 2100 for e in in_range))
+        self.assertTrue(all(e.delta_e <= 2.0 for e in history.nearest(0xFF336699, 50, 2.0)))
+
+    def test_reopen_keeps_newest_records(self):
+        history = self._open(1000)
+        self._fill(history, 2500)
+        history.close()
+        history = self._open(1000)
+        self.assertEqual((len(history), history.file.count), (1000, 2500))
+        self.assertEqual([(e.x, e.y, e.argb, e.time) for e in history.recent(2)],
+                         [(2499, -2499, self.colors[2499], T0 + 2499), (2498, -2498, self.colors[2498], T0 + 2498)])
+        # A clock set back: time ranges still find the out-of-order pick.
+        history.add(0xFF112233, 1, 1, SOURCE_FROZEN_SCREEN, T0 + 1700.5)
+        self.assertEqual([e.x for e in history.recent(100, T0 + 1700, T0 + 1701)], [1, 1700])
+        self.assertEqual(history.recent(1)[0].source_name, "frozen screen")
+
+    def test_compaction_at_open(self):
+        history = self._open(1000)
+        self._fill(history, 2500)
+        history.close()
+        size = os.path.getsize(self.path)
+        # 2500 records fit 4 capacities of 1000 but not of 200.
+        history = self._open(200)
+        self.assertEqual((len(history), history.file.count), (200, 200))
+        self.assertLess(os.path.getsize(self.path), size)
+        self.assertEqual([e.x for e in history.recent(10 ** 6)], list(range(2499, 2299, -1)))
+        history.close()
+        self.assertEqual(self._open(1000).file.count, 200)
+
+    def test_clear_and_entry_without_position(self):
+        history = self._open(10)
+        self._fill(history, 25)
+        history.clear()
+        self.assertEqual((len(history), history.file.count), (0, 0))
+        history.add(0xFFFFFFFF)
+        history.close()
+        history = self._open(10)
+        self.assertEqual(len(history), 1)
+        entry = history.recent()[0]
+        self.assertEqual((entry.argb, entry.x, entry.position), (0xFFFFFFFF, NO_POSITION, None))
+
+    def test_in_memory_history(self):
+        history = ColorHistory(4)
+        for i in range(6): history.add(0xFF000000 | i, timestamp=T0 + i)
+        self.assertIsNone(history.file)
+        self.assertEqual([e.argb & 0xFF for e in history.recent()], [5, 4, 3, 2])
+
+    def test_rejects_foreign_file(self):
+        with open(self.path, "wb") as f: f.write(b"XXXXXXXX" + bytes(120))
+        with self.assertRaises(ValueError):
+            ColorHistory(10, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
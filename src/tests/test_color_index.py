@@ -0,0 +1,79 @@
+"""ColorIndex.nearest() against a brute-force scan, on the plain-scan and grid paths and after slot edits."""
+import math
+import random
+import unittest
+
+import color_index
+from color_spaces import argb_to_oklab
+
+
+@unittest.skipIf(color_index.np is None, "numpy is not installed")
+class ColorIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(17)
+        self.index = color_index.ColorIndex()
+        self.colors = {}   # (source, slot) -> argb, what the index should hold
+
+    def _set_source(self, source: str, count: int):
+        colors = [0xFF000000 | self.rng.getrandbits(24) for _ in range(count)]
+        filled = [self.rng.random() < 0.9 for _ in range(count)]
+        self.index.set_source(source, colors, filled)
+        self.colors.update(((source, i), v) for i, v in enumerate(colors) if filled[i])
+
+    def _brute_force(self, argb: int, k: int, max_delta_e: float = None) -> list:
+        query = argb_to_oklab(argb)
+        found = sorted((math.dist(query, argb_to_oklab(v)) * 100.0, key) for key, v in self.colors.items())
+        if max_delta_e is not None: found = [f for f in found if f[0] <= max_delta_e]
+        return found[:k]
+
+    def _check(self, queries: int = 40):
+        for _ in range(queries):
+            argb = 0xFF000000 | self.rng.getrandbits(24)
+            for k, max_delta_e in ((1, None), (5, None), (8, 3.0), (3, 0.5)):
+                expected = self._brute_force(argb, k, max_delta_e)
+                got = self.index.nearest(argb, k, max_delta_e)
+                with self.subTest(argb=f"#{argb:08x}", k=k, max_delta_e=max_delta_e):
+                    self.assertEqual(len(got), len(expected))
+                    for match, (delta_e, _) in zip(got, expected):
+                        self.assertAlmostEqual(match.delta_e, delta_e, places=6)
+                        key = (match.source, match.slot)
+                        self.assertEqual(match.argb, self.colors[key])
+                        self.assertAlmostEqual(match.delta_e, math.dist(argb_to_oklab(argb), argb_to_oklab(match.argb)) * 100.0, places=6)
+
+    def test_small_index_matches_brute_force(self):
+        self._set_source("custom", 16); self._set_source("User Palette", 64)
+        self.assertLessEqual(len(self.index), color_index.ColorIndex.BRUTE_FORCE_MAX)
+        self._check()
+
+    def test_grid_matches_brute_force(self):
+        for n in range(3): self._set_source(f"palette {n}", 2000)
+        self.assertGreater(len(self.index), color_index.ColorIndex.BRUTE_FORCE_MAX)
+        self._check()
+
+    def test_edits_keep_grid_in_step(self):
+        for n in range(3): self._set_source(f"palette {n}", 2000)
+        keys = list(self.colors)
+        for key in self.rng.sample(keys, 500):
+            argb = 0xFF000000 | self.rng.getrandbits(24)
+            self.index.set(*key, argb); self.colors[key] = argb
+        for key in self.rng.sample(keys, 500):
+            self.index.remove(*key); self.colors.pop(key, None)
+        for key in [key for key in self.colors if key[0] == "palette 1"]:
+            del self.colors[key]
+        self._set_source("palette 1", 100)   # replaces the 2000-slot source
+        self.assertEqual(len(self.index), len(self.colors))
+        self._check()
+        self.assertLessEqual(self.index.stats()['grid_cells'], len(self.colors))
+
+    def test_exact_hit_and_empty_queries(self):
+        self._set_source("custom", 16)
+        key, argb = next(iter(self.colors.items()))
+        match = self.index.nearest(argb)[0]
+        self.assertEqual(match.argb, argb)
+        self.assertAlmostEqual(match.delta_e, 0.0, places=9)
+        self.assertEqual(self.index.nearest(argb, k=0), [])
+        self.assertEqual(color_index.ColorIndex().nearest(argb), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""FormatTemplate validation, the built-in templates' output and loading templates and button bindings from the INI."""
+import os
+import tempfile
+import unittest
+
+from PySide6.QtCore import QSettings
+
+from format_templates import BUILTIN_TEMPLATES, FormatTemplate, load_button_bindings, load_format_templates
+
+
+class FormatTemplateTest(unittest.TestCase):
+    def test_rejects_unsafe_and_invalid_patterns(self):
+        for pattern in ("{__class__}", "{r.__class__}", "{r.__class__.__mro__}", "{r[0]}", "{0}", "{}", "{r:{g}}",
+                        "{r:>{w}}", "{html:.2f}", "{r!z}", "rgb({r", "}", ""):
+            with self.subTest(pattern=pattern), self.assertRaises(ValueError):
+                FormatTemplate("bad", pattern)
+
+    def test_builtin_outputs(self):
+        templates = load_format_templates()
+        self.assertEqual(list(templates), [name for name, _ in BUILTIN_TEMPLATES])
+        expected = {
+            0x80336699: ["rgb(51, 102, 153)", "rgba(51, 102, 153, 0.502)", "lab(42.01% -0.15 -32.85)", "oklch(0.4993 0.0987 250.43)",
+                         "0x80336699", "vec3(0.200, 0.400, 0.600)", "vec4(0.200, 0.400, 0.600, 0.502)"],
+            # Grays print a and b as 0.00, never -0.00.
+            0xFF808080: ["rgb(128, 128, 128)", "rgba(128, 128, 128, 1)", "lab(53.59% 0.00 0.00)", "oklch(0.5999 0.0000 0.00)",
+                         "0xFF808080", "vec3(0.502, 0.502, 0.502)", "vec4(0.502, 0.502, 0.502, 1.000)"],
+        }
+        for argb, outputs in expected.items():
+            with self.subTest(argb=f"#{argb:08x}"):
+                self.assertEqual([t.format(argb) for t in templates.values()], outputs)
+
+    def test_user_pattern(self):
+        t = FormatTemplate("Unity", "Color32({r}, {g}, {b}, {a}) {{{html}}} {r:02x}{r:02X} H{h}")
+        self.assertEqual(t.fields, ('r', 'g', 'b', 'a', 'html', 'h'))
+        self.assertEqual(t.format(0x80336699), "Color32(51, 102, 153, 128) {#336699} 3333 H210")
+        self.assertEqual(t.format(0xFF808080), "Color32(128, 128, 128, 255) {#808080} 8080 H0")
+
+
+class LoadFormatTemplatesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings = QSettings(os.path.join(self.tmp.name, "settings.ini"), QSettings.Format.IniFormat)
+
+    def test_user_templates_and_bindings(self):
+        self.settings.setValue("formatTemplates/Unity", ["Color32({r}", "{g}", "{b}", "{a})"])   # an unquoted INI value with commas
+        self.settings.setValue("formatTemplates/CSS rgb()", "rgb({r} {g} {b})")
+        self.settings.setValue("formatTemplates/Broken", "{__class__}")
+        self.settings.setValue("formatButtons/rgba", "Unity")
+        self.settings.setValue("formatButtons/html", "Missing")
+        self.settings.setValue("formatButtons/nosuchbutton", "Unity")
+        templates = load_format_templates(self.settings)
+        self.assertNotIn("Broken", templates)
+        self.assertEqual(templates["Unity"].format(0xFF010203), "Color32(1, 2, 3, 255)")
+        self.assertEqual(templates["CSS rgb()"].format(0xFF010203), "rgb(1 2 3)")
+        bindings = load_button_bindings(self.settings, templates)
+        self.assertEqual(list(bindings), ["rgba"])
+        self.assertIs(bindings["rgba"], templates["Unity"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""PaletteStore: the one-time migration of INI palettes and saving/reopening the library file."""
+import os
+import tempfile
+import unittest
+
+from PySide6.QtCore import QSettings
+
+from palette_model import PaletteModel
+from palette_store import KIND_CUSTOM, KIND_USER, PaletteStore
+
+SOURCES = [("customColors", "Custom colors", KIND_CUSTOM, 16), ("userPalette", "User Palette", KIND_USER, 64),
+           ("missingPalette", "Missing", KIND_USER, 64)]
+
+
+class PaletteStoreMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "palettes.sqlite3")
+        self.settings = QSettings(os.path.join(self.tmp.name, "settings.ini"), QSettings.Format.IniFormat)
+        self.settings.setValue("customColors", ["#ffff0000", "", "#ff00ff00"])
+        self.settings.setValue("userPalette", "#ff0000ff")   # a one-element list reads back as a plain string
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _open(self) -> PaletteStore:
+        store = PaletteStore(self.path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_migrates_once(self):
+        store = self._open()
+        self.assertEqual(store.migrate_from_settings(self.settings, SOURCES), 2)
+        self.assertEqual([(p.name, p.kind, p.size, p.filled) for p in store.palettes()],
+                         [("Custom colors", KIND_CUSTOM, 16, 2), ("User Palette", KIND_USER, 64, 1)])
+        colors, filled = store.read_colors("Custom colors")
+        self.assertEqual((colors[0], colors[2], filled[1]), (0xFFFF0000, 0xFF00FF00, 0))
+        self.assertEqual(store.read_colors("User Palette")[0][0], 0xFF0000FF)
+        self.assertIsNotNone(store.meta("migratedFromSettings"))
+        self.assertEqual(store.migrate_from_settings(self.settings, SOURCES), 0)
+
+        # Neither a reopened library nor a palette that turns up in the INI later migrates again.
+        store.close()
+        self.settings.setValue("customColors", ["#ff123456"]); self.settings.setValue("missingPalette", ["#ff654321"])
+        store = self._open()
+        self.assertEqual(store.migrate_from_settings(self.settings, SOURCES), 0)
+        self.assertEqual(store.read_colors("Custom colors")[0][0], 0xFFFF0000)
+        self.assertNotIn("Missing", store)
+
+    def test_existing_palette_is_not_overwritten(self):
+        store = self._open()
+        model = PaletteModel(); model.load_strings(["#ff111111"], 16)
+        store.save("Custom colors", model, KIND_CUSTOM)
+        self.assertEqual(store.migrate_from_settings(self.settings, SOURCES), 1)
+        self.assertEqual(store.read_colors("Custom colors")[0][0], 0xFF111111)
+
+    def test_saved_palette_survives_reopen(self):
+        store = self._open()
+        model = PaletteModel(); model.load_strings(["#ff010203", "", "#80aabbcc"], 8)
+        store.save("Mine", model)
+        store.close()
+        self.assertEqual(self._open().load("Mine").to_strings(), model.to_strings())
+
+
+if __name__ == "__main__":
+    unittest.main()
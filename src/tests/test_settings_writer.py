@@ -0,0 +1,81 @@
+"""SettingsWriter: debounced batching, flush() and stop() writing the last value to the INI file."""
+import os
+import tempfile
+import time
+import unittest
+
+from PySide6.QtCore import QCoreApplication, QSettings
+
+from settings_writer import SettingsWriter
+
+
+def _ini_lines(path: str) -> set:
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f}
+
+
+class SettingsWriterTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "settings.ini")
+        self.settings = QSettings(self.path, QSettings.Format.IniFormat)
+        self.writer = SettingsWriter(self.settings, debounce_ms=20)
+
+    def tearDown(self):
+        self.writer.stop()
+        self.tmp.cleanup()
+
+    def test_debounce_batches_edits_into_one_write(self):
+        for i in range(10): self.writer.set_value("zoom", i)
+        self.assertEqual(self.writer.commits, 0)
+        deadline = time.monotonic() + 5.0
+        while self.writer.writes == 0 and time.monotonic() < deadline:
+            self.app.processEvents(); time.sleep(0.01)
+        self.assertEqual((self.writer.commits, self.writer.writes), (1, 1))
+        self.assertIn("zoom=9", _ini_lines(self.path))
+
+    def test_flush_writes_last_value(self):
+        for i in range(100): self.writer.set_value("zoom", i)
+        self.assertTrue(self.writer.flush())
+        self.assertIn("zoom=99", _ini_lines(self.path))
+        self.assertEqual(QSettings(self.path, QSettings.Format.IniFormat).value("zoom", type=int), 99)
+        self.assertEqual(self.writer.stats()['commits'], 1)
+
+    def test_stop_writes_last_value(self):
+        self.writer.set_value("zoom", 1); self.writer.flush()
+        self.writer.set_value("zoom", 2); self.writer.set_value("zoom", 3)
+        self.writer.stop()
+        self.assertIn("zoom=3", _ini_lines(self.path))
+        self.assertFalse(self.writer._thread.is_alive())
+
+    def test_unchanged_value_is_skipped(self):
+        self.writer.remember("zoom", 4)
+        self.writer.set_value("zoom", 4); self.writer.flush()
+        self.assertEqual((self.writer.commits, self.writer.unchanged_skipped), (0, 1))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_registered_snapshot_is_read_at_commit(self):
+        palette = ["#ff0000"]
+        self.writer.register("palette", lambda: list(palette))
+        for color in ("#00ff00", "#0000ff"):
+            palette[0] = color; self.writer.mark_dirty("palette")
+        self.writer.flush()
+        self.assertIn("palette=#0000ff", _ini_lines(self.path))
+        self.assertEqual((self.writer.commits, self.writer.cells_written), (1, 2))
+
+    def test_registered_writer_gets_last_snapshot(self):
+        palette, written = ["#ff0000"], []
+        self.writer.register("library", lambda: list(palette), written.append)
+        for color in ("#00ff00", "#0000ff"):
+            palette[0] = color; self.writer.mark_dirty("library")
+        self.writer.flush()
+        self.assertEqual(written, [["#0000ff"]])
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,291 @@
+"""
+Window-system access for the external-dialog send path.
+
+WindowBackend is the small slice of the Win32 API that finding a color dialog
+and writing RGB values into it needs. Win32WindowBackend forwards to pywin32;
+FakeWindowBackend simulates top-level windows, color dialogs and per-call
+latency in-process, so the send path can be exercised and measured on
+machines without Windows (see benchmarks.py).
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from app_logging import log_message
+
+_PYWIN32_AVAILABLE = True
+win32gui = None
+win32con = None
+win32api = None
+pywintypes = None
+try:
+    import pywintypes
+    import win32gui
+    import win32con
+    import win32api
+except ImportError:
+    _PYWIN32_AVAILABLE = False
+    log_message("pywin32 module (win32gui, win32con, win32api, pywintypes) is not available. External dialog interaction (sending RGB values) will be disabled.")
+
+# Message constants (winuser.h), so callers do not depend on win32con.
+WM_SETFOCUS = 0x0007
+WM_SETTEXT = 0x000C
+WM_COMMAND = 0x0111
+EM_SETSEL = 0x00B1
+EM_REPLACESEL = 0x00C2
+EN_CHANGE = 0x0300
+
+
+def make_long(low: int, high: int) -> int:
+    """MAKELONG: packs two 16-bit values into a WPARAM."""
+    return (low & 0xFFFF) | ((high & 0xFFFF) << 16)
+
+
+class WindowBackendError(Exception):
+    """A failed window call; carries the same fields as pywintypes.error."""
+    def __init__(self, winerror: int, funcname: str, strerror: str):
+        super().__init__(winerror, funcname, strerror)
+        self.winerror = winerror
+        self.funcname = funcname
+        self.strerror = strerror
+
+
+# Errors a backend call may raise; catch these instead of pywintypes.error.
+WINDOW_ERRORS = (WindowBackendError, pywintypes.error) if _PYWIN32_AVAILABLE else (WindowBackendError,)
+
+
+class WindowBackend(ABC):
+    """Interface of the window calls used by the dialog locator and sender."""
+    name = "base"
+
+    @abstractmethod
+    def enum_windows(self, callback):
+        """Calls callback(hwnd) for each top-level window in Z-order until it returns False."""
+
+    @abstractmethod
+    def get_class_name(self, hwnd) -> str:
+        ...
+
+    @abstractmethod
+    def get_dlg_item(self, hwnd, control_id: int):
+        """Handle of the child control with control_id, or 0."""
+
+    @abstractmethod
+    def is_window(self, hwnd) -> bool:
+        ...
+
+    @abstractmethod
+    def get_window_text(self, hwnd) -> str:
+        ...
+
+    @abstractmethod
+    def is_iconic(self, hwnd) -> bool:
+        ...
+
+    @abstractmethod
+    def restore_window(self, hwnd):
+        ...
+
+    @abstractmethod
+    def get_foreground_window(self):
+        ...
+
+    @abstractmethod
+    def bring_to_top(self, hwnd):
+        """Raises hwnd to the top of the Z-order without moving or resizing it."""
+
+    @abstractmethod
+    def send_message(self, hwnd, message: int, wparam, lparam):
+        ...
+
+    @abstractmethod
+    def post_message(self, hwnd, message: int, wparam, lparam):
+        ...
+
+
+class Win32WindowBackend(WindowBackend):
+    name = "win32"
+
+    def enum_windows(self, callback):
+        stopped = [False]
+
+        def enum_windows_proc(hwnd, _):
+            if callback(hwnd) is False:
+                stopped[0] = True
+                return False
+            return True
+
+        try:
+            win32gui.EnumWindows(enum_windows_proc, None)
+        except pywintypes.error:
+            # Stopping early from the callback surfaces as an error with code 0.
+            if not stopped[0]: raise
+
+    def get_class_name(self, hwnd) -> str:
+        return win32gui.GetClassName(hwnd)
+
+    def get_dlg_item(self, hwnd, control_id: int):
+        return win32gui.GetDlgItem(hwnd, control_id)
+
+    def is_window(self, hwnd) -> bool:
+        return bool(win32gui.IsWindow(hwnd))
+
+    def get_window_text(self, hwnd) -> str:
+        return win32gui.GetWindowText(hwnd)
+
+    def is_iconic(self, hwnd) -> bool:
+        return bool(win32gui.IsIconic(hwnd))
+
+    def restore_window(self, hwnd):
+        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+
+    def get_foreground_window(self):
+        return win32gui.GetForegroundWindow()
+
+    def bring_to_top(self, hwnd):
+        win32gui.SetWindowPos(hwnd, win32con.HWND_TOP, 0, 0, 0, 0, win32con.SWP_NOMOVE | win32con.SWP_NOSIZE | win32con.SWP_SHOWWINDOW)
+
+    def send_message(self, hwnd, message: int, wparam, lparam):
+        return win32gui.SendMessage(hwnd, message, wparam, lparam)
+
+    def post_message(self, hwnd, message: int, wparam, lparam):
+        win32api.PostMessage(hwnd, message, wparam, lparam)
+
+
+def default_window_backend():
+    """The Win32 backend, or None where pywin32 is not available."""
+    return Win32WindowBackend() if _PYWIN32_AVAILABLE else None
+
+
+class FakeWindowBackend(WindowBackend):
+    """
+    In-process stand-in for the Win32 window list. It holds window_count
+    ordinary top-level windows (every tenth one an unrelated "#32770" message
+    box, as on a real desktop) plus the color dialogs added with add_dialog().
+    Every call spends call_latency seconds and is counted in calls; messages
+    sent to edit controls update control_texts like the real controls would.
+    """
+    BACKGROUND_CLASSES = ("Chrome_WidgetWin_1", "Notepad", "CabinetWClass", "Shell_TrayWnd", "ConsoleWindowClass",
+                          "MozillaWindowClass", "ApplicationFrameWindow", "TaskManagerWindow", "XLMAIN")
+
+    def __init__(self, window_count: int = 100, call_latency: float = 0.0):
+        self.call_latency = call_latency
+        self._lock = threading.Lock()
+        self._next_hwnd = 0x10000
+        self.windows = []
+        self._classes = {}
+        self._titles = {}
+        self._children = {}
+        self.control_texts = {}
+        self.iconic = set()
+        self.foreground = None
+        self.calls = {}
+        self.messages = 0
+        for i in range(window_count):
+            self._add_window("#32770" if i % 10 == 9 else self.BACKGROUND_CLASSES[i % len(self.BACKGROUND_CLASSES)], f"Window {i}")
+
+    def add_dialog(self, profile, title: str = None, on_top: bool = False, edit_class: str = None):
+        """Adds a color dialog matching profile (at the bottom of the Z-order unless on_top); returns its hwnd."""
+        hwnd = self._add_window(profile.dialog_class, title or profile.title, on_top)
+        for cid in profile.control_ids:
+            child = self._new_hwnd()
+            self._classes[child] = edit_class or profile.edit_class
+            self._children[(hwnd, cid)] = child
+            self.control_texts[child] = "0"
+        return hwnd
+
+    def close_window(self, hwnd):
+        with self._lock:
+            if hwnd in self.windows: self.windows.remove(hwnd)
+            self._classes.pop(hwnd, None)
+            for key in [key for key in self._children if key[0] == hwnd]:
+                self._classes.pop(self._children.pop(key), None)
+
+    def dialog_rgb(self, hwnd, profile) -> tuple:
+        """The text currently shown in the dialog's R, G and B controls."""
+        return tuple(self.control_texts.get(self._children.get((hwnd, cid))) for cid in profile.control_ids)
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls = {}
+            self.messages = 0
+
+    def _new_hwnd(self):
+        self._next_hwnd += 4
+        return self._next_hwnd
+
+    def _add_window(self, class_name: str, title: str, on_top: bool = False):
+        hwnd = self._new_hwnd()
+        self._classes[hwnd] = class_name
+        self._titles[hwnd] = title
+        if on_top: self.windows.insert(0, hwnd)
+        else: self.windows.append(hwnd)
+        return hwnd
+
+    def _call(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.call_latency > 0:
+            # Busy-wait: time.sleep() cannot resolve the microsecond latencies of real window calls.
+            end = time.perf_counter() + self.call_latency
+            while time.perf_counter() < end: pass
+
+    def _check(self, hwnd, funcname: str):
+        if hwnd not in self._classes:
+            raise WindowBackendError(1400, funcname, "Invalid window handle.")
+
+    def enum_windows(self, callback):
+        self._call("EnumWindows")
+        for hwnd in list(self.windows):
+            if callback(hwnd) is False: break
+
+    def get_class_name(self, hwnd) -> str:
+        self._call("GetClassName")
+        self._check(hwnd, "GetClassName")
+        return self._classes[hwnd]
+
+    def get_dlg_item(self, hwnd, control_id: int):
+        self._call("GetDlgItem")
+        return self._children.get((hwnd, control_id), 0)
+
+    def is_window(self, hwnd) -> bool:
+        self._call("IsWindow")
+        return hwnd in self._classes
+
+    def get_window_text(self, hwnd) -> str:
+        self._call("GetWindowText")
+        return self._titles.get(hwnd, "")
+
+    def is_iconic(self, hwnd) -> bool:
+        self._call("IsIconic")
+        return hwnd in self.iconic
+
+    def restore_window(self, hwnd):
+        self._call("ShowWindow")
+        self.iconic.discard(hwnd)
+
+    def get_foreground_window(self):
+        self._call("GetForegroundWindow")
+        return self.foreground
+
+    def bring_to_top(self, hwnd):
+        self._call("SetWindowPos")
+        self._check(hwnd, "SetWindowPos")
+        with self._lock:
+            self.windows.remove(hwnd); self.windows.insert(0, hwnd)
+
+    def send_message(self, hwnd, message: int, wparam, lparam):
+        self._call("SendMessage")
+        self._check(hwnd, "SendMessage")
+        with self._lock:
+            self.messages += 1
+            if message in (WM_SETTEXT, EM_REPLACESEL):
+                # EM_REPLACESEL replaces everything because the sender selects all first.
+                self.control_texts[hwnd] = str(lparam)
+        return 1
+
+    def post_message(self, hwnd, message: int, wparam, lparam):
+        self._call("PostMessage")
+        self._check(hwnd, "PostMessage")
+        with self._lock:
+            self.messages += 1